@@ -1,36 +1,73 @@
 import pandas as pd
 import os
 import numpy as np
-from scipy.stats import bootstrap
+from columnar_cache import load_series
+from bootstrap_engine import median_ratio_ci
+from sweep import file_frame, load_file_arrays, run_sweep
+from phases import PhaseIndex, PhaseWindows, median
 
-def load_csv(file_path):
-    """Load CSV file into a DataFrame."""
-    return pd.read_csv(file_path)
-
-def split_phases(df):
-    """Split data into pre-noise, noise, and post-noise phases."""
-    pre_noise = df[df['elapsed_time'] < 200]
-    noise = df[(df['elapsed_time'] >= 200) & (df['elapsed_time'] <= 500)]
-    post_noise = df[df['elapsed_time'] > 500]
-    return pre_noise, noise, post_noise
+# Phase windows of the baseline comparison; the pipeline's baseline stage uses the
+# same ones, since both write the same '<parent>/<phase>.csv' tables
+COMPARISON_WINDOWS = PhaseWindows(noise_start=200, noise_end=500)
 
-def compute_median(df):
-    """Compute the median http_req_duration."""
-    return df['http_req_duration'].median()
+def load_csv(file_path):
+    """Load CSV file into a DataFrame through the typed columnar cache."""
+    return load_series(file_path)
 
-def compute_ratio_ci(df_v1, df_v2):
+def compute_ratio_ci(df_v1, df_v2, seed=None):
     """Compute the 99% confidence interval for the ratio of medians using bootstrapping."""
-    if len(df_v1) == 0 or len(df_v2) == 0:
-        return (np.nan, np.nan)
-
-    def median_ratio(v1, v2):
-        return np.median(v2) / np.median(v1) if np.median(v1) != 0 else np.nan
+    return median_ratio_ci(df_v1['http_req_duration'].values, df_v2['http_req_duration'].values,
+                           confidence_level=0.99, seed=seed)
 
-    res = bootstrap((df_v1['http_req_duration'].values, df_v2['http_req_duration'].values),
-                    statistic=median_ratio, confidence_level=0.99, method='percentile')
-    return res.confidence_interval.low, res.confidence_interval.high
+def analyze_endpoint(name, endpoint, baseline_v1, baseline_v2, exp_v1, exp_v2, seed=None, windows=None):
+    """Compute the result row of every phase for one endpoint of one run directory."""
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seeds = iter(seed_sequence.spawn(6))
 
-def analyze_experiment(parent, baseline_files, experiment_files, directory):
+    # Sort every series once; the phases are zero-copy slices of these indexes
+    baseline_index_v1, baseline_index_v2, exp_index_v1, exp_index_v2 = [
+        PhaseIndex(df, windows) for df in (baseline_v1, baseline_v2, exp_v1, exp_v2)
+    ]
+    rows = {}
+
+    for phase_name in ["pre_noise", "noise", "post_noise"]:
+        baseline_phase_v1 = baseline_index_v1.phase(phase_name)
+        baseline_phase_v2 = baseline_index_v2.phase(phase_name)
+        exp_phase_v1 = exp_index_v1.phase(phase_name)
+        exp_phase_v2 = exp_index_v2.phase(phase_name)
+
+        median_baseline_v1 = median(baseline_phase_v1)
+        median_baseline_v2 = median(baseline_phase_v2)
+        median_exp_v1 = median(exp_phase_v1)
+        median_exp_v2 = median(exp_phase_v2)
+
+        relative_change_exp = median_exp_v2 / median_exp_v1 if median_exp_v1 != 0 else np.nan
+        relative_change_baseline = median_baseline_v2 / median_baseline_v1 if median_baseline_v1 != 0 else np.nan
+
+        ci_exp = median_ratio_ci(exp_phase_v1, exp_phase_v2, confidence_level=0.99, seed=next(seeds))
+        ci_baseline = median_ratio_ci(baseline_phase_v1, baseline_phase_v2, confidence_level=0.99, seed=next(seeds))
+
+        rows[phase_name] = [
+            name,
+            endpoint,
+            median_exp_v1,
+            median_exp_v2,
+            relative_change_exp,
+            ci_exp[0], ci_exp[1],
+            median_baseline_v1,
+            median_baseline_v2,
+            relative_change_baseline,
+            ci_baseline[0], ci_baseline[1]
+        ]
+
+    return rows
+
+def experiment_name(parent, directory):
+    """Label of an experiment row, e.g. 'core_isolation 20t'."""
+    threads = (directory.split('_')[2].replace('t', ''))
+    return parent + " " + threads + "t"
+
+def analyze_experiment(parent, baseline_files, experiment_files, directory, windows=None):
     results = {"pre_noise": [], "noise": [], "post_noise": []}
 
     for experiment in experiment_files:
@@ -43,44 +80,72 @@ def analyze_experiment(parent, baseline_files, experiment_files, directory):
             print(baseline_files[0][endpoint][0])
             print(files[0])
 
-            for i, phase_name in enumerate(["pre_noise", "noise", "post_noise"]):
-                baseline_phase_v1 = split_phases(baseline_v1)[i]
-                baseline_phase_v2 = split_phases(baseline_v2)[i]
-                exp_phase_v1 = split_phases(exp_v1)[i]
-                exp_phase_v2 = split_phases(exp_v2)[i]
-
-                median_baseline_v1 = compute_median(baseline_phase_v1)
-                median_baseline_v2 = compute_median(baseline_phase_v2)
-                median_exp_v1 = compute_median(exp_phase_v1)
-                median_exp_v2 = compute_median(exp_phase_v2)
-
-                relative_change_exp = median_exp_v2 / median_exp_v1 if median_exp_v1 != 0 else np.nan
-                relative_change_baseline = median_baseline_v2 / median_baseline_v1 if median_baseline_v1 != 0 else np.nan
-
-                ci_exp = compute_ratio_ci(exp_phase_v1, exp_phase_v2)
-                ci_baseline = compute_ratio_ci(baseline_phase_v1, baseline_phase_v2)
-
-
-                threads = (directory.split('_')[2].replace('t', ''))
-
-                name = parent + " " + threads + "t"
-                results[phase_name].append([
-                    name,  
-                    endpoint,
-                    median_exp_v1,
-                    median_exp_v2,
-                    relative_change_exp,
-                    ci_exp[0], ci_exp[1],
-                    median_baseline_v1,
-                    median_baseline_v2,
-                    relative_change_baseline,
-                    ci_baseline[0], ci_baseline[1]
-                ])
+            rows = analyze_endpoint(experiment_name(parent, directory), endpoint, baseline_v1, baseline_v2, exp_v1, exp_v2,
+                                    windows=windows)
+            for phase_name, row in rows.items():
+                results[phase_name].append(row)
 
     return results
 
-def display_results(results, parent):
-    """Display results in table format and save to CSV."""
+def analyze_cell(cell, arrays, seed):
+    """Sweep worker: analyzes one directory/endpoint cell on the shared arrays."""
+    baseline_v1, baseline_v2, exp_v1, exp_v2 = [file_frame(arrays, file_path) for file_path in cell['files']]
+    return analyze_endpoint(cell['name'], cell['endpoint'], baseline_v1, baseline_v2, exp_v1, exp_v2,
+                            seed=seed, windows=cell['windows'])
+
+def experiment_cells(parent, baseline_files, experiment_files, directories, windows=None):
+    """Sweep cells of every directory/endpoint pair of an experiment, in directory order."""
+    cells = []
+    for directory in directories:
+        for endpoint, files in experiment_files[directory].items():
+            cells.append({
+                'directory': directory,
+                'name': experiment_name(parent, directory),
+                'endpoint': endpoint,
+                'files': baseline_files[directory][endpoint] + files,
+                'windows': windows
+            })
+    return cells
+
+def cell_key(parent, cell):
+    """Stable sweep key of a cell, so its seed does not depend on the other cells of the sweep."""
+    return f"{parent}/{cell['directory']}/{cell['endpoint']}"
+
+def sweep_cells(parent, cells, base_seed=0, max_workers=None):
+    """Runs analyze_cell over the cells in parallel; returns the phase rows of each cell."""
+    arrays = load_file_arrays(file_path for cell in cells for file_path in cell['files'])
+    return run_sweep(analyze_cell, cells, arrays, base_seed=base_seed, max_workers=max_workers,
+                     cell_keys=[cell_key(parent, cell) for cell in cells])
+
+def sweep_experiment(parent, baseline_files, experiment_files, directories, base_seed=0, max_workers=None, windows=None):
+    """Parallel version of analyze_experiment over several run directories.
+
+    baseline_files and experiment_files map each directory to its endpoint file
+    pairs. Returns one results dict per directory, in directory order.
+    """
+    cells = experiment_cells(parent, baseline_files, experiment_files, directories, windows)
+    cell_rows = sweep_cells(parent, cells, base_seed=base_seed, max_workers=max_workers)
+
+    results = {directory: {"pre_noise": [], "noise": [], "post_noise": []} for directory in directories}
+    for cell, rows in zip(cells, cell_rows):
+        for phase_name, row in rows.items():
+            results[cell['directory']][phase_name].append(row)
+    return [results[directory] for directory in directories]
+
+def merge_results(results_list):
+    """Concatenates the per-directory results of sweep_experiment phase by phase."""
+    merged = {"pre_noise": [], "noise": [], "post_noise": []}
+    for results in results_list:
+        for phase_name, rows in results.items():
+            merged[phase_name].extend(rows)
+    return merged
+
+def display_results(results, parent, output_dir=None):
+    """Display results in table format and save them to '<phase>.csv' in output_dir (default: parent).
+
+    The files are rewritten on every call, so reruns never append duplicate rows.
+    """
+    output_dir = parent if output_dir is None else output_dir
     for phase, data in results.items():
         df = pd.DataFrame(data, columns=[
             "Experiment Type", "Endpoint", "Median V1", "Median V2", "Relative Change Exp",
@@ -90,43 +155,32 @@ def display_results(results, parent):
         print(f"\n{phase.upper()} PHASE")
         print(df.to_string(index=False))
 
-        # Save the results to a CSV file in the parent directory
-        output_path = os.path.join(parent, f"{phase}.csv")
-
-        # Check if the file already exists
-        if os.path.exists(output_path):
-            # Append the new data to the existing file
-            df.to_csv(output_path, mode='a', header=False, encoding='utf-8', index=False)
-        else:
-            # Create a new file with the data
-            df.to_csv(output_path, encoding='utf-8', index=False)
+        df.to_csv(os.path.join(output_dir, f"{phase}.csv"), encoding='utf-8', index=False)
 
+if __name__ == "__main__":
+    directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
 
+    parent = "core_isolation"
+    windows = COMPARISON_WINDOWS
 
-directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
-
-parent = "core_isolation"
-# Iterate over each directory and run the analysis
-for directory in directories:
-    experiment_files = [
-        {
+    experiment_files = {}
+    baseline_files = {}
+    for directory in directories:
+        experiment_files[directory] = {
             "bookings": [f"./{parent}/{directory}/3000/bookings.csv", f"./{parent}/{directory}/3001/bookings.csv"],
             "destinations": [f"./{parent}/{directory}/3000/destinations.csv", f"./{parent}/{directory}/3001/destinations.csv"],
             "flights": [f"./{parent}/{directory}/3000/flights.csv", f"./{parent}/{directory}/3001/flights.csv"],
             "seats": [f"./{parent}/{directory}/3000/seats.csv", f"./{parent}/{directory}/3001/seats.csv"]
         }
-    ]
 
-    # Define file paths
-    baseline_files = [
-        {
+        # Define file paths
+        baseline_files[directory] = {
             "bookings": [f"./baseline/{directory}/3000/bookings.csv", f"./baseline/{directory}/3001/bookings.csv"],
             "destinations": [f"./baseline/{directory}/3000/destinations.csv", f"./baseline/{directory}/3001/destinations.csv"],
             "flights": [f"./baseline/{directory}/3000/flights.csv", f"./baseline/{directory}/3001/flights.csv"],
             "seats": [f"./baseline/{directory}/3000/seats.csv", f"./baseline/{directory}/3001/seats.csv"]
         }
-    ]
 
-    # Run analysis
-    results = analyze_experiment(parent, baseline_files, experiment_files, directory)
-    display_results(results, parent)
+    # Run the analysis of all directories and endpoints in parallel, then report all of them in one table per phase
+    results = sweep_experiment(parent, baseline_files, experiment_files, directories, base_seed=0, windows=windows)
+    display_results(merge_results(results), parent)
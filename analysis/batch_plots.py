@@ -0,0 +1,69 @@
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib
+matplotlib.use("Agg")  # Render to files only; must be selected before pyplot is imported
+
+from downsampling import DEFAULT_MAX_POINTS
+from pipeline import load_config
+from relative_change_plot import plot_relative_change
+from timeseries import plot_median_response_time
+
+def plot_jobs(config, output_dir="plots"):
+    """Lists one job per experiment, run directory and endpoint whose two per-endpoint files exist."""
+    root = config['root']
+    port1, port2 = config['ports'][:2]
+    jobs = []
+    for parent, directories in config['experiments'].items():
+        for directory in directories:
+            for endpoint in config['endpoints']:
+                file1 = os.path.join(root, parent, directory, str(port1), f"{endpoint}.csv")
+                file2 = os.path.join(root, parent, directory, str(port2), f"{endpoint}.csv")
+                if not (os.path.exists(file1) and os.path.exists(file2)):
+                    continue
+                jobs.append({
+                    'file1': file1,
+                    'file2': file2,
+                    'output_prefix': os.path.join(root, parent, output_dir, f"{directory}-{endpoint}"),
+                    'title': f"{parent} {directory} ({endpoint})"
+                })
+    return jobs
+
+def render_job(job, warmup_time=60, cooldown_time=150, max_points=DEFAULT_MAX_POINTS, method='lttb', window_size=10):
+    """Renders the time series and relative change plots of one job to PNG files."""
+    os.makedirs(os.path.dirname(job['output_prefix']), exist_ok=True)
+    timeseries_file = f"{job['output_prefix']}.timeseries.png"
+    relative_change_file = f"{job['output_prefix']}.relative_change.png"
+
+    plot_median_response_time(job['file1'], job['file2'], warmup_time, cooldown_time, fast=True, max_points=max_points,
+                              method=method, output_file=timeseries_file, title=f"Time Series Comparison - {job['title']}")
+    plot_relative_change(job['file1'], job['file2'], warmup_time, cooldown_time, window_size=window_size, fast=True,
+                         output_file=relative_change_file, title=f"Relative Change Between Runs - {job['title']}",
+                         use_pyramid=True)
+    return timeseries_file, relative_change_file
+
+def render_all(jobs, max_workers=None, **options):
+    """Renders all jobs headlessly on a process pool and returns the written files in job order."""
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(render_job, job, **options) for job in jobs]
+        return [future.result() for future in futures]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Renders the plots of every run directory and endpoint to image files.")
+    parser.add_argument("config", help="Path to the experiment config (JSON)")
+    parser.add_argument("--output-dir", default="plots", help="Directory inside each experiment for the images")
+    parser.add_argument("--workers", type=int, default=None, help="Number of parallel render processes")
+    parser.add_argument("--max-points", type=int, default=DEFAULT_MAX_POINTS, help="Points drawn per run")
+    parser.add_argument("--method", choices=["lttb", "minmax"], default="lttb", help="Downsampling method")
+    parser.add_argument("--window-size", type=int, default=10, help="Window of the relative change plot (seconds)")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    phases = config.get('phases', {})
+    jobs = plot_jobs(config, args.output_dir)
+    files = render_all(jobs, max_workers=args.workers, warmup_time=phases.get('warmup_time', 60),
+                       cooldown_time=phases.get('cooldown_time', 150), max_points=args.max_points,
+                       method=args.method, window_size=args.window_size)
+    print(f"Rendered {len(files) * 2} plots for {len(jobs)} run/endpoint pairs.")
@@ -0,0 +1,224 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from columnar_cache import ensure_cache, write_json_atomic
+from phases import PhaseIndex, PhaseWindows
+from preprocessing_filter import filter_and_aggregate_csv_chunked
+import rank_kernel
+from rel_change_table import analyze_response_data, bootstrap_relative_change, dataframe_to_latex, read_csv
+from synthetic import generate_run
+
+STAGES = ['ingest', 'phase_split', 'bootstrap', 'mann_whitney', 'table']
+ENDPOINTS = ['bookings', 'destinations', 'flights', 'seats']
+PORTS = (3000, 3001)
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+def scale_key(rows, duration):
+    """Key of one benchmark scale in the baseline file, e.g. '1000000 rows/1000s'."""
+    return f"{rows} rows/{duration}s"
+
+def measure(function, repeat=1, memory=True):
+    """Runs function `repeat` times and returns the best wall time and the peak memory of one run.
+
+    Memory is measured in an extra, untimed run first, since tracing
+    allocations slows the code down; it also warms up imports and caches for
+    the timed runs. 'peak_mib' is the tracemalloc peak of the run (Python and
+    numpy allocations) and 'maxrss_mib' the process's maximum resident set
+    size after it.
+    """
+    result = {}
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        result['peak_mib'] = peak / 2**20
+        result['maxrss_mib'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2**10  # KiB on Linux
+
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    result['seconds'] = best
+    return result
+
+def prepare_data(data_dir, rows, duration, windows, seed=0):
+    """Generates the synthetic run of one scale, unless it already exists."""
+    run_dir = os.path.join(data_dir, f"rows{rows}_{duration}s_seed{seed}")
+    if not all(os.path.exists(os.path.join(run_dir, f"client_results_{port}.csv")) for port in PORTS):
+        print(f"Generating {rows} rows per port in '{run_dir}'.")
+        generate_run(run_dir, rows, ports=PORTS, seed=seed, duration=duration,
+                     noise_start=windows.noise_start, noise_end=windows.noise_end)
+    return run_dir
+
+def benchmark_scale(run_dir, windows, stages=STAGES, repeat=1, memory=True, n_bootstrap=10000):
+    """Times every selected stage on one synthetic run; returns {stage: measurement}."""
+    endpoint_files = {
+        endpoint: [os.path.join(run_dir, str(port), f"{endpoint}.csv") for port in PORTS] for endpoint in ENDPOINTS
+    }
+
+    def ingest():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for port in PORTS:
+                filter_and_aggregate_csv_chunked(os.path.join(run_dir, f"client_results_{port}.csv"), 'http_req_duration',
+                                                 os.path.join(run_dir, str(port)), write_sketches=True, traffic_stats=True)
+
+    def phase_split():
+        return {
+            endpoint: [PhaseIndex(read_csv(file_path), windows) for file_path in files]
+            for endpoint, files in endpoint_files.items()
+        }
+
+    def bootstrap():
+        for index1, index2 in indexes.values():
+            for phase in ('pre_noise', 'noise', 'post_noise'):
+                bootstrap_relative_change(index1.phase(phase), index2.phase(phase), n_bootstrap=n_bootstrap, seed=0)
+
+    def mann_whitney():
+        # Noise, Non-Noise and Overall tests from one sort per phase, as in analyze_response_data
+        for index1, index2 in indexes.values():
+            rank_kernel.phase_mannwhitney(rank_kernel.sorted_phases(index1.phase("noise"), index1.non_noise()),
+                                          rank_kernel.sorted_phases(index2.phase("noise"), index2.non_noise()))
+
+    def table():
+        final_table = pd.DataFrame(table_results)
+        final_table.to_csv(io.StringIO(), index=False)
+        dataframe_to_latex(final_table, caption="Benchmark", label="tab:benchmark")
+
+    measurements = {}
+    # Later stages read the outputs of the ingest, so it also runs (untimed) when it is not selected
+    if 'ingest' in stages or not all(os.path.exists(path) for files in endpoint_files.values() for path in files):
+        result = measure(ingest, repeat, memory)
+        if 'ingest' in stages:
+            measurements['ingest'] = result
+
+    # The columnar cache is built once up front; the phase split measures loading from it
+    for files in endpoint_files.values():
+        for file_path in files:
+            ensure_cache(file_path)
+    indexes = phase_split()
+    if 'phase_split' in stages:
+        measurements['phase_split'] = measure(phase_split, repeat, memory)
+    if 'bootstrap' in stages:
+        measurements['bootstrap'] = measure(bootstrap, repeat, memory)
+    if 'mann_whitney' in stages:
+        measurements['mann_whitney'] = measure(mann_whitney, repeat, memory)
+    if 'table' in stages:
+        table_results = [
+            analyze_response_data(read_csv(files[0]), read_csv(files[1]), endpoint, warmup_time=windows.warmup_time,
+                                  cooldown_time=windows.cooldown_time, noise_start=windows.noise_start,
+                                  noise_end=windows.noise_end, seed=0)
+            for endpoint, files in endpoint_files.items()
+        ]
+        table()  # The first LaTeX export loads pandas' templating; keep that out of the measurements
+        measurements['table'] = measure(table, repeat, memory)
+    return measurements
+
+def load_baseline(baseline_file):
+    try:
+        with open(baseline_file, 'r') as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return {'scales': {}}
+
+def compare(results, baseline, time_tolerance=0.25, memory_tolerance=0.15, min_slowdown=0.05):
+    """Regressions of the results against the baseline, as readable messages.
+
+    A stage regressed if it took more than (1 + time_tolerance) times its
+    baseline time and at least min_slowdown seconds longer (so that timer noise
+    on millisecond stages does not count), or if its tracemalloc peak grew by
+    more than memory_tolerance.
+    """
+    regressions = []
+    for scale, measurements in results.items():
+        for stage, measurement in measurements.items():
+            reference = baseline['scales'].get(scale, {}).get(stage)
+            if reference is None:
+                continue
+            slowdown = measurement['seconds'] - reference['seconds']
+            if measurement['seconds'] > reference['seconds'] * (1 + time_tolerance) and slowdown >= min_slowdown:
+                regressions.append(f"{scale} {stage}: {measurement['seconds']:.3f}s vs. {reference['seconds']:.3f}s baseline")
+            if 'peak_mib' in measurement and 'peak_mib' in reference and \
+                    measurement['peak_mib'] > reference['peak_mib'] * (1 + memory_tolerance):
+                regressions.append(f"{scale} {stage}: {measurement['peak_mib']:.1f} MiB peak vs. "
+                                   f"{reference['peak_mib']:.1f} MiB baseline")
+    return regressions
+
+def report(results, baseline):
+    """One row per scale and stage, with the change relative to the baseline."""
+    rows = []
+    for scale, measurements in results.items():
+        for stage, measurement in measurements.items():
+            reference = baseline['scales'].get(scale, {}).get(stage, {})
+            rows.append({
+                'Scale': scale,
+                'Stage': stage,
+                'Seconds': measurement['seconds'],
+                'Time vs. Baseline': measurement['seconds'] / reference['seconds'] if reference else np.nan,
+                'Peak MiB': measurement.get('peak_mib', np.nan),
+                'Max RSS MiB': measurement.get('maxrss_mib', np.nan),
+                'Memory vs. Baseline': measurement['peak_mib'] / reference['peak_mib']
+                if reference.get('peak_mib') and 'peak_mib' in measurement else np.nan
+            })
+    return pd.DataFrame(rows)
+
+def environment():
+    """Machine and library versions the measurements were taken with."""
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count()
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks the analysis stages on synthetic k6 output.")
+    parser.add_argument("--rows", type=float, action="append", help="Rows per client_results file, repeatable (default 1e6)")
+    parser.add_argument("--duration", type=int, default=1000, help="Run length in seconds")
+    parser.add_argument("--stage", choices=STAGES, action="append", help="Only benchmark the given stage(s)")
+    parser.add_argument("--data-dir", default="./benchmark_data", help="Where the synthetic runs are generated and kept")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per stage; the best time counts")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the memory measurement runs")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file to compare against")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the new baseline")
+    parser.add_argument("--time-tolerance", type=float, default=0.25, help="Allowed relative slowdown before a stage counts as regressed")
+    parser.add_argument("--memory-tolerance", type=float, default=0.15, help="Allowed relative peak memory growth")
+    args = parser.parse_args()
+
+    windows = PhaseWindows(noise_start=200, noise_end=500, warmup_time=60, cooldown_time=150)
+    stages = args.stage or STAGES
+    results = {}
+    for rows in [int(rows) for rows in (args.rows or [1e6])]:
+        run_dir = prepare_data(args.data_dir, rows, args.duration, windows)
+        results[scale_key(rows, args.duration)] = benchmark_scale(run_dir, windows, stages, args.repeat, not args.no_memory)
+
+    baseline = load_baseline(args.baseline)
+    with pd.option_context('display.width', 200):
+        print(report(results, baseline).to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+
+    if args.update_baseline:
+        for scale, measurements in results.items():
+            baseline['scales'].setdefault(scale, {}).update(measurements)
+        baseline['environment'] = environment()
+        write_json_atomic(args.baseline, baseline)
+        print(f"Baseline saved to '{args.baseline}'.")
+        sys.exit(0)
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    sys.exit(1 if regressions else 0)
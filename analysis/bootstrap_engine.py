@@ -0,0 +1,156 @@
+import numpy as np
+
+# Upper bound for the memory used by one batch of resample indices
+DEFAULT_BATCH_BYTES = 256 * 1024 * 1024
+
+def as_sample(data):
+    """Converts a Series or array-like to a contiguous floating point numpy array."""
+    sample = np.ascontiguousarray(data)
+    if not np.issubdtype(sample.dtype, np.floating):
+        sample = sample.astype(np.float64)
+    return sample
+
+def batch_size_for(n, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Returns how many resamples of size n fit into the batch memory budget."""
+    bytes_per_resample = max(n, 1) * 8  # int32 indices plus the partition buffer
+    return max(1, int(max_batch_bytes // bytes_per_resample))
+
+def batch_median_ranks(indices):
+    """Selects the two middle order statistics of every row with partitioning instead of a full sort.
+
+    Returns the lower and upper middle values, which are equal for odd row lengths.
+    """
+    n = indices.shape[1]
+    k = n // 2
+    partitioned = np.partition(indices, k, axis=1)
+    upper = partitioned[:, k]
+    if n % 2 == 1:
+        return upper, upper
+    return partitioned[:, :k].max(axis=1), upper
+
+def resample_medians(sample, n_resamples, rng, batch_size):
+    """Returns the medians of n_resamples bootstrap resamples, drawn batch by batch.
+
+    Resampling is done on ranks into the sorted sample: since the sorted sample is
+    monotonic, the median of a resample is the sorted value at the median rank,
+    so the values themselves never have to be gathered or partitioned.
+    """
+    sorted_sample = np.sort(sample).astype(np.float64)
+    n = len(sorted_sample)
+    medians = np.empty(n_resamples, dtype=np.float64)
+    for start in range(0, n_resamples, batch_size):
+        stop = min(start + batch_size, n_resamples)
+        indices = rng.integers(0, n, size=(stop - start, n), dtype=np.int32)
+        lower, upper = batch_median_ranks(indices)
+        medians[start:stop] = (sorted_sample[lower] + sorted_sample[upper]) / 2
+    return medians
+
+def bootstrap_median_ratios(data1, data2, n_bootstrap=10000, seed=None, rng=None, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Draws n_bootstrap resampled ratios median(data2) / median(data1).
+
+    Pass either a seed or an existing numpy Generator to make the draws reproducible.
+    Ratios with a zero denominator are NaN.
+    """
+    sample1 = as_sample(data1)
+    sample2 = as_sample(data2)
+    if rng is None:
+        rng = np.random.default_rng(seed)
+
+    batch_size = batch_size_for(max(len(sample1), len(sample2)), max_batch_bytes)
+    medians1 = resample_medians(sample1, n_bootstrap, rng, batch_size)
+    medians2 = resample_medians(sample2, n_bootstrap, rng, batch_size)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(medians1 != 0, medians2 / medians1, np.nan)
+
+def percentile_interval(ratios, ci=0.99):
+    """Returns the percentile confidence interval of the bootstrap distribution."""
+    lower = np.percentile(ratios, (1 - ci) / 2 * 100)
+    upper = np.percentile(ratios, (1 + ci) / 2 * 100)
+    return float(lower), float(upper)
+
+def bootstrap_relative_change(data1, data2, n_bootstrap=10000, ci=0.99, seed=None, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Calculates the confidence interval and mean of the median ratio using batched bootstrapping."""
+    ratios = bootstrap_median_ratios(data1, data2, n_bootstrap, seed=seed, max_batch_bytes=max_batch_bytes)
+    lower_bound, upper_bound = percentile_interval(ratios, ci)
+    return lower_bound, upper_bound, float(np.mean(ratios))
+
+def median_ratio_ci(data1, data2, confidence_level=0.99, n_resamples=9999, seed=None, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Percentile confidence interval for the ratio of medians, matching scipy.stats.bootstrap's defaults."""
+    if len(data1) == 0 or len(data2) == 0:
+        return (np.nan, np.nan)
+
+    ratios = bootstrap_median_ratios(data1, data2, n_resamples, seed=seed, max_batch_bytes=max_batch_bytes)
+    return percentile_interval(ratios, confidence_level)
+
+def paired_median_ci(ratios, ci=0.99, n_resamples=10000, seed=None, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Percentile confidence interval for the median of per-pair ratios.
+
+    Paired samples are resampled as pairs, so only the one sample of ratios is
+    bootstrapped. Returns (lower, upper), NaN for an empty sample.
+    """
+    sample = as_sample(ratios)
+    if len(sample) == 0:
+        return (np.nan, np.nan)
+
+    rng = np.random.default_rng(seed)
+    medians = resample_medians(sample, n_resamples, rng, batch_size_for(len(sample), max_batch_bytes))
+    return percentile_interval(medians, ci)
+
+def rciw(lower, upper, center):
+    """Relative confidence interval width: the CI width divided by its center estimate."""
+    if center == 0 or np.isnan(center):
+        return float('nan')
+    return (upper - lower) / center
+
+def relative_delta(previous, current):
+    """Relative change between two successive estimates, treating NaN as unstable."""
+    if np.isnan(previous) or np.isnan(current):
+        return float('inf')
+    if previous == 0:
+        return 0.0 if current == 0 else float('inf')
+    return abs(current - previous) / abs(previous)
+
+def adaptive_bootstrap_relative_change(data1, data2, ci=0.99, tolerance=0.01, round_size=500,
+                                       min_resamples=1000, max_resamples=10000, patience=2,
+                                       seed=None, max_batch_bytes=DEFAULT_BATCH_BYTES):
+    """Sequential bootstrap that draws resamples in rounds until the CI stabilises.
+
+    After each round the percentile CI bounds and the RCIW are recomputed over all
+    resamples drawn so far. Sampling stops once all three changed by less than
+    `tolerance` (relative) for `patience` consecutive rounds, or at `max_resamples`.
+
+    Returns (lower, upper, mean ratio, number of resamples used).
+    """
+    sample1 = as_sample(data1)
+    sample2 = as_sample(data2)
+    rng = np.random.default_rng(seed)
+    batch_size = batch_size_for(max(len(sample1), len(sample2)), max_batch_bytes)
+
+    ratios = np.empty(max_resamples, dtype=np.float64)
+    n_used = 0
+    previous = None
+    stable_rounds = 0
+
+    while n_used < max_resamples:
+        n_round = min(round_size, max_resamples - n_used)
+        medians1 = resample_medians(sample1, n_round, rng, batch_size)
+        medians2 = resample_medians(sample2, n_round, rng, batch_size)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratios[n_used:n_used + n_round] = np.where(medians1 != 0, medians2 / medians1, np.nan)
+        n_used += n_round
+
+        lower, upper = percentile_interval(ratios[:n_used], ci)
+        current = (lower, upper, rciw(lower, upper, float(np.mean(ratios[:n_used]))))
+
+        if previous is not None and max(relative_delta(p, c) for p, c in zip(previous, current)) < tolerance:
+            stable_rounds += 1
+        else:
+            stable_rounds = 0
+        previous = current
+
+        if n_used >= min_resamples and stable_rounds >= patience:
+            break
+
+    lower, upper = percentile_interval(ratios[:n_used], ci)
+    return lower, upper, float(np.mean(ratios[:n_used])), n_used
@@ -0,0 +1,199 @@
+import argparse
+import math
+import os
+import time
+from array import array
+
+# Sampled values, in the order they are stored per sample. Counters are
+# cumulative as reported by the kernel; rates are derived in the analysis.
+FIELDS = [
+    'timestamp',                              # Unix time of the sample (s)
+    'usage_usec', 'user_usec', 'system_usec',  # cpu.stat
+    'nr_periods', 'nr_throttled', 'throttled_usec',
+    'memory_current',                          # memory.current (bytes)
+    'io_rbytes', 'io_wbytes', 'io_rios', 'io_wios',  # io.stat, summed over devices
+    'cpu_some_avg10', 'cpu_some_total', 'cpu_full_total'  # cpu.pressure (totals in usec)
+]
+
+CPU_STAT_FIELDS = ['usage_usec', 'user_usec', 'system_usec', 'nr_periods', 'nr_throttled', 'throttled_usec']
+IO_FIELDS = {'rbytes': 'io_rbytes', 'wbytes': 'io_wbytes', 'rios': 'io_rios', 'wios': 'io_wios'}
+
+class RingBuffer:
+    """Fixed-size buffer of samples in one preallocated array of doubles.
+
+    When more than `capacity` samples are appended between two drains, the
+    oldest ones are overwritten and counted in `dropped`.
+    """
+
+    def __init__(self, capacity, n_fields=len(FIELDS)):
+        self.capacity = capacity
+        self.n_fields = n_fields
+        self.values = array('d', bytes(8 * capacity * n_fields))
+        self.start = 0
+        self.size = 0
+        self.dropped = 0
+
+    def append(self, sample):
+        position = (self.start + self.size) % self.capacity
+        offset = position * self.n_fields
+        values = self.values
+        for i, value in enumerate(sample):
+            values[offset + i] = value
+        if self.size < self.capacity:
+            self.size += 1
+        else:
+            self.start = (self.start + 1) % self.capacity
+            self.dropped += 1
+
+    def drain(self):
+        """Returns the buffered samples, oldest first, and empties the buffer."""
+        samples = []
+        for i in range(self.size):
+            offset = ((self.start + i) % self.capacity) * self.n_fields
+            samples.append(self.values[offset:offset + self.n_fields])
+        self.start = 0
+        self.size = 0
+        return samples
+
+def parse_cpu_stat(contents):
+    values = {}
+    for line in contents.splitlines():
+        key, _, value = line.partition(' ')
+        if key in CPU_STAT_FIELDS:
+            values[key] = float(value)
+    return values
+
+def parse_memory_current(contents):
+    return {'memory_current': float(contents)}
+
+def parse_io_stat(contents):
+    totals = dict.fromkeys(IO_FIELDS.values(), 0.0)
+    for line in contents.splitlines():
+        for item in line.split()[1:]:
+            key, _, value = item.partition('=')
+            if key in IO_FIELDS:
+                totals[IO_FIELDS[key]] += float(value)
+    return totals
+
+def parse_pressure(contents):
+    values = {}
+    for line in contents.splitlines():
+        kind, *items = line.split()
+        items = dict(item.split('=') for item in items)
+        if kind == 'some':
+            values['cpu_some_avg10'] = float(items['avg10'])
+            values['cpu_some_total'] = float(items['total'])
+        elif kind == 'full':
+            values['cpu_full_total'] = float(items['total'])
+    return values
+
+class CgroupReader:
+    """Reads the resource files of one cgroup through descriptors that stay open.
+
+    cgroupfs regenerates a file's contents on every read from offset 0, so
+    each sample costs one pread per file and no open/close. Files of
+    controllers that are not enabled read as NaN. A fake cgroupfs for tests
+    must therefore rewrite its files in place rather than replace them.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fds = {}
+        for file_name in ('cpu.stat', 'memory.current', 'io.stat', 'cpu.pressure'):
+            try:
+                self.fds[file_name] = os.open(os.path.join(path, file_name), os.O_RDONLY)
+            except OSError:
+                pass
+
+    def read(self, file_name):
+        fd = self.fds.get(file_name)
+        if fd is None:
+            return None
+        return os.pread(fd, 65536, 0).decode('ascii')
+
+    def sample(self):
+        """Reads all files into one sample (a list of floats in FIELDS order)."""
+        values = dict.fromkeys(FIELDS, math.nan)
+        values['timestamp'] = time.time()
+
+        for file_name, parse in (('cpu.stat', parse_cpu_stat), ('memory.current', parse_memory_current),
+                                 ('io.stat', parse_io_stat), ('cpu.pressure', parse_pressure)):
+            contents = self.read(file_name)
+            if contents:
+                try:
+                    values.update(parse(contents))
+                except (ValueError, KeyError):
+                    pass  # A file caught mid-write (fake cgroupfs) leaves its fields NaN for this sample
+
+        return [values[field] for field in FIELDS]
+
+    def close(self):
+        for fd in self.fds.values():
+            os.close(fd)
+        self.fds = {}
+
+def append_csv(output_file, samples):
+    """Appends drained samples to a CSV file, writing the header for a new file."""
+    new_file = not os.path.exists(output_file)
+    with open(output_file, 'a') as outfile:
+        if new_file:
+            outfile.write(','.join(FIELDS) + '\n')
+        for sample in samples:
+            outfile.write(','.join(repr(value) for value in sample) + '\n')
+
+def sample_cgroups(root, cgroups, output_dir, interval=0.1, duration=None, flush_interval=5.0, capacity=4096):
+    """Samples the given cgroups under root every `interval` seconds until `duration` elapsed.
+
+    Samples go into one ring buffer per cgroup and are appended to
+    '<output_dir>/cgroup_<name>.csv' every `flush_interval` seconds. Sampling
+    times follow a fixed schedule, so slow reads do not shift later samples.
+    Returns the number of samples dropped per cgroup.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    readers = {name: CgroupReader(os.path.join(root, name)) for name in cgroups}
+    buffers = {name: RingBuffer(capacity) for name in cgroups}
+    outputs = {name: os.path.join(output_dir, f"cgroup_{name.replace('/', '_')}.csv") for name in cgroups}
+
+    start = time.monotonic()
+    next_sample = start
+    next_flush = start + flush_interval
+    try:
+        while duration is None or next_sample - start <= duration:
+            for name, reader in readers.items():
+                buffers[name].append(reader.sample())
+
+            now = time.monotonic()
+            if now >= next_flush:
+                for name, buffer in buffers.items():
+                    append_csv(outputs[name], buffer.drain())
+                next_flush = now + flush_interval
+
+            next_sample += interval
+            if next_sample < now:
+                # Skip missed slots instead of sampling in a burst
+                next_sample = now + interval - (now - next_sample) % interval
+            time.sleep(max(0.0, next_sample - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for name, buffer in buffers.items():
+            append_csv(outputs[name], buffer.drain())
+        for reader in readers.values():
+            reader.close()
+
+    return {name: buffer.dropped for name, buffer in buffers.items()}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Samples cgroup v2 CPU, memory, IO and pressure statistics.")
+    parser.add_argument("cgroups", nargs="+", help="Cgroup names below the root, e.g. the SUT versions")
+    parser.add_argument("--root", default="/sys/fs/cgroup/app-runner", help="Parent cgroup (or a fake cgroupfs directory)")
+    parser.add_argument("--interval", type=float, default=0.1, help="Seconds between samples")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--flush-interval", type=float, default=5.0, help="Seconds between writes to the CSV files")
+    parser.add_argument("--output-dir", default=".", help="Directory for the cgroup_<name>.csv files")
+    args = parser.parse_args()
+
+    dropped = sample_cgroups(args.root, args.cgroups, args.output_dir, args.interval, args.duration, args.flush_interval)
+    for name, count in dropped.items():
+        if count:
+            print(f"Dropped {count} samples of '{name}'; increase the buffer or flush more often.")
@@ -0,0 +1,116 @@
+import glob
+import numpy as np
+import pandas as pd
+from resource_timeline import align_with_latency, endpoint_start_time
+
+def monitor_files(pattern):
+    """Per-second files of locust/client_monitor.py matching the pattern, without the task files."""
+    return [path for path in sorted(glob.glob(pattern)) if not path.endswith('.tasks.csv')]
+
+def read_client_monitor(pattern):
+    """Per-second client timeline merged over all monitor files (one per Locust process).
+
+    Lag and CPU are those of the busiest process; in-flight requests,
+    request and task counts and the time outside network I/O are summed. A
+    second is saturated if any process was saturated in it.
+    """
+    files = monitor_files(pattern)
+    if not files:
+        raise FileNotFoundError(f"No client monitor files match '{pattern}'.")
+    samples = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+
+    seconds = samples.groupby('timestamp')
+    timeline = pd.DataFrame({
+        'lag_max_ms': seconds['lag_max_ms'].max(),
+        'lag_mean_ms': seconds['lag_mean_ms'].mean(),
+        'cpu_util': seconds['cpu_util'].max(),
+        'in_flight': seconds['in_flight_mean'].sum(),
+        'in_flight_max': seconds['in_flight_max'].sum(),
+        'requests': seconds['requests'].sum(),
+        'tasks': seconds['tasks'].sum(),
+        'outside_io_ms': seconds['outside_io_ms'].sum(),
+        'processes': seconds.size(),
+        'saturated': seconds['saturated'].max().astype(bool)
+    })
+    return timeline.reset_index()
+
+def per_second(timeline, start_time):
+    """Client timeline on the elapsed time axis of the latency series.
+
+    start_time is the Unix time of that series' elapsed time 0. Every
+    endpoint file exported by locust/sample_recorder.py counts from the
+    endpoint's own first request, not from the start of the test;
+    resource_timeline.endpoint_start_time reads it from the export.
+    """
+    timeline = timeline.assign(elapsed_time=np.floor(timeline['timestamp'] - start_time))
+    return timeline.drop(columns='timestamp')
+
+def widen(saturated, elapsed_time, margin):
+    """Also flags the `margin` seconds around every saturated second.
+
+    Requests sent shortly before a saturated second are completed (and
+    timed) by the busy client as well.
+    """
+    if margin <= 0 or not saturated.any():
+        return saturated
+    flagged = np.sort(elapsed_time[saturated])
+    # Distance of every second to the nearest saturated second on either side
+    position = np.searchsorted(flagged, elapsed_time)
+    before = flagged[np.clip(position - 1, 0, len(flagged) - 1)]
+    after = flagged[np.clip(position, 0, len(flagged) - 1)]
+    return np.minimum(np.abs(elapsed_time - before), np.abs(after - elapsed_time)) <= margin
+
+def flag_saturated(latency, timeline, margin=1):
+    """Latency series with a 'client_saturated' column from a per_second client timeline."""
+    timeline = timeline.sort_values('elapsed_time', kind='stable')
+    elapsed_time = timeline['elapsed_time'].to_numpy(dtype=np.float64)
+    saturated = widen(timeline['saturated'].to_numpy(dtype=bool), elapsed_time, margin)
+    flags = pd.DataFrame({'elapsed_time': elapsed_time, 'client_saturated': saturated.astype(np.float64)})
+
+    # The monitor writes a row for every second it runs, including seconds the hub was blocked through,
+    # so only seconds outside the monitored range come out as NaN; they count as not saturated
+    aligned = align_with_latency(latency, flags)
+    aligned['client_saturated'] = aligned['client_saturated'].eq(1.0)
+    return aligned
+
+def exclude_saturated(latency, timeline, margin=1):
+    """Latency series without the seconds in which the client was saturated."""
+    flagged = flag_saturated(latency, timeline, margin)
+    return flagged[~flagged['client_saturated']].drop(columns='client_saturated').reset_index(drop=True)
+
+def saturated_intervals(timeline, margin=1):
+    """(start, end) elapsed time ranges of consecutive saturated seconds, for annotating plots."""
+    timeline = timeline.sort_values('elapsed_time', kind='stable')
+    elapsed_time = timeline['elapsed_time'].to_numpy(dtype=np.float64)
+    seconds = elapsed_time[widen(timeline['saturated'].to_numpy(dtype=bool), elapsed_time, margin)]
+    if len(seconds) == 0:
+        return []
+    breaks = np.flatnonzero(np.diff(seconds) > 1)
+    starts = np.concatenate(([seconds[0]], seconds[breaks + 1]))
+    ends = np.concatenate((seconds[breaks], [seconds[-1]])) + 1
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def task_summary(pattern):
+    """Per task: executions and mean duration, network I/O and time outside it (ms)."""
+    files = [path for path in sorted(glob.glob(pattern)) if path.endswith('.tasks.csv')]
+    if not files:
+        raise FileNotFoundError(f"No client monitor task files match '{pattern}'.")
+    tasks = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+    summary = tasks.groupby('task').agg(executions=('duration_ms', 'size'), duration_ms=('duration_ms', 'mean'),
+                                         io_ms=('io_ms', 'mean'), outside_io_ms=('outside_io_ms', 'mean'))
+    summary['outside_io_share'] = summary['outside_io_ms'] / summary['duration_ms']
+    return summary.reset_index()
+
+if __name__ == "__main__":
+    from columnar_cache import load_series
+
+    directory = "./baseline/f_run_3t/3000"
+    latency_file = f"{directory}/flights.csv"
+    timeline = per_second(read_client_monitor(f"{directory}/client_monitor_3000_*.csv"), endpoint_start_time(latency_file))
+    latency = load_series(latency_file)
+
+    flagged = flag_saturated(latency, timeline)
+    print(f"Client saturated in {flagged['client_saturated'].mean():.1%} of the seconds: {saturated_intervals(timeline)}")
+    print(f"Median latency {latency['http_req_duration'].median():.3f} ms, "
+          f"{exclude_saturated(latency, timeline)['http_req_duration'].median():.3f} ms without saturated seconds")
+    print(task_summary(f"{directory}/client_monitor_3000_*.csv"))
@@ -0,0 +1,139 @@
+import hashlib
+import json
+import os
+import numpy as np
+import pandas as pd
+
+# Cache files are stored next to the source CSVs in this directory
+CACHE_DIR_NAME = ".columnar_cache"
+
+# Columns use compact types in the cache; any other numeric column is stored as float32
+COLUMN_DTYPES = {
+    'elapsed_time': np.float32,
+    'http_req_duration': np.float32
+}
+
+DEFAULT_COLUMNS = ('elapsed_time', 'http_req_duration')
+
+def file_sha256(file_path, block_size=1 << 20):
+    """Computes the SHA-256 hash of a file without reading it into memory at once."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as infile:
+        for block in iter(lambda: infile.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cache_paths(file_path):
+    """Returns the cache directory and manifest path for a source CSV."""
+    source_dir, file_name = os.path.split(os.path.abspath(file_path))
+    cache_dir = os.path.join(source_dir, CACHE_DIR_NAME)
+    return cache_dir, os.path.join(cache_dir, f"{file_name}.json")
+
+def column_path(cache_dir, file_path, sha256, column):
+    """Returns the path of the memory-mappable array for one column of a cached CSV."""
+    file_name = os.path.basename(file_path)
+    return os.path.join(cache_dir, f"{file_name}.{sha256[:16]}.{column}.npy")
+
+def write_atomic(path, write):
+    """Writes a file through a temporary path so readers never see partial files."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def save_array(path, array):
+    """Saves an array in .npy format to exactly the given path."""
+    with open(path, 'wb') as outfile:
+        np.save(outfile, array)
+
+def write_json_atomic(file_path, data):
+    """Writes data as JSON through write_atomic."""
+    def write(path):
+        with open(path, 'w') as outfile:
+            json.dump(data, outfile)
+    write_atomic(file_path, write)
+
+def write_manifest(manifest_path, manifest):
+    """Stores the cache manifest of a source CSV."""
+    write_json_atomic(manifest_path, manifest)
+
+def read_json(file_path):
+    """Reads a JSON file, returning None if it is missing or unreadable."""
+    try:
+        with open(file_path, 'r') as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        return None
+
+def read_manifest(manifest_path):
+    """Reads the cache manifest, returning None if it is missing or unreadable."""
+    return read_json(manifest_path)
+
+def build_cache(file_path, cache_dir, manifest_path, sha256):
+    """Parses the CSV once and stores each numeric column as a typed .npy array."""
+    os.makedirs(cache_dir, exist_ok=True)
+    stat = os.stat(file_path)
+
+    df = pd.read_csv(file_path, low_memory=False)
+    columns = []
+    for column in df.columns:
+        values = pd.to_numeric(df[column], errors='coerce')
+        dtype = COLUMN_DTYPES.get(column, np.float32)
+        array = values.to_numpy(dtype=dtype, na_value=np.nan)
+        write_atomic(column_path(cache_dir, file_path, sha256, column), lambda path: save_array(path, array))
+        columns.append(column)
+
+    # Drop arrays (and window pyramids) left behind by previous contents of the same file
+    prefix = f"{os.path.basename(file_path)}."
+    current = f"{prefix}{sha256[:16]}."
+    for cached_file in os.listdir(cache_dir):
+        if cached_file.startswith(prefix) and cached_file.endswith(('.npy', '.npz')) and not cached_file.startswith(current):
+            os.remove(os.path.join(cache_dir, cached_file))
+
+    manifest = {
+        'size': stat.st_size,
+        'mtime_ns': stat.st_mtime_ns,
+        'sha256': sha256,
+        'columns': columns
+    }
+    write_manifest(manifest_path, manifest)
+    return manifest
+
+def ensure_cache(file_path):
+    """Returns a valid manifest for the CSV, converting it to the columnar cache if needed."""
+    cache_dir, manifest_path = cache_paths(file_path)
+    manifest = read_manifest(manifest_path)
+    stat = os.stat(file_path)
+
+    # Fast path: unchanged size and mtime means the cached arrays are still valid
+    if manifest and manifest['size'] == stat.st_size and manifest['mtime_ns'] == stat.st_mtime_ns:
+        return cache_dir, manifest
+
+    # The file was touched or copied; only rebuild if its contents actually changed
+    sha256 = file_sha256(file_path)
+    if manifest and manifest['sha256'] == sha256:
+        manifest['size'] = stat.st_size
+        manifest['mtime_ns'] = stat.st_mtime_ns
+        write_manifest(manifest_path, manifest)
+        return cache_dir, manifest
+
+    return cache_dir, build_cache(file_path, cache_dir, manifest_path, sha256)
+
+def load_columns(file_path, columns=DEFAULT_COLUMNS):
+    """Loads the requested columns of a per-endpoint CSV as memory-mapped numpy arrays."""
+    cache_dir, manifest = ensure_cache(file_path)
+    missing = [column for column in columns if column not in manifest['columns']]
+    if missing:
+        raise ValueError(f"Columns {missing} not found in '{file_path}'.")
+
+    return {
+        column: np.load(column_path(cache_dir, file_path, manifest['sha256'], column), mmap_mode='r')
+        for column in columns
+    }
+
+def available_columns(file_path):
+    """Names of the columns stored in the cache of a per-endpoint CSV."""
+    return ensure_cache(file_path)[1]['columns']
+
+def load_series(file_path, columns=DEFAULT_COLUMNS):
+    """Loads the requested columns of a per-endpoint CSV into a DataFrame backed by the cache."""
+    return pd.DataFrame(load_columns(file_path, columns), copy=False)
@@ -0,0 +1,82 @@
+import numpy as np
+
+# Shape-preserving downsampling of long time series for plotting. A plot can
+# only show about one point per horizontal pixel, so drawing every raw row of a
+# long run only costs time without adding detail.
+
+DEFAULT_MAX_POINTS = 2000
+
+def as_xy(x, y):
+    """Converts x and y to float64 arrays and drops points with a missing coordinate."""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    if not valid.all():
+        x, y = x[valid], y[valid]
+    return x, y
+
+def lttb(x, y, n_out=DEFAULT_MAX_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling of a series sorted by x.
+
+    Keeps the first and last point and, from each of the n_out - 2 buckets in
+    between, the point that spans the largest triangle with the point kept from
+    the previous bucket and the mean of the next bucket. Peaks and dips survive,
+    unlike with plain averaging or striding.
+    """
+    x, y = as_xy(x, y)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return x, y
+
+    # Bucket boundaries for the points between the first and the last one
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+
+    # Mean of every bucket, with the last point acting as the bucket after the final one
+    sums_x = np.add.reduceat(x[1:n - 1], starts - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], starts - 1)
+    sizes = stops - starts
+    mean_x = np.append(sums_x / sizes, x[-1])
+    mean_y = np.append(sums_y / sizes, y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for bucket, (start, stop) in enumerate(zip(starts, stops)):
+        # Twice the triangle area for every candidate point of the bucket
+        px, py = x[previous], y[previous]
+        areas = np.abs((px - mean_x[bucket + 1]) * (y[start:stop] - py)
+                       - (px - x[start:stop]) * (mean_y[bucket + 1] - py))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    return x[selected], y[selected]
+
+def minmax_envelope(x, y, n_bins=DEFAULT_MAX_POINTS):
+    """Min/max envelope of a series sorted by x over n_bins equal-width x bins.
+
+    Returns (bin centers, minimum, maximum) for the non-empty bins; drawn with
+    fill_between it shows every spike of the raw series at a fixed cost.
+    """
+    x, y = as_xy(x, y)
+    if len(x) == 0:
+        return x, y, y
+
+    edges = np.linspace(x[0], x[-1], n_bins + 1)
+    bins = np.clip(np.searchsorted(edges, x, side='right') - 1, 0, n_bins - 1)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+
+    centers = (edges[bins[starts]] + edges[bins[starts] + 1]) / 2
+    return centers, np.minimum.reduceat(y, starts), np.maximum.reduceat(y, starts)
+
+def downsample(x, y, n_out=DEFAULT_MAX_POINTS, method='lttb'):
+    """Downsamples a series sorted by x with the given method ('lttb' or 'minmax').
+
+    'minmax' returns the envelope as a line alternating between the bin minimum
+    and maximum, so it can be drawn like any other series.
+    """
+    if method == 'lttb':
+        return lttb(x, y, n_out)
+    if method == 'minmax':
+        centers, lower, upper = minmax_envelope(x, y, max(n_out // 2, 1))
+        return np.repeat(centers, 2), np.column_stack([lower, upper]).ravel()
+    raise ValueError(f"Unknown downsampling method '{method}'.")
@@ -0,0 +1,246 @@
+import argparse
+import io
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import sketches
+from preprocessing_filter import INGEST_COLUMNS, normalize_endpoint_name
+
+# Upper bound for the bytes parsed from one file per tick, so a monitor that
+# starts late catches up in steps instead of loading the whole file at once
+MAX_READ_BYTES = 64 * 1024 * 1024
+
+class CsvTail:
+    """Follows a CSV file that another process is still appending to.
+
+    Every call to read_new parses only the complete lines written since the
+    previous call, starting from the stored byte offset.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.columns = None
+
+    def read_new(self, usecols=INGEST_COLUMNS, max_bytes=MAX_READ_BYTES):
+        """Returns the rows appended since the last call, or None if there are none yet."""
+        try:
+            size = os.path.getsize(self.path)
+        except FileNotFoundError:
+            return None
+
+        if size < self.offset:
+            # The file was truncated or replaced by a new run; start over
+            self.offset = 0
+            self.columns = None
+        if size == self.offset:
+            return None
+
+        with open(self.path, 'rb') as infile:
+            infile.seek(self.offset)
+            data = infile.read(min(size - self.offset, max_bytes))
+
+        # A partially written last line is picked up on the next tick
+        end = data.rfind(b'\n')
+        if end < 0:
+            return None
+        data = data[:end + 1]
+        self.offset += len(data)
+
+        if self.columns is None:
+            header, _, data = data.partition(b'\n')
+            self.columns = header.decode('utf-8').strip().split(',')
+            if not set(usecols).issubset(self.columns):
+                raise ValueError(f"'{self.path}' must contain the columns {usecols}.")
+        if not data:
+            return None
+
+        return pd.read_csv(
+            io.BytesIO(data),
+            header=None,
+            names=self.columns,
+            usecols=usecols,
+            dtype={'metric_name': 'category', 'name': 'category', 'timestamp': 'float64', 'metric_value': 'float64'}
+        )
+
+class DuetMonitor:
+    """Per-window latency sketches of two concurrently running targets.
+
+    New rows are folded into the sketch of their (port, endpoint, window), so
+    each update costs O(new rows). A window is evaluated once both targets have
+    moved past it; its median ratio and the rolling ratio over the last
+    rolling_windows windows are then appended to the history of its endpoint.
+    """
+
+    def __init__(self, reference_port, port, metric_name='http_req_duration', window_size=10, rolling_windows=6):
+        self.reference_port = reference_port
+        self.port = port
+        self.metric_name = metric_name
+        self.window_size = window_size
+        self.rolling_windows = rolling_windows
+
+        self.start_time = None
+        self.latest = {reference_port: None, port: None}
+        self.window_sketches = {}  # (port, endpoint, window start) -> sketch
+        self.evaluated = {}        # endpoint -> last evaluated window start
+        self.history = []          # One dict per evaluated (endpoint, window)
+
+    def update(self, port, rows):
+        """Adds the new rows of one target."""
+        rows = rows[(rows['metric_name'] == self.metric_name) & rows['name'].notna()]
+        if rows.empty:
+            return
+
+        timestamps = rows['timestamp'].to_numpy()
+        if self.start_time is None or timestamps.min() < self.start_time:
+            self.start_time = float(timestamps.min())
+        latest = float(timestamps.max())
+        if self.latest[port] is None or latest > self.latest[port]:
+            self.latest[port] = latest
+
+        raw_names = rows['name'].cat.categories
+        names = np.array([normalize_endpoint_name(str(raw_name)) for raw_name in raw_names], dtype=object)
+        endpoints = names[rows['name'].cat.codes.to_numpy()]
+        windows = (timestamps // self.window_size) * self.window_size
+
+        codes, keys = pd.MultiIndex.from_arrays([endpoints, windows]).factorize()
+        new_sketches = sketches.grouped_sketches(codes, rows['metric_value'].to_numpy(), len(keys))
+        for (endpoint, window), sketch in zip(keys, new_sketches):
+            key = (port, endpoint, float(window))
+            if key in self.window_sketches:
+                self.window_sketches[key] += sketch
+            else:
+                self.window_sketches[key] = sketch
+
+    def completed_until(self):
+        """Start of the first window that at least one of the targets has not finished yet."""
+        if None in self.latest.values():
+            return None
+        return (min(self.latest.values()) // self.window_size) * self.window_size
+
+    def evaluate(self):
+        """Evaluates all newly completed windows and returns their history entries."""
+        until = self.completed_until()
+        if until is None:
+            return []
+
+        new_entries = []
+        endpoints = sorted({endpoint for _, endpoint, _ in self.window_sketches})
+        for endpoint in endpoints:
+            windows = sorted({
+                window for port, name, window in self.window_sketches
+                if name == endpoint and window < until and window > self.evaluated.get(endpoint, -np.inf)
+            })
+            for window in windows:
+                new_entries.append(self.evaluate_window(endpoint, window))
+                self.evaluated[endpoint] = window
+            self.drop_old_windows(endpoint)
+
+        self.history.extend(new_entries)
+        return new_entries
+
+    def evaluate_window(self, endpoint, window):
+        """Medians and ratios of one completed window of an endpoint."""
+        rolling = [window - i * self.window_size for i in range(self.rolling_windows)]
+
+        def merged(port, windows):
+            return sketches.merge([self.window_sketches.get((port, endpoint, w), sketches.empty_sketches()) for w in windows])
+
+        medians = {}
+        for port in (self.reference_port, self.port):
+            medians[port] = sketches.quantiles(merged(port, [window]), (0.5,))[0, 0]
+        rolling_ratio = sketches.quantile_ratios(merged(self.reference_port, rolling), merged(self.port, rolling), (0.5,))[0]
+
+        reference_median, median = medians[self.reference_port], medians[self.port]
+        return {
+            'endpoint': endpoint,
+            'elapsed_time': max(window - self.start_time, 0.0),
+            f'median_{self.reference_port}': reference_median,
+            f'median_{self.port}': median,
+            'ratio': median / reference_median if reference_median > 0 else float('nan'),
+            'rolling_ratio': float(rolling_ratio)
+        }
+
+    def drop_old_windows(self, endpoint):
+        """Forgets the sketches that no rolling window will need again, keeping memory constant."""
+        last = self.evaluated.get(endpoint)
+        if last is None:
+            return
+        oldest_needed = last - (self.rolling_windows - 2) * self.window_size
+        for key in [key for key in self.window_sketches if key[1] == endpoint and key[2] < oldest_needed]:
+            del self.window_sketches[key]
+
+def exceeds(ratio, abort_ratio):
+    """True if a ratio deviates from 1 by more than abort_ratio in either direction."""
+    return not np.isnan(ratio) and (ratio > abort_ratio or ratio < 1 / abort_ratio)
+
+def monitor(run_dir, reference_port=3000, port=3001, window_size=10, rolling_windows=6, interval=5.0,
+            abort_ratio=None, patience=3, output_file=None, follow=True):
+    """Tails client_results_<port>.csv of both targets and reports every completed window.
+
+    Returns 2 if the rolling ratio of any endpoint stayed outside
+    [1/abort_ratio, abort_ratio] for `patience` consecutive windows, else 0.
+    Without follow the files are read once up to their current end.
+    """
+    tails = {p: CsvTail(os.path.join(run_dir, f"client_results_{p}.csv")) for p in (reference_port, port)}
+    duet = DuetMonitor(reference_port, port, window_size=window_size, rolling_windows=rolling_windows)
+    streaks = {}
+
+    try:
+        while True:
+            read_any = False
+            for p, tail in tails.items():
+                rows = tail.read_new()
+                while rows is not None:
+                    read_any = True
+                    duet.update(p, rows)
+                    rows = tail.read_new()
+
+            for entry in duet.evaluate():
+                print(f"[{entry['elapsed_time']:7.0f}s] {entry['endpoint']:<13} "
+                      f"median {reference_port}={entry[f'median_{reference_port}']:.2f}ms {port}={entry[f'median_{port}']:.2f}ms  "
+                      f"ratio={entry['ratio']:.3f}  rolling={entry['rolling_ratio']:.3f}", flush=True)
+
+                if abort_ratio is not None:
+                    streak = streaks.get(entry['endpoint'], 0) + 1 if exceeds(entry['rolling_ratio'], abort_ratio) else 0
+                    streaks[entry['endpoint']] = streak
+                    if streak >= patience:
+                        print(f"ABORT: rolling {port}/{reference_port} ratio of '{entry['endpoint']}' outside "
+                              f"[{1 / abort_ratio:.3f}, {abort_ratio:.3f}] for {streak} windows.", flush=True)
+                        return 2
+
+            if not read_any:
+                if not follow:
+                    return 0
+                time.sleep(interval)
+    finally:
+        write_history(duet.history, output_file)
+
+def write_history(history, output_file):
+    """Stores the evaluated windows as a CSV, if an output file was requested."""
+    if output_file is not None and history:
+        pd.DataFrame(history).to_csv(output_file, index=False)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Live duet analysis of k6 results while the benchmark is running.")
+    parser.add_argument("run_dir", help="Directory k6 writes client_results_<port>.csv to")
+    parser.add_argument("--ports", type=int, nargs=2, default=[3000, 3001], help="Reference port and compared port")
+    parser.add_argument("--window", type=int, default=10, help="Window size (seconds)")
+    parser.add_argument("--rolling", type=int, default=6, help="Number of windows in the rolling ratio")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls of the result files")
+    parser.add_argument("--abort-ratio", type=float, default=None,
+                        help="Exit with status 2 once a rolling ratio leaves [1/r, r] for --patience windows")
+    parser.add_argument("--patience", type=int, default=3, help="Consecutive windows before aborting")
+    parser.add_argument("--output", default=None, help="CSV file for the evaluated windows")
+    parser.add_argument("--once", action="store_true", help="Read the files up to their current end and exit")
+    args = parser.parse_args()
+
+    try:
+        status = monitor(args.run_dir, args.ports[0], args.ports[1], window_size=args.window, rolling_windows=args.rolling,
+                         interval=args.interval, abort_ratio=args.abort_ratio, patience=args.patience,
+                         output_file=args.output, follow=not args.once)
+    except KeyboardInterrupt:
+        status = 0
+    sys.exit(status)
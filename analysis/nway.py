@@ -0,0 +1,241 @@
+import argparse
+import os
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import bootstrap_engine
+import rank_kernel
+from phases import PhaseIndex, PhaseWindows, median
+from rel_change_table import comparison_result, dataframe_to_latex, filter_warmup_cooldown, read_csv
+import sketches
+
+PHASE_NAMES = ('Noise', 'Non-Noise', 'Overall')
+ENDPOINTS = ["bookings", "destinations", "flights", "seats"]
+
+def instance_ports(run_dir):
+    """Ports of the SUT instances of a run: its numeric subdirectories, in ascending order."""
+    return sorted(int(name) for name in os.listdir(run_dir)
+                  if name.isdigit() and os.path.isdir(os.path.join(run_dir, name)))
+
+def comparison_pairs(n, mode='reference', reference=0):
+    """(run 1, run 2) instance indices to compare.
+
+    'reference' compares every instance against the reference instance,
+    'all' every unordered pair once (run 1 is the instance with the lower index).
+    """
+    if mode == 'reference':
+        return [(reference, j) for j in range(n) if j != reference]
+    if mode == 'all':
+        return [(i, j) for i in range(n) for j in range(i + 1, n)]
+    raise ValueError(f"Unknown comparison mode '{mode}'.")
+
+def holm(p_values):
+    """Holm-Bonferroni adjusted p-values of one family of tests; NaN p-values stay NaN and do not count."""
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full(len(p_values), np.nan)
+    order = np.argsort(p_values)  # NaN sorts last
+    m = int(np.count_nonzero(~np.isnan(p_values)))
+    ranked = p_values[order[:m]]
+    adjusted[order[:m]] = np.minimum(1.0, np.maximum.accumulate((m - np.arange(m)) * ranked))
+    return adjusted
+
+def bootstrap_cis(samples, pairs, seeds, n_bootstrap=10000, ci=0.99, max_batch_bytes=bootstrap_engine.DEFAULT_BATCH_BYTES):
+    """Bootstrap CIs of median(run 2) / median(run 1) of all pairs, in the format of relative_change_ci.
+
+    Every instance's sample is resampled once (with its own seed) and each
+    pair divides the resampled medians of its two instances. Per pair this is
+    the bootstrap of bootstrap_engine.bootstrap_relative_change, but the
+    resampling cost grows with the number of instances, not of pairs.
+    """
+    medians = np.full((len(samples), n_bootstrap), np.nan)
+    for k, (sample, seed) in enumerate(zip(samples, seeds)):
+        sample = bootstrap_engine.as_sample(sample)
+        if len(sample):
+            batch_size = bootstrap_engine.batch_size_for(len(sample), max_batch_bytes)
+            medians[k] = bootstrap_engine.resample_medians(sample, n_bootstrap, np.random.default_rng(seed), batch_size)
+
+    run1, run2 = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ratios = np.where(medians[run1] != 0, medians[run2] / medians[run1], np.nan)
+    lower, upper = np.percentile(ratios, [(1 - ci) / 2 * 100, (1 + ci) / 2 * 100], axis=1)
+    means = ratios.mean(axis=1)
+    return [(float(l), float(u), float(m), n_bootstrap) for l, u, m in zip(lower, upper, means)]
+
+def order_statistic_cis(sorted_samples, pairs, ci=0.99):
+    """Order-statistic CIs of all pairs (rank_kernel.median_ratio_ci); each instance's median CI is computed once."""
+    level = np.sqrt(ci)
+    median_cis = [rank_kernel.median_ci(sample, level) for sample in sorted_samples]
+    medians = [median(sample) for sample in sorted_samples]
+    cis = []
+    for i, j in pairs:
+        if not len(sorted_samples[i]) or not len(sorted_samples[j]):
+            cis.append((float('nan'), float('nan'), float('nan'), 0))
+            continue
+        lower, upper, ratio = rank_kernel.ratio_interval(median_cis[i], medians[i], median_cis[j], medians[j])
+        cis.append((lower, upper, ratio, 0))
+    return cis
+
+def kruskal_pvalue(samples):
+    """Kruskal-Wallis p-value of the hypothesis that all instances have the same distribution."""
+    samples = [sample for sample in samples if len(sample)]
+    if len(samples) < 2:
+        return float('nan')
+    try:
+        return float(stats.kruskal(*samples).pvalue)
+    except ValueError:  # All values identical
+        return float('nan')
+
+def analyze_instances(datasets, ports, endpoint, threads=3, mode='reference', reference_port=None, warmup_time=60,
+                      cooldown_time=60, noise_start=200, noise_end=500, ci_method='bootstrap', n_bootstrap=10000,
+                      seed=None):
+    """Compares N runs of one endpoint in one pass; returns one analyze_response_data row per pair.
+
+    Every run is phase-split and sorted once; the CIs of all pairs come from
+    one set of resampled medians (or order-statistic CIs) per run, and the
+    Mann-Whitney tests reuse the sorted phases. Besides the columns of
+    analyze_response_data, each row has the ports of both runs, Holm-adjusted
+    p-values over all pairs of the endpoint and the Kruskal-Wallis p-value of
+    all N runs.
+    """
+    reference = ports.index(reference_port) if reference_port is not None else 0
+    pairs = comparison_pairs(len(ports), mode, reference)
+
+    windows = PhaseWindows(noise_start, noise_end, warmup_time, cooldown_time)
+    indexes = [PhaseIndex(data, windows) for data in datasets]
+    phases = [rank_kernel.sorted_phases(index.phase("noise"), index.non_noise()) for index in indexes]
+    medians = [{phase: median(run_phases[phase]) for phase in PHASE_NAMES} for run_phases in phases]
+
+    # One random stream per run and phase, so that a run's resamples do not depend on N
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    run_seeds = [run_seed.spawn(len(PHASE_NAMES)) for run_seed in seed_sequence.spawn(len(ports))]
+
+    cis, kruskal = {}, {}
+    for k, phase in enumerate(PHASE_NAMES):
+        samples = [run_phases[phase] for run_phases in phases]
+        if ci_method == 'order_statistic':
+            cis[phase] = order_statistic_cis(samples, pairs)
+        elif ci_method == 'bootstrap':
+            cis[phase] = bootstrap_cis(samples, pairs, [seeds[k] for seeds in run_seeds], n_bootstrap)
+        else:
+            raise ValueError(f"Unknown CI method '{ci_method}'.")
+        kruskal[phase] = kruskal_pvalue(samples)
+
+    p_values = [rank_kernel.phase_mannwhitney(phases[i], phases[j]) for i, j in pairs]
+    adjusted = {phase: holm([pair_p_values[phase] for pair_p_values in p_values]) for phase in PHASE_NAMES}
+
+    rows = []
+    for n, (i, j) in enumerate(pairs):
+        result = comparison_result(endpoint, threads, medians[i], medians[j],
+                                   {phase: cis[phase][n] for phase in PHASE_NAMES}, p_values[n])
+        row = {'Endpoint': endpoint, 'Threads': threads, 'Run1 Port': ports[i], 'Run2 Port': ports[j]}
+        row.update(result)
+        for phase in PHASE_NAMES:
+            row[f'P-Value {phase} (Holm)'] = float(adjusted[phase][n])
+        for phase in PHASE_NAMES:
+            row[f'Kruskal P-Value {phase}'] = kruskal[phase]
+        rows.append(row)
+    return rows
+
+def tail_ratios(sketch_files, pairs, windows, quantile_levels=(0.99, 0.999)):
+    """Tail quantile ratios of all pairs in the columns of analyze_tail_ratios; each run's sketches are merged once."""
+    phase_sketches = [sketches.phase_sketches(sketch_file, windows) for sketch_file in sketch_files]
+    results = []
+    for i, j in pairs:
+        result = {}
+        for phase in PHASE_NAMES:
+            ratios = sketches.quantile_ratios(phase_sketches[i][phase], phase_sketches[j][phase], quantile_levels)
+            for q, ratio in zip(quantile_levels, ratios):
+                result[f"{sketches.quantile_label(q).upper()} Ratio {phase}"] = float(ratio)
+        results.append(result)
+    return results
+
+def analyze_run(run_dir, endpoints=ENDPOINTS, ports=None, mode='reference', reference_port=None, threads=3, **options):
+    """Compares all SUT instances of a run directory ('<run_dir>/<port>/<endpoint>.csv') per endpoint."""
+    ports = ports or instance_ports(run_dir)
+    if len(ports) < 2:
+        raise ValueError(f"Need at least two instances in '{run_dir}', found {ports}.")
+
+    rows = []
+    for endpoint in endpoints:
+        files = [os.path.join(run_dir, str(port), f"{endpoint}.csv") for port in ports]
+        if not all(os.path.exists(file_path) for file_path in files):
+            print(f"Missing per-endpoint files for {run_dir}/{endpoint}, skipping.")
+            continue
+        endpoint_rows = analyze_instances([read_csv(file_path) for file_path in files], list(ports), endpoint, threads,
+                                          mode, reference_port, **options)
+
+        # Tail latency ratios, where the preprocessing also wrote per-second sketches
+        sketch_files = [file_path.replace('.csv', '.sketch.npz') for file_path in files]
+        if all(os.path.exists(sketch_file) for sketch_file in sketch_files):
+            index = {port: k for k, port in enumerate(ports)}
+            pairs = [(index[row['Run1 Port']], index[row['Run2 Port']]) for row in endpoint_rows]
+            windows = PhaseWindows(options.get('noise_start', 200), options.get('noise_end', 500),
+                                   options.get('warmup_time', 60), options.get('cooldown_time', 60))
+            for row, ratios in zip(endpoint_rows, tail_ratios(sketch_files, pairs, windows)):
+                row.update(ratios)
+        rows.extend(endpoint_rows)
+    return rows
+
+def aligned_windows(datasets, ports, window_size=10, warmup_time=60, cooldown_time=60):
+    """Median of every time window of every run as one table: a row per window, a column per port."""
+    columns = {}
+    for data, port in zip(datasets, ports):
+        data = filter_warmup_cooldown(data, warmup_time, cooldown_time)
+        time_window = (data['elapsed_time'] // window_size) * window_size
+        columns[port] = data['http_req_duration'].groupby(time_window).median()
+    return pd.DataFrame(columns).dropna().rename_axis('time_window')
+
+def windowed_relative_changes(aligned, mode='reference', reference_port=None):
+    """Relative change (%) of every pair in every window of an aligned_windows table, as '<port2> vs <port1>' columns."""
+    ports = list(aligned.columns)
+    reference = ports.index(reference_port) if reference_port is not None else 0
+    pairs = comparison_pairs(len(ports), mode, reference)
+    values = aligned.to_numpy(dtype=np.float64)
+    run1, run2 = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+    with np.errstate(divide='ignore', invalid='ignore'):
+        changes = (values[:, run2] - values[:, run1]) / values[:, run1] * 100
+    return pd.DataFrame(changes, index=aligned.index, columns=[f"{ports[j]} vs {ports[i]}" for i, j in pairs])
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compares the latency of N SUT instances of one run.")
+    parser.add_argument("run_dir", help="Run directory with one '<port>/<endpoint>.csv' directory per instance")
+    parser.add_argument("--ports", type=int, nargs="+", help="Instances to compare (default: all port directories)")
+    parser.add_argument("--mode", choices=["reference", "all"], default="reference",
+                        help="Compare every instance against the reference, or all pairs")
+    parser.add_argument("--reference", type=int, help="Reference port (default: the first port)")
+    parser.add_argument("--ci-method", choices=["bootstrap", "order_statistic"], default="bootstrap")
+    parser.add_argument("--bootstrap", type=int, default=10000, help="Resamples per run and phase")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--warmup", type=float, default=60)
+    parser.add_argument("--cooldown", type=float, default=150)
+    parser.add_argument("--noise-start", type=float, default=200)
+    parser.add_argument("--noise-end", type=float, default=500)
+    parser.add_argument("--output", default="rel_table_nway.csv", help="CSV file of the comparison table")
+    parser.add_argument("--store", help="Also store the comparisons in this SQLite results store")
+    parser.add_argument("--experiment", help="Experiment name in the results store (default: the parent directory)")
+    args = parser.parse_args()
+
+    run_dir = os.path.normpath(args.run_dir)
+    directory = os.path.basename(run_dir)
+    try:
+        threads = int(directory.split('_')[2].replace('t', ''))
+    except (IndexError, ValueError):
+        threads = 0
+
+    rows = analyze_run(run_dir, ports=args.ports, mode=args.mode, reference_port=args.reference, threads=threads,
+                       warmup_time=args.warmup, cooldown_time=args.cooldown, noise_start=args.noise_start,
+                       noise_end=args.noise_end, ci_method=args.ci_method, n_bootstrap=args.bootstrap, seed=args.seed)
+    final_table = pd.DataFrame(rows)
+    print(final_table)
+    final_table.to_csv(args.output, index=False)
+    print(dataframe_to_latex(final_table, caption=f"Response Time Comparison ({directory})", label="tab:response_times_nway"))
+
+    if args.store:
+        import results_store
+
+        experiment = args.experiment or os.path.basename(os.path.dirname(os.path.abspath(run_dir)))
+        conn = results_store.connect(args.store)
+        for row in rows:
+            results_store.store_comparison(conn, experiment, directory, row, row['Run1 Port'], row['Run2 Port'])
+        conn.close()
+        print(f"Stored {len(rows)} comparison(s) in '{args.store}'.")
@@ -0,0 +1,76 @@
+import glob
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+import bootstrap_engine
+from phases import PhaseIndex, PhaseWindows, median
+from preprocessing_filter import normalize_endpoint_name
+
+def load_pair_logs(pattern):
+    """Reads and concatenates the per-process request logs written by locust/duet.py."""
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise ValueError(f"No duet request logs match '{pattern}'.")
+    logs = []
+    for process, file_path in enumerate(files):
+        log = pd.read_csv(file_path, dtype={'target': str, 'status': str})
+        # Pair ids are only unique per process
+        log['pair_id'] = f"{process}:" + log['pair_id'].astype(str)
+        logs.append(log)
+    return pd.concat(logs, ignore_index=True)
+
+def pair_table(log, reference='3000', target='3001'):
+    """One row per pair in which both targets succeeded, with both response times.
+
+    Request names are '<label> <name>'; the endpoint is derived from the name as
+    in the preprocessing. elapsed_time counts from the first request of the log.
+    """
+    ok = log['exception'].isna() & log['status'].astype(str).str.startswith('2')
+    log = log[ok & log['target'].isin([reference, target])]
+    log = log.assign(endpoint=log['name'].str.split(' ', n=1).str[1].map(normalize_endpoint_name))
+
+    pairs = log.pivot_table(index=['pair_id', 'endpoint'], columns='target', values=['response_time', 'start_time'],
+                            aggfunc='first').dropna()
+    table = pd.DataFrame({
+        'endpoint': pairs.index.get_level_values('endpoint'),
+        'start_time': pairs[('start_time', reference)].to_numpy(),
+        'reference': pairs[('response_time', reference)].to_numpy(),
+        'target': pairs[('response_time', target)].to_numpy()
+    })
+    table['elapsed_time'] = table['start_time'] - table['start_time'].min()
+    with np.errstate(divide='ignore', invalid='ignore'):
+        table['ratio'] = table['target'] / table['reference']
+    return table[np.isfinite(table['ratio']) & (table['ratio'] > 0)]
+
+def analyze_pairs(table, endpoint, windows=None, ci=0.99, seed=None):
+    """Median per-pair ratio with a bootstrapped CI and a Wilcoxon signed-rank p-value per phase."""
+    index = PhaseIndex(table[table['endpoint'] == endpoint], windows, value_column='ratio')
+    phase_ratios = {
+        'Noise': index.phase("noise"),
+        'Non-Noise': index.non_noise(),
+        'Overall': index.experiment()
+    }
+
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    result = {'Endpoint': endpoint, 'Pairs': len(index.experiment())}
+    for (phase, ratios), phase_seed in zip(phase_ratios.items(), seed_sequence.spawn(3)):
+        lower, upper = bootstrap_engine.paired_median_ci(ratios, ci=ci, seed=phase_seed)
+        # Log ratios are symmetric around 0 when the targets do not differ
+        p_value = stats.wilcoxon(np.log(ratios)).pvalue if len(ratios) else float('nan')
+        result[f'Paired Ratio {phase}'] = f'{median(ratios):.4f} (CI: {lower:.4f} - {upper:.4f})'
+        result[f'CI {phase}'] = (lower, upper)
+        result[f'RCIW {phase}'] = bootstrap_engine.rciw(lower, upper, median(ratios))
+        result[f'P-Value {phase}'] = float(p_value)
+    return result
+
+if __name__ == "__main__":
+    windows = PhaseWindows(noise_start=200, noise_end=500, warmup_time=60, cooldown_time=150)
+    endpoints = ["bookings", "destinations", "flights", "seats"]
+
+    table = pair_table(load_pair_logs("./duet/duet_requests_*.csv"))
+    seeds = np.random.SeedSequence(0).spawn(len(endpoints))
+    results = [analyze_pairs(table, endpoint, windows, seed=seed) for endpoint, seed in zip(endpoints, seeds)]
+
+    final_table = pd.DataFrame(results)
+    print(final_table)
+    final_table.to_csv("paired_rel_table.csv", index=False)
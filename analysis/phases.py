@@ -0,0 +1,90 @@
+import numpy as np
+
+PHASES = ["warmup", "pre_noise", "noise", "post_noise", "cooldown"]
+
+class PhaseWindows:
+    """Phase boundaries of one experiment, in seconds of elapsed time.
+
+    The noise window [noise_start, noise_end] is absolute; warm-up and cool-down
+    are measured from the first and last sample of each series.
+    """
+
+    def __init__(self, noise_start=200, noise_end=500, warmup_time=0, cooldown_time=0):
+        self.noise_start = noise_start
+        self.noise_end = noise_end
+        self.warmup_time = warmup_time
+        self.cooldown_time = cooldown_time
+
+    def __repr__(self):
+        return (f"PhaseWindows(noise_start={self.noise_start}, noise_end={self.noise_end}, "
+                f"warmup_time={self.warmup_time}, cooldown_time={self.cooldown_time})")
+
+class PhaseIndex:
+    """Sorts a series by elapsed time once and exposes every phase as a zero-copy slice.
+
+    Phase boundaries are located with binary search. Values are held as float64
+    so that statistics on the phases do not inherit the float32 precision of the
+    columnar cache. Rows with a missing elapsed time or value are dropped when
+    the index is built.
+    """
+
+    def __init__(self, df, windows=None, value_column='http_req_duration'):
+        self.windows = windows or PhaseWindows()
+
+        elapsed = np.asarray(df['elapsed_time'])
+        values = np.asarray(df[value_column], dtype=np.float64)
+
+        valid = ~(np.isnan(elapsed) | np.isnan(values))
+        if not valid.all():
+            elapsed, values = elapsed[valid], values[valid]
+
+        # Per-second series are written in time order, so sorting is usually a no-op
+        if len(elapsed) > 1 and np.any(elapsed[1:] < elapsed[:-1]):
+            order = np.argsort(elapsed, kind='stable')
+            elapsed, values = elapsed[order], values[order]
+
+        self.elapsed = elapsed
+        self.values = values
+        self.slices = self.locate_phases()
+
+    def locate_phases(self):
+        """Finds the slice of every phase with binary search on the sorted elapsed times."""
+        n = len(self.elapsed)
+        if n == 0:
+            return {phase: slice(0, 0) for phase in PHASES}
+
+        windows = self.windows
+        start = np.searchsorted(self.elapsed, self.elapsed[0] + windows.warmup_time, side='left')
+        end = np.searchsorted(self.elapsed, self.elapsed[-1] - windows.cooldown_time, side='right')
+        end = max(start, end)
+
+        noise_start = int(np.clip(np.searchsorted(self.elapsed, windows.noise_start, side='left'), start, end))
+        noise_end = int(np.clip(np.searchsorted(self.elapsed, windows.noise_end, side='right'), noise_start, end))
+
+        return {
+            "warmup": slice(0, start),
+            "pre_noise": slice(start, noise_start),
+            "noise": slice(noise_start, noise_end),
+            "post_noise": slice(noise_end, end),
+            "cooldown": slice(end, n)
+        }
+
+    def phase(self, name):
+        """Values of one phase as a view into the sorted series."""
+        return self.values[self.slices[name]]
+
+    def phase_elapsed(self, name):
+        """Elapsed times of one phase as a view into the sorted series."""
+        return self.elapsed[self.slices[name]]
+
+    def experiment(self):
+        """Values between warm-up and cool-down (pre-noise, noise and post-noise) as a view."""
+        return self.values[self.slices["pre_noise"].start:self.slices["post_noise"].stop]
+
+    def non_noise(self):
+        """Values of the pre-noise and post-noise phases; the only accessor that copies."""
+        return np.concatenate([self.phase("pre_noise"), self.phase("post_noise")])
+
+def median(values):
+    """Median of a phase, NaN for an empty phase."""
+    return float(np.median(values)) if len(values) else float('nan')
@@ -0,0 +1,386 @@
+import argparse
+import hashlib
+import json
+import os
+import pandas as pd
+from columnar_cache import file_sha256, read_json, write_json_atomic
+from preprocessing_filter import START_TIMES_FILE, filter_and_aggregate_csv_chunked
+from phases import PhaseWindows
+from aggregated_analysis_relative_changes import COMPARISON_WINDOWS, cell_key, display_results, experiment_cells, sweep_cells
+from rel_change_table import analyze_tail_ratios, dataframe_to_latex, read_csv, sweep_response_times
+import results_store
+
+# Bump when a stage's logic changes so that its old outputs are recomputed
+STAGE_VERSIONS = {
+    "preprocess": 2,
+    "analyze": 2,
+    "table": 1,
+    "baseline": 2,
+    "store": 1
+}
+
+STATE_FILE = ".pipeline_state.json"
+
+def load_config(config_path):
+    """Reads the declarative experiment config and resolves the data root relative to it."""
+    with open(config_path, 'r') as infile:
+        config = json.load(infile)
+    config['root'] = os.path.join(os.path.dirname(os.path.abspath(config_path)), config.get('root', '.'))
+    return config
+
+def threads_of(directory):
+    """Parses the thread count from a run directory name like 'f_run_20t'."""
+    return int(directory.split('_')[2].replace('t', ''))
+
+class PipelineState:
+    """Fingerprints of the inputs each stage output was last computed from."""
+
+    def __init__(self, root):
+        self.path = os.path.join(root, STATE_FILE)
+        try:
+            with open(self.path, 'r') as infile:
+                state = json.load(infile)
+        except (OSError, ValueError):
+            state = {}
+        self.stages = state.get('stages', {})
+        self.files = state.get('files', {})
+        # Output directories whose preprocessing failed in this run; their files are stale
+        self.failed = set()
+
+    def file_digest(self, file_path):
+        """Content hash of a file, re-hashed only when its size or mtime changed."""
+        stat = os.stat(file_path)
+        known = self.files.get(file_path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+
+        sha256 = file_sha256(file_path)
+        self.files[file_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha256}
+        return sha256
+
+    def fingerprint(self, stage, input_files, params):
+        """Fingerprint of a stage output: stage version, parameters and input contents."""
+        payload = {
+            'stage': stage,
+            'version': STAGE_VERSIONS[stage],
+            'params': params,
+            'inputs': [[file_path, self.file_digest(file_path)] for file_path in input_files]
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def is_current(self, key, fingerprint, outputs):
+        """True if the stage output exists and was built from the same fingerprint."""
+        return self.stages.get(key) == fingerprint and all(os.path.exists(output) for output in outputs)
+
+    def record(self, key, fingerprint):
+        self.stages[key] = fingerprint
+
+    def forget(self, key):
+        self.stages.pop(key, None)
+
+    def is_stale(self, file_path):
+        """True if the file is an output of a preprocessing that failed in this run."""
+        return os.path.dirname(file_path) in self.failed
+
+    def save(self):
+        write_json_atomic(self.path, {'stages': self.stages, 'files': self.files})
+
+def preprocess_outputs(output_dir):
+    """Files the last preprocessing of a run wrote: its START_TIMES_FILE and the endpoint files it lists.
+
+    Endpoints without traffic in a run get no file, so the configured endpoints
+    are not a reliable list of outputs.
+    """
+    start_times_path = os.path.join(output_dir, START_TIMES_FILE)
+    start_times = read_json(start_times_path) or {}
+    return [start_times_path] + [os.path.join(output_dir, f"{endpoint}.csv") for endpoint in start_times]
+
+def preprocess_stage(config, state, force=False):
+    """Splits every raw client_results_<port>.csv into per-endpoint per-second files."""
+    root = config['root']
+    metric_name = config.get('metric', 'http_req_duration')
+    write_sketches = config.get('sketches', False)
+    traffic_stats = config.get('traffic', False)
+
+    for parent, directories in config['experiments'].items():
+        for directory in directories:
+            for port in config['ports']:
+                input_file = os.path.join(root, parent, directory, f"client_results_{port}.csv")
+                output_dir = os.path.join(root, parent, directory, str(port))
+
+                if not os.path.exists(input_file):
+                    if not all(os.path.exists(output) for output in preprocess_outputs(output_dir)):
+                        print(f"Missing input '{input_file}', skipping.")
+                    continue
+
+                key = f"preprocess:{parent}/{directory}/{port}"
+                fingerprint = state.fingerprint("preprocess", [input_file], {'metric': metric_name, 'sketches': write_sketches, 'traffic': traffic_stats})
+                if not force and state.is_current(key, fingerprint, preprocess_outputs(output_dir)):
+                    continue
+
+                written = filter_and_aggregate_csv_chunked(input_file, metric_name, output_dir, write_sketches=write_sketches,
+                                                           traffic_stats=traffic_stats)
+                if written and all(os.path.exists(output) for output in preprocess_outputs(output_dir)):
+                    state.record(key, fingerprint)
+                else:
+                    # Outputs left from an older input are stale; retry on the next run
+                    print(f"Preprocessing '{input_file}' failed, retrying on the next run.")
+                    state.forget(key)
+                    state.failed.add(output_dir)
+                state.save()
+
+def analyze_stage(config, state, force=False):
+    """Runs the relative-change analysis for every cell whose inputs changed."""
+    root = config['root']
+    phases = config.get('phases', {})
+    bootstrap = config.get('bootstrap', {})
+    options = {
+        'warmup_time': phases.get('warmup_time', 60),
+        'cooldown_time': phases.get('cooldown_time', 150),
+        'noise_start': phases.get('noise_start', 200),
+        'noise_end': phases.get('noise_end', 500),
+        'adaptive': bootstrap.get('adaptive', False),
+        'rciw_tolerance': bootstrap.get('rciw_tolerance', 0.01),
+        'ci_method': bootstrap.get('method', 'bootstrap')
+    }
+    base_seed = bootstrap.get('base_seed', 0)
+    port1, port2 = config['ports'][:2]
+
+    pending, keys, fingerprints = [], [], []
+    for parent, directories in config['experiments'].items():
+        for directory in directories:
+            for endpoint in config['endpoints']:
+                file1 = os.path.join(root, parent, directory, str(port1), f"{endpoint}.csv")
+                file2 = os.path.join(root, parent, directory, str(port2), f"{endpoint}.csv")
+                if not (os.path.exists(file1) and os.path.exists(file2)):
+                    print(f"Missing per-endpoint files for {parent}/{directory}/{endpoint}, skipping.")
+                    continue
+                if state.is_stale(file1) or state.is_stale(file2):
+                    continue
+
+                # Tail ratios are added when both runs have per-second sketches
+                sketch_files = [file_path.replace('.csv', '.sketch.npz') for file_path in (file1, file2)]
+                if not all(os.path.exists(sketch_file) for sketch_file in sketch_files):
+                    sketch_files = []
+
+                key = f"analyze:{parent}/{directory}/{endpoint}"
+                fingerprint = state.fingerprint("analyze", [file1, file2] + sketch_files, {'options': options, 'base_seed': base_seed})
+                if not force and state.is_current(key, fingerprint, [cell_result_path(root, parent, directory, endpoint)]):
+                    continue
+
+                pending.append({
+                    'file1': file1,
+                    'file2': file2,
+                    'options': dict(options, endpoint=endpoint, threads=threads_of(directory)),
+                    'sketch_files': sketch_files
+                })
+                keys.append(key)
+                fingerprints.append(fingerprint)
+
+    if not pending:
+        return
+
+    print(f"Analyzing {len(pending)} changed cell(s).")
+    # Seeds derive from the cell key, so a cell's CI does not depend on which other cells reran
+    results = sweep_response_times(pending, base_seed=base_seed, cell_keys=keys)
+
+    for cell, key, fingerprint, result in zip(pending, keys, fingerprints, results):
+        if cell['sketch_files']:
+            result.update(analyze_tail_ratios(*cell['sketch_files'], options['warmup_time'], options['cooldown_time'],
+                                              options['noise_start'], options['noise_end']))
+        parent, directory, endpoint = key.split(':', 1)[1].split('/')
+        output = cell_result_path(root, parent, directory, endpoint)
+        os.makedirs(os.path.dirname(output), exist_ok=True)
+        write_json_atomic(output, result)
+        state.record(key, fingerprint)
+    state.save()
+
+def cell_result_path(root, parent, directory, endpoint):
+    """Location of the stored analysis result of one cell."""
+    return os.path.join(root, parent, ".pipeline", "cells", f"{directory}-{endpoint}.json")
+
+def table_stage(config, state, force=False):
+    """Assembles the stored cell results of each experiment into a CSV and LaTeX table."""
+    root = config['root']
+
+    for parent, directories in config['experiments'].items():
+        cell_files = [
+            cell_result_path(root, parent, directory, endpoint)
+            for directory in directories
+            for endpoint in config['endpoints']
+        ]
+        cell_files = [cell_file for cell_file in cell_files if os.path.exists(cell_file)]
+        if not cell_files:
+            continue
+
+        csv_path = os.path.join(root, parent, "rel_table_multiple_endpoints.csv")
+        tex_path = os.path.join(root, parent, "rel_table_multiple_endpoints.tex")
+        key = f"table:{parent}"
+        fingerprint = state.fingerprint("table", cell_files, {})
+        if not force and state.is_current(key, fingerprint, [csv_path, tex_path]):
+            continue
+
+        results = []
+        for cell_file in cell_files:
+            with open(cell_file, 'r') as infile:
+                result = json.load(infile)
+            for column in ('CI Noise', 'CI Non-Noise', 'CI Overall',
+                           'CI Throughput Noise', 'CI Throughput Non-Noise', 'CI Throughput Overall'):
+                if column in result:
+                    result[column] = tuple(result[column])
+            results.append(result)
+
+        # Tables are rewritten from scratch; reruns never append duplicate rows
+        final_table = pd.DataFrame(results)
+        final_table.to_csv(csv_path, index=False)
+        with open(tex_path, 'w') as outfile:
+            outfile.write(dataframe_to_latex(final_table, caption=f"Response Time Comparison ({parent})",
+                                             label=f"tab:response_times_{parent}"))
+        print(f"Table for '{parent}' saved to '{csv_path}'.")
+
+        state.record(key, fingerprint)
+        state.save()
+
+def baseline_cell_path(root, parent, directory, endpoint):
+    """Location of the stored baseline comparison rows of one cell."""
+    return os.path.join(root, parent, ".pipeline", "baseline", f"{directory}-{endpoint}.json")
+
+def baseline_stage(config, state, force=False):
+    """Compares every experiment with the baseline experiment and writes its '<phase>.csv' tables.
+
+    Like the analysis, every directory/endpoint cell is computed and stored on its
+    own, so adding a run only compares its cells; the tables are merged from the
+    stored cells.
+    """
+    root = config['root']
+    baseline_parent = config.get('baseline', 'baseline')
+    if baseline_parent not in config['experiments']:
+        return
+    # Same windows as the aggregated_analysis_relative_changes script, which writes the same tables
+    windows = COMPARISON_WINDOWS
+    base_seed = config.get('bootstrap', {}).get('base_seed', 0)
+    port1, port2 = config['ports'][:2]
+
+    def endpoint_files(parent, directory):
+        return {
+            endpoint: [os.path.join(root, parent, directory, str(port), f"{endpoint}.csv") for port in (port1, port2)]
+            for endpoint in config['endpoints']
+        }
+
+    for parent, directories in config['experiments'].items():
+        if parent == baseline_parent:
+            continue
+        # Only directories and endpoints present in both experiments are compared
+        directories = [directory for directory in directories if directory in config['experiments'][baseline_parent]]
+        baseline_files, experiment_files = {}, {}
+        for directory in directories:
+            baseline_files[directory] = endpoint_files(baseline_parent, directory)
+            experiment_files[directory] = {
+                endpoint: files for endpoint, files in endpoint_files(parent, directory).items()
+                if all(os.path.exists(file_path) and not state.is_stale(file_path)
+                       for file_path in files + baseline_files[directory][endpoint])
+            }
+        cells = experiment_cells(parent, baseline_files, experiment_files, directories, windows)
+        if not cells:
+            continue
+
+        pending, keys, fingerprints = [], [], []
+        for cell in cells:
+            key = f"baseline:{cell_key(parent, cell)}"
+            fingerprint = state.fingerprint("baseline", cell['files'], {'windows': repr(windows), 'base_seed': base_seed})
+            if not force and state.is_current(key, fingerprint, [baseline_cell_path(root, parent, cell['directory'], cell['endpoint'])]):
+                continue
+            pending.append(cell)
+            keys.append(key)
+            fingerprints.append(fingerprint)
+
+        if pending:
+            print(f"Comparing {len(pending)} changed cell(s) of '{parent}' with '{baseline_parent}'.")
+            for cell, key, fingerprint, rows in zip(pending, keys, fingerprints,
+                                                    sweep_cells(parent, pending, base_seed=base_seed)):
+                output = baseline_cell_path(root, parent, cell['directory'], cell['endpoint'])
+                os.makedirs(os.path.dirname(output), exist_ok=True)
+                write_json_atomic(output, rows)
+                state.record(key, fingerprint)
+            state.save()
+
+        cell_files = [baseline_cell_path(root, parent, cell['directory'], cell['endpoint']) for cell in cells]
+        outputs = [os.path.join(root, parent, f"{phase}.csv") for phase in ("pre_noise", "noise", "post_noise")]
+        key = f"baseline:{parent}"
+        fingerprint = state.fingerprint("baseline", cell_files, {})
+        if not force and state.is_current(key, fingerprint, outputs):
+            continue
+
+        results = {"pre_noise": [], "noise": [], "post_noise": []}
+        for cell_file in cell_files:
+            for phase_name, row in read_json(cell_file).items():
+                results[phase_name].append(row)
+        display_results(results, parent, output_dir=os.path.join(root, parent))
+        state.record(key, fingerprint)
+        state.save()
+
+def store_stage(config, state, force=False):
+    """Loads the stored cell results and per-run phase statistics into the SQLite results store."""
+    root = config['root']
+    phases = config.get('phases', {})
+    windows = PhaseWindows(phases.get('noise_start', 200), phases.get('noise_end', 500),
+                           phases.get('warmup_time', 60), phases.get('cooldown_time', 150))
+    port1, port2 = config['ports'][:2]
+    store_path = os.path.join(root, config.get('store', results_store.STORE_FILE))
+    conn = results_store.connect(store_path)
+
+    stored = 0
+    for parent, directories in config['experiments'].items():
+        for directory in directories:
+            for endpoint in config['endpoints']:
+                cell_file = cell_result_path(root, parent, directory, endpoint)
+                if not os.path.exists(cell_file):
+                    continue
+                series_files = [os.path.join(root, parent, directory, str(port), f"{endpoint}.csv") for port in (port1, port2)]
+                if any(state.is_stale(series_file) for series_file in series_files):
+                    continue
+                sketch_files = [file_path.replace('.csv', '.sketch.npz') for file_path in series_files]
+                inputs = [cell_file] + series_files + [sketch_file for sketch_file in sketch_files if os.path.exists(sketch_file)]
+
+                key = f"store:{parent}/{directory}/{endpoint}"
+                fingerprint = state.fingerprint("store", inputs, {'windows': repr(windows), 'store': store_path})
+                if not force and state.is_current(key, fingerprint, [store_path]):
+                    continue
+
+                with open(cell_file, 'r') as infile:
+                    result = json.load(infile)
+                results_store.store_comparison(conn, parent, directory, result, port1, port2)
+                for port, series_file, sketch_file in zip((port1, port2), series_files, sketch_files):
+                    results_store.store_series(conn, parent, directory, threads_of(directory), endpoint, port, series_file,
+                                               read_csv(series_file), windows, sha256=state.file_digest(series_file),
+                                               sketch_file=sketch_file)
+                state.record(key, fingerprint)
+                stored += 1
+
+    conn.close()
+    state.save()
+    if stored:
+        print(f"Stored {stored} cell(s) in '{store_path}'.")
+
+STAGES = {
+    "preprocess": preprocess_stage,
+    "analyze": analyze_stage,
+    "table": table_stage,
+    "baseline": baseline_stage,
+    "store": store_stage
+}
+
+def run_pipeline(config, stages=None, force=False):
+    """Runs the selected stages in order, skipping work whose inputs are unchanged."""
+    state = PipelineState(config['root'])
+    for stage in stages or STAGES:
+        STAGES[stage](config, state, force=force)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Incremental analysis pipeline for duet benchmark runs.")
+    parser.add_argument("config", help="Path to the experiment config (JSON)")
+    parser.add_argument("--stage", action="append", choices=list(STAGES), help="Only run the given stage(s)")
+    parser.add_argument("--force", action="store_true", help="Recompute outputs even if their inputs are unchanged")
+    args = parser.parse_args()
+
+    run_pipeline(load_config(args.config), stages=args.stage, force=args.force)
@@ -1,8 +1,54 @@
 import csv
+import io
+import re
 import statistics
 from collections import defaultdict
 import os
 import shutil
+import numpy as np
+import pandas as pd
+from columnar_cache import read_json, write_json_atomic
+import sketches
+
+# Only these columns of the k6 output are needed for the aggregation
+INGEST_COLUMNS = ['metric_name', 'timestamp', 'metric_value', 'name']
+
+# Extra k6 columns needed for the throughput and error rate timelines
+TRAFFIC_COLUMNS = ['check', 'expected_response', 'status']
+TRAFFIC_COUNTS = ['requests', 'errors', 'failed_checks']
+
+# Checks carry no request name; this maps them to the endpoint they verify
+CHECK_ENDPOINTS = {
+    'successful booking': 'bookings'
+}
+
+# Unix time of elapsed time 0 of every per-endpoint file, written next to the files
+START_TIMES_FILE = 'start_times.json'
+
+# Bytes of the input scanned at a time when only the rows of some metrics are parsed
+BLOCK_SIZE = 1 << 26
+
+# Per-second aggregation of metrics that are not trends (trends use the median)
+METRIC_REDUCERS = {
+    'http_reqs': 'sum',
+    'iterations': 'sum',
+    'data_sent': 'sum',
+    'data_received': 'sum',
+    'http_req_failed': 'mean',
+    'checks': 'mean'
+}
+
+def normalize_endpoint_name(raw_name):
+    """Maps a k6 request name to the endpoint name used for the output file."""
+    name = raw_name.strip("${}/")  # Extract name for file naming
+
+    if "seats" in name:
+        name = "seats"
+
+    if "flights?from" in name:
+        name = "flights"
+
+    return name
 
 def filter_and_aggregate_csv(input_file, metric_name, output_dir):
     try:
@@ -21,13 +67,7 @@ def filter_and_aggregate_csv(input_file, metric_name, output_dir):
 
             for row in reader:
                 if row['metric_name'] == metric_name:
-                    name = row['name'].strip("${}/")  # Extract name for file naming
-                    
-                    if "seats" in name:
-                        name = "seats"
-                    
-                    if "flights?from" in name:
-                        name = "flights"
+                    name = normalize_endpoint_name(row['name'])
 
                     timestamp = float(row['timestamp'])  # Convert timestamp to float
                     metric_value = float(row['metric_value'])  # Convert metric_value to float
@@ -75,23 +115,312 @@ def filter_and_aggregate_csv(input_file, metric_name, output_dir):
     except Exception as e:
         print(f"Error: {e}")
 
-# Example usage
-metric_name = "http_req_duration"  # Replace with your desired metric name
+def reducer_for(metric_name):
+    """Per-second aggregation of a metric: counters are summed, rates averaged, trends use the median."""
+    return METRIC_REDUCERS.get(metric_name, 'median')
+
+def metric_line_blocks(input_file, metric_names, block_size=BLOCK_SIZE):
+    """Yields the header plus the lines of the given metrics of every block of the input, as CSV bytes.
+
+    k6 writes metric_name as the first column and never quotes it, so the rows
+    of other metrics are dropped with one regular expression search per block
+    before the CSV parser sees them; parsing is most of the ingest time and
+    the requested metrics are usually a small share of the rows.
+    """
+    pattern = re.compile(b'\n(?:' + b'|'.join(re.escape(name.encode()) for name in metric_names) + b'),[^\n]*')
+    with open(input_file, 'rb') as infile:
+        header = infile.readline()
+        infile.seek(-1, os.SEEK_CUR)  # Every line is matched with the newline before it
+        header = header.rstrip(b'\r\n')
+        while True:
+            block = infile.read(block_size)
+            end = len(block)
+            if end == block_size:
+                # Leave the last, possibly incomplete line for the next block
+                end = block.rfind(b'\n')
+                if end <= 0:
+                    infile.seek(-len(block), os.SEEK_CUR)
+                    block_size *= 2
+                    continue
+                infile.seek(end - len(block), os.SEEK_CUR)
+            lines = pattern.findall(block, 0, end)
+            if lines:
+                yield header + b''.join(lines)
+            if len(block) < block_size:
+                break
+
+def read_metric_chunks(input_file, metric_names, chunksize, traffic_stats=False):
+    """Streams the input CSV in bounded-memory chunks and yields the rows of the given metrics.
+
+    With traffic_stats the http_reqs and checks rows are yielded as well, with a
+    'failed' column: a request failed if k6 marked it as unexpected or its status
+    is not 2xx, a check failed if its value is 0. Check rows carry no request name
+    and are attributed to the endpoint in CHECK_ENDPOINTS.
+
+    Inputs in k6's layout, with metric_name as the first column, are prefiltered
+    by metric_line_blocks; any other layout is parsed in chunks of chunksize rows.
+    """
+    header = pd.read_csv(input_file, nrows=0).columns
+    if not set(INGEST_COLUMNS).issubset(header):
+        raise ValueError("The input CSV must contain 'metric_name', 'metric_value', 'timestamp', and 'name' columns.")
+
+    usecols = INGEST_COLUMNS
+    selected_metrics = list(metric_names)
+    if traffic_stats:
+        if not set(TRAFFIC_COLUMNS).issubset(header):
+            raise ValueError("Traffic statistics need the 'check', 'expected_response' and 'status' columns.")
+        usecols = INGEST_COLUMNS + TRAFFIC_COLUMNS
+        selected_metrics += ['http_reqs', 'checks']
 
+    dtype = {'metric_name': 'category', 'name': 'category', 'timestamp': 'float64', 'metric_value': 'float64',
+             'check': 'category', 'expected_response': 'category', 'status': 'category'}
+    if header[0] == 'metric_name':
+        reader = (pd.read_csv(io.BytesIO(text), usecols=usecols, dtype=dtype)
+                  for text in metric_line_blocks(input_file, selected_metrics))
+    else:
+        reader = pd.read_csv(input_file, usecols=usecols, dtype=dtype, chunksize=chunksize)
+    for chunk in reader:
+        chunk = chunk[chunk['metric_name'].isin(selected_metrics)]
 
+        # Normalize each distinct request name once instead of once per row
+        raw_names = chunk['name'].cat.categories
+        names = np.append(np.array([normalize_endpoint_name(str(raw_name)) for raw_name in raw_names], dtype=object), None)
+        endpoint_names = names[chunk['name'].cat.codes.to_numpy()]  # Missing names (code -1) map to None
 
-directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
+        if traffic_stats:
+            is_check = (chunk['metric_name'] == 'checks').to_numpy()
+            endpoint_names[is_check] = chunk['check'][is_check].map(CHECK_ENDPOINTS).astype(object).to_numpy()
 
-parentdirectory = "baseline"
+        keep = pd.notna(endpoint_names)
+        if not keep.any():
+            continue
+
+        rows = {
+            'metric_name': chunk['metric_name'].astype(str).to_numpy()[keep],
+            'name': endpoint_names[keep],
+            'timestamp': chunk['timestamp'].to_numpy()[keep],
+            'metric_value': chunk['metric_value'].to_numpy()[keep]
+        }
+        if traffic_stats:
+            status = pd.to_numeric(chunk['status'].astype(str), errors='coerce').to_numpy()
+            unexpected = (chunk['expected_response'].astype(str) == 'false').to_numpy()
+            failed_request = unexpected | ~((status >= 200) & (status < 300))
+            failed_check = chunk['metric_value'].to_numpy() == 0
+            rows['failed'] = np.where(is_check, failed_check, failed_request)[keep]
+
+        yield pd.DataFrame(rows)
+
+def update_traffic(traffic_parts, chunk):
+    """Adds the per-second request, error and failed check counts of one chunk."""
+    is_request = (chunk['metric_name'] == 'http_reqs').to_numpy()
+    is_check = (chunk['metric_name'] == 'checks').to_numpy()
+    if not (is_request.any() or is_check.any()):
+        return
+
+    failed = chunk['failed'].to_numpy()
+    traffic = pd.DataFrame({
+        'name': chunk['name'],
+        'timestamp': chunk['timestamp'],
+        'requests': is_request.astype(np.int64),
+        'errors': (is_request & failed).astype(np.int64),
+        'failed_checks': (is_check & failed).astype(np.int64)
+    })[is_request | is_check]
+    traffic_parts.append(traffic.groupby(['name', 'timestamp'], sort=False).sum())
+
+def update_sketches(accumulators, chunk):
+    """Adds the values of one chunk to the per-(name, timestamp) quantile sketches."""
+    codes, keys = pd.MultiIndex.from_arrays([chunk['name'], chunk['timestamp']]).factorize()
+    chunk_sketches = sketches.grouped_sketches(codes, chunk['metric_value'].to_numpy(), len(keys))
+    for key, sketch in zip(keys, chunk_sketches):
+        if key in accumulators:
+            accumulators[key] += sketch
+        else:
+            accumulators[key] = sketch
+
+def name_sketches_for(accumulators, name, timestamps):
+    """Stacks the sketches of one endpoint in timestamp order."""
+    return np.stack([accumulators[(name, ts)] for ts in timestamps])
+
+def filter_and_aggregate_csv_chunked(input_file, metric_name, output_dir, chunksize=1_000_000,
+                                     write_sketches=False, exact_median=True, quantile_levels=sketches.DEFAULT_QUANTILES,
+                                     layout='wide', traffic_stats=False):
+    """Columnar variant of filter_and_aggregate_csv that streams the input in chunks
+    and computes the per-second aggregates with grouped reductions.
+
+    metric_name may be a single metric or a list of metrics, which are all extracted
+    in the same pass over the input. With layout='wide' each endpoint gets one file
+    with a column per metric; with layout='per_metric' the first metric goes to
+    '<name>.csv' and every other one to '<name>.<metric>.csv'. The first metric is
+    the primary one, and a single metric produces the same files as
+    filter_and_aggregate_csv.
+
+    With write_sketches, every second of the primary metric is also summarized in a
+    mergeable quantile sketch: the output gets p50/p90/p99/p99.9 columns and the
+    sketches are saved to '<name>.sketch.npz'. Without exact_median the raw values of
+    the primary metric are never kept, so its memory stays constant per
+    (endpoint, second) bucket, and its column holds the sketch's median instead of
+    the exact one.
+
+    Memory: the input is read in blocks, but exact medians need every value of a
+    second, and k6 does not write its rows in strict time order. The rows of
+    every exactly aggregated metric (the primary one with exact_median, and all
+    other metrics) are therefore kept until the end of the input, as four typed
+    columns per row, so peak memory grows with the run length. Only a single
+    metric with exact_median=False is aggregated in memory bounded by the block
+    size and the number of (endpoint, second) buckets.
+
+    With traffic_stats the same pass also counts, per endpoint and second, the
+    requests, the failed requests (non-2xx or expected_response=false) and the
+    failed 'successful booking' checks, as the 'requests', 'errors' and
+    'failed_checks' columns. These columns have a row for every second from
+    the first to the last second with traffic on any endpoint, 0 for idle
+    seconds, and the elapsed time of all endpoints starts at that first second;
+    the metric columns are empty in seconds without samples.
+
+    The Unix time of elapsed time 0 of every endpoint is saved to
+    START_TIMES_FILE in output_dir, for aligning other time series with the
+    files (recorded_start_time).
+
+    Like filter_and_aggregate_csv, errors are printed rather than raised;
+    returns True only if the output files were written.
+    """
+    if not exact_median and not write_sketches:
+        raise ValueError("exact_median=False requires write_sketches=True.")
+    if layout not in ('wide', 'per_metric'):
+        raise ValueError(f"Unknown layout '{layout}'.")
+
+    metric_names = [metric_name] if isinstance(metric_name, str) else list(metric_name)
+    primary_metric = metric_names[0]
+
+    try:
+        # Step 1: Keep only the rows of the requested metrics as typed columns
+        chunks = []
+        accumulators = {}
+        traffic_parts = []
+        for chunk in read_metric_chunks(input_file, metric_names, chunksize, traffic_stats):
+            if traffic_stats:
+                update_traffic(traffic_parts, chunk)
+                chunk = chunk[chunk['metric_name'].isin(metric_names)].drop(columns='failed')
+            is_primary = chunk['metric_name'] == primary_metric
+            if write_sketches:
+                update_sketches(accumulators, chunk[is_primary])
+            chunks.append(chunk if exact_median else chunk[~is_primary])
 
-for directory in directories:
+        if not accumulators and not any(len(chunk) for chunk in chunks):
+            print(f"No rows found for metric '{metric_name}'.")
+            return False
+
+        if os.path.exists(output_dir):
+            shutil.rmtree(output_dir)
+
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Step 2: One grouped reduction per metric over (name, timestamp)
+        data = pd.concat(chunks, ignore_index=True)
+        del chunks
+        data['name'] = data['name'].astype('category')
+        reduced = {}
+        for metric, rows in data.groupby('metric_name', sort=False):
+            reduced[metric] = rows.groupby(['name', 'timestamp'], observed=True, sort=True)['metric_value'].agg(reducer_for(metric))
+
+        traffic = pd.concat(traffic_parts).groupby(level=[0, 1]).sum() if traffic_parts else None
+        if traffic is not None:
+            # Counts of every endpoint cover the whole run, from the first to the last second in which
+            # any endpoint saw traffic: idle seconds count as 0 and all endpoints share one origin
+            timestamps = traffic.index.get_level_values(1)
+            run_seconds = np.union1d(np.arange(timestamps.min(), timestamps.max() + 1), timestamps)
+
+        names = list(pd.unique(data['name']))
+        names += [name for name in pd.unique(pd.Series([key_name for key_name, _ in accumulators], dtype=object)) if name not in names]
+
+        start_times = {}
+        for name in names:
+            columns = {}
+            for metric in metric_names:
+                if metric in reduced and name in reduced[metric].index.get_level_values(0):
+                    columns[metric] = reduced[metric].loc[name]
+
+            if traffic is not None:
+                if name in traffic.index.get_level_values(0):
+                    name_traffic = traffic.loc[name].reindex(run_seconds, fill_value=0)
+                else:
+                    name_traffic = pd.DataFrame(0, index=run_seconds, columns=TRAFFIC_COUNTS)
+                for column in TRAFFIC_COUNTS:
+                    columns[column] = name_traffic[column]
+
+            if write_sketches:
+                sketch_timestamps = np.array(sorted(ts for key_name, ts in accumulators if key_name == name))
+                name_sketches = name_sketches_for(accumulators, name, sketch_timestamps)
+                if not exact_median and len(sketch_timestamps):
+                    columns[primary_metric] = pd.Series(sketches.quantiles(name_sketches, (0.5,))[:, 0], index=sketch_timestamps)
+                estimates = sketches.quantiles(name_sketches, quantile_levels)
+                for column, q in enumerate(quantile_levels):
+                    columns[sketches.quantile_label(q)] = pd.Series(estimates[:, column], index=sketch_timestamps)
+
+            # Align all metrics of this endpoint on the timestamps seen by any of them
+            aggregated = pd.concat(columns, axis=1, sort=True)
+            for column in TRAFFIC_COUNTS:
+                if column in aggregated:
+                    aggregated[column] = aggregated[column].fillna(0).astype(np.int64)
+            start_time = aggregated.index[0]
+            aggregated.insert(0, 'elapsed_time', aggregated.index.to_numpy() - start_time)  # Convert to time elapsed from 0
+            start_times[name] = float(start_time)
+
+            # Step 3: Write the aggregated data to separate output CSV files per name
+            output_file = f"{output_dir}/{name}.csv"
+            if layout == 'wide':
+                aggregated.to_csv(output_file, index=False, lineterminator='\r\n')
+            else:
+                primary_columns = ['elapsed_time'] + [column for column in aggregated.columns if column not in metric_names[1:] + ['elapsed_time']]
+                write_metric_file(aggregated[primary_columns], primary_metric, output_file)
+                for metric in metric_names[1:]:
+                    if metric in aggregated:
+                        write_metric_file(aggregated[['elapsed_time', metric]], metric, f"{output_dir}/{name}.{metric}.csv")
+
+            if write_sketches:
+                sketches.save_sketches(f"{output_dir}/{name}.sketch.npz", sketch_timestamps - start_time, name_sketches)
+
+            print(f"Aggregated CSV for '{name}' saved to '{output_file}'.")
+
+        write_json_atomic(os.path.join(output_dir, START_TIMES_FILE), start_times)
+
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+    return True
+
+def recorded_start_time(endpoint_file):
+    """Unix time of elapsed time 0 of a per-endpoint file, from the START_TIMES_FILE next to it (None if unknown)."""
+    start_times = read_json(os.path.join(os.path.dirname(os.path.abspath(endpoint_file)), START_TIMES_FILE))
+    endpoint = os.path.basename(endpoint_file).split('.')[0]
+    if not start_times or endpoint not in start_times:
+        return None
+    return float(start_times[endpoint])
+
+def write_metric_file(aggregated, metric_name, output_file):
+    """Writes the seconds in which a metric has samples, or traffic counts, to its own per-endpoint file."""
+    counts = [column for column in TRAFFIC_COUNTS if column in aggregated]
+    aggregated = aggregated[aggregated[metric_name].notna() | aggregated[counts].notna().any(axis=1)]
+    aggregated.to_csv(output_file, index=False, lineterminator='\r\n')
+
+if __name__ == "__main__":
+    # Example usage
+    # The first metric is the primary one; the others are extracted in the same pass
+    # and written as extra columns of the per-endpoint files
+    metric_name = ["http_req_duration", "http_req_waiting", "http_req_connecting", "http_req_blocked"]
+
+    directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
+
+    parentdirectory = "baseline"
+
+    for directory in directories:
         output_dir1 = f"./{parentdirectory}/{directory}/3000"
         output_dir2 = f"./{parentdirectory}/{directory}/3001"
 
         input_file1 = f"./{parentdirectory}/{directory}/client_results_3000.csv"
         input_file2 = f"./{parentdirectory}/{directory}/client_results_3001.csv"
 
-        filter_and_aggregate_csv(input_file1, metric_name, output_dir1)
-        filter_and_aggregate_csv(input_file2, metric_name, output_dir2) 
-
-
+        # Also keep per-second quantile sketches for the tail latency analysis, and
+        # per-second request, error and failed check counts for the throughput analysis
+        filter_and_aggregate_csv_chunked(input_file1, metric_name, output_dir1, write_sketches=True, traffic_stats=True)
+        filter_and_aggregate_csv_chunked(input_file2, metric_name, output_dir2, write_sketches=True, traffic_stats=True)
@@ -0,0 +1,128 @@
+import numpy as np
+import scipy.stats as stats
+
+# Below this sample size scipy uses the exact U distribution, which the normal approximation cannot match
+EXACT_MAX_SIZE = 8
+
+def sorted_sample(values):
+    """Sorted float64 copy of a phase sample; every kernel function works on these."""
+    return np.sort(np.asarray(values, dtype=np.float64))
+
+def merge_sorted(*arrays):
+    """Merges sorted arrays into one sorted array.
+
+    The stable sort is a timsort, which finds the sorted runs of the
+    concatenation and only merges them.
+    """
+    return np.sort(np.concatenate(arrays), kind='stable')
+
+def u_statistic(sorted1, sorted2):
+    """Mann-Whitney U of the first sample: the pairs (x, y) with y < x, plus half the pairs with y == x.
+
+    Counted with binary search of sample 1 in sample 2, so the pooled sample is
+    never ranked.
+    """
+    less = np.searchsorted(sorted2, sorted1, side='left')
+    less_or_equal = np.searchsorted(sorted2, sorted1, side='right')
+    return float(less.sum() + 0.5 * (less_or_equal - less).sum())
+
+def tie_term(sorted_values):
+    """Sum of t^3 - t over the groups of t equal values of a sorted sample."""
+    if len(sorted_values) == 0:
+        return 0.0
+    starts = np.flatnonzero(np.concatenate(([True], sorted_values[1:] != sorted_values[:-1], [True])))
+    t = np.diff(starts).astype(np.float64)
+    return float((t ** 3 - t).sum())
+
+def mannwhitney_pvalue(u1, n1, n2, ties, use_continuity=True):
+    """Two-sided p-value of U1 with the normal approximation, tie and continuity correction.
+
+    Same formula as scipy.stats.mannwhitneyu's asymptotic method; `ties` is
+    the tie_term of the pooled sample.
+    """
+    if n1 == 0 or n2 == 0:
+        return float('nan')
+    n = n1 + n2
+    u = max(u1, n1 * n2 - u1)
+    sigma = np.sqrt(n1 * n2 / 12 * ((n + 1) - ties / (n * (n - 1))))
+    numerator = u - n1 * n2 / 2
+    if use_continuity:
+        numerator -= 0.5
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z = numerator / sigma
+    return float(np.clip(2 * stats.norm.sf(z), 0, 1))
+
+def mannwhitney(sorted1, sorted2):
+    """Two-sided Mann-Whitney U test of two sorted samples; returns (U1, p-value)."""
+    n1, n2 = len(sorted1), len(sorted2)
+    if 0 < min(n1, n2) <= EXACT_MAX_SIZE:
+        result = stats.mannwhitneyu(sorted1, sorted2, alternative='two-sided')
+        return float(result.statistic), float(result.pvalue)
+    u1 = u_statistic(sorted1, sorted2)
+    return u1, mannwhitney_pvalue(u1, n1, n2, tie_term(merge_sorted(sorted1, sorted2)))
+
+def sorted_phases(noise, non_noise):
+    """Sorted Noise, Non-Noise and Overall samples of one run; Overall is merged, not sorted again."""
+    noise, non_noise = sorted_sample(noise), sorted_sample(non_noise)
+    return {'Noise': noise, 'Non-Noise': non_noise, 'Overall': merge_sorted(noise, non_noise)}
+
+def phase_mannwhitney(phases1, phases2):
+    """Mann-Whitney p-values of the Noise, Non-Noise and Overall phase of two runs (from sorted_phases).
+
+    The overall sample of a run is the union of its noise and non-noise
+    samples, so its U statistic is the sum of the U statistics of the four
+    phase pairings instead of a new ranking of the pooled sample.
+    """
+    u_noise, p_noise = mannwhitney(phases1['Noise'], phases2['Noise'])
+    u_non_noise, p_non_noise = mannwhitney(phases1['Non-Noise'], phases2['Non-Noise'])
+
+    overall1, overall2 = phases1['Overall'], phases2['Overall']
+    n1, n2 = len(overall1), len(overall2)
+    if 0 < min(n1, n2) <= EXACT_MAX_SIZE:
+        _, p_overall = mannwhitney(overall1, overall2)
+    else:
+        u_overall = (u_noise + u_non_noise + u_statistic(phases1['Noise'], phases2['Non-Noise'])
+                     + u_statistic(phases1['Non-Noise'], phases2['Noise']))
+        p_overall = mannwhitney_pvalue(u_overall, n1, n2, tie_term(merge_sorted(overall1, overall2)))
+
+    return {'Noise': p_noise, 'Non-Noise': p_non_noise, 'Overall': p_overall}
+
+def median_ci(sorted_values, ci=0.99):
+    """Distribution-free CI of the median from two order statistics of a sorted sample.
+
+    The interval [x_(k), x_(n-k+1)] covers the median with probability
+    1 - 2 * P(Binomial(n, 1/2) < k); k is the largest rank for which this is
+    at least ci. NaN if the sample is too small for the requested level.
+    """
+    n = len(sorted_values)
+    if n == 0:
+        return float('nan'), float('nan')
+    k = int(stats.binom.ppf((1 - ci) / 2, n, 0.5))
+    if stats.binom.cdf(k, n, 0.5) > (1 - ci) / 2:
+        k -= 1  # ppf gives the smallest k with cdf(k) >= alpha/2; keep P(Binomial < k + 1) <= alpha/2
+    if k < 0:
+        return float('nan'), float('nan')
+    return float(sorted_values[k]), float(sorted_values[n - k - 1])
+
+def median_ratio_ci(sorted1, sorted2, ci=0.99):
+    """Distribution-free CI of median(sample 2) / median(sample 1) without resampling.
+
+    Each median gets an order-statistic CI at level sqrt(ci); since the runs
+    are independent, both cover their medians together with probability at
+    least ci, and the ratio CI divides their bounds crosswise. The interval is
+    conservative, and computing it only costs the sort of both samples.
+    Returns (lower, upper, ratio of the sample medians).
+    """
+    if not len(sorted1) or not len(sorted2):
+        return float('nan'), float('nan'), float('nan')
+    level = np.sqrt(ci)
+    return ratio_interval(median_ci(sorted1, level), np.median(sorted1), median_ci(sorted2, level), np.median(sorted2))
+
+def ratio_interval(ci1, median1, ci2, median2):
+    """(lower, upper, ratio) of median2 / median1 from the median CIs of both samples, divided crosswise."""
+    (lower1, upper1), (lower2, upper2) = ci1, ci2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        lower = lower2 / upper1 if upper1 > 0 else float('nan')
+        upper = upper2 / lower1 if lower1 > 0 else float('nan')
+        ratio = median2 / median1 if median1 != 0 else float('nan')
+    return float(lower), float(upper), float(ratio)
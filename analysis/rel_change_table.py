@@ -1,13 +1,22 @@
+import os
 import pandas as pd
-import scipy.stats as stats
 import numpy as np
+from columnar_cache import DEFAULT_COLUMNS, available_columns, load_series
+import bootstrap_engine
+import rank_kernel
+from sweep import file_frame, load_file_arrays, run_sweep
+from phases import PhaseIndex, PhaseWindows, median
+import sketches
+from preprocessing_filter import TRAFFIC_COUNTS
+
+def analysis_columns(file_path):
+    """Latency columns of a per-endpoint file, plus its traffic counts if it has them."""
+    present = available_columns(file_path)
+    return list(DEFAULT_COLUMNS) + [column for column in TRAFFIC_COUNTS if column in present]
 
 def read_csv(file_path):
-    """Reads the CSV file and converts necessary columns to numeric."""
-    df = pd.read_csv(file_path, low_memory=False)
-    df['http_req_duration'] = pd.to_numeric(df['http_req_duration'], errors='coerce')
-    df['elapsed_time'] = pd.to_numeric(df['elapsed_time'], errors='coerce')
-    return df
+    """Reads the CSV file through the typed columnar cache."""
+    return load_series(file_path, analysis_columns(file_path))
 
 def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     """Filters out the warm-up and cool-down phases from the dataset."""
@@ -15,96 +24,187 @@ def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     experiment_end = df['elapsed_time'].max() - cooldown_time
     return df[(df['elapsed_time'] >= experiment_start) & (df['elapsed_time'] <= experiment_end)]
 
-def bootstrap_relative_change(data1, data2, n_bootstrap=10000, ci=0.99):
-    """Calculates confidence intervals for the relative change using bootstrapping."""
-    boot_rel_changes = [
-        np.median(np.random.choice(data2, size=len(data2), replace=True)) /
-        np.median(np.random.choice(data1, size=len(data1), replace=True))
-        for _ in range(n_bootstrap)
-    ]
-    lower_bound = np.percentile(boot_rel_changes, (1 - ci) / 2 * 100)
-    upper_bound = np.percentile(boot_rel_changes, (1 + ci) / 2 * 100)
-    mean_ratio = np.mean(boot_rel_changes)
-    return float(lower_bound), float(upper_bound), float(mean_ratio)
+def bootstrap_relative_change(data1, data2, n_bootstrap=10000, ci=0.99, seed=None, adaptive=False, rciw_tolerance=0.01):
+    """Calculates confidence intervals for the relative change using bootstrapping.
+
+    Returns (lower, upper, mean ratio, resamples used). In adaptive mode resampling
+    stops early once the CI bounds and RCIW are stable within rciw_tolerance;
+    n_bootstrap is then only the upper limit.
+    """
+    if adaptive:
+        return bootstrap_engine.adaptive_bootstrap_relative_change(
+            data1, data2, ci=ci, tolerance=rciw_tolerance, max_resamples=n_bootstrap, seed=seed)
+
+    lower, upper, mean_ratio = bootstrap_engine.bootstrap_relative_change(data1, data2, n_bootstrap=n_bootstrap, ci=ci, seed=seed)
+    return lower, upper, mean_ratio, n_bootstrap
+
+def relative_change_ci(data1, data2, seed=None, ci_method='bootstrap', adaptive=False, rciw_tolerance=0.01, presorted=False):
+    """CI of the median ratio in the format of bootstrap_relative_change.
+
+    With ci_method='order_statistic' the CI comes from order statistics of the
+    sorted samples (rank_kernel.median_ratio_ci) instead of resampling; the
+    mean ratio is then the ratio of the medians and 0 resamples are reported.
+    presorted skips sorting samples that are already sorted.
+    """
+    if ci_method == 'order_statistic':
+        if not presorted:
+            data1, data2 = rank_kernel.sorted_sample(data1), rank_kernel.sorted_sample(data2)
+        lower, upper, ratio = rank_kernel.median_ratio_ci(data1, data2)
+        return lower, upper, ratio, 0
+    if ci_method != 'bootstrap':
+        raise ValueError(f"Unknown CI method '{ci_method}'.")
+    return bootstrap_relative_change(data1, data2, seed=seed, adaptive=adaptive, rciw_tolerance=rciw_tolerance)
 
 def calculate_median_changes(data, noise_start=200, noise_end=500):
     """Calculates medians for noise and non-noise periods."""
-    noise_data = data[(data['elapsed_time'] >= noise_start) & (data['elapsed_time'] <= noise_end)]
-    non_noise_data = data[(data['elapsed_time'] < noise_start) | (data['elapsed_time'] > noise_end)]
-
-    noise_median = noise_data['http_req_duration'].median()
-    non_noise_median = non_noise_data['http_req_duration'].median()
-    overall_median = data['http_req_duration'].median()
-
-    return noise_median, non_noise_median, overall_median
-
-def analyze_response_times(file1, file2, endpoint, threads=3, warmup_time=60, cooldown_time=60):
-    """Analyzes the median response times and relative changes between noise and non-noise phases."""
-    data1 = filter_warmup_cooldown(read_csv(file1), warmup_time, cooldown_time)
-    data2 = filter_warmup_cooldown(read_csv(file2), warmup_time, cooldown_time)
-
-    noise_m1, non_noise_m1, overall_m1 = calculate_median_changes(data1)
-    noise_m2, non_noise_m2, overall_m2 = calculate_median_changes(data2)
-
-    # Bootstrapped confidence intervals and ratio means
-    noise_data1 = data1[(data1['elapsed_time'] >= 200) & (data1['elapsed_time'] <= 500)]
-    noise_data2 = data2[(data2['elapsed_time'] >= 200) & (data2['elapsed_time'] <= 500)]
-    non_noise_data1 = data1[(data1['elapsed_time'] < 200) | (data1['elapsed_time'] > 500)]
-    non_noise_data2 = data2[(data2['elapsed_time'] < 200) | (data2['elapsed_time'] > 500)]
-
-    ci_n = bootstrap_relative_change(noise_data1['http_req_duration'], noise_data2['http_req_duration'])
-    ci_nn = bootstrap_relative_change(non_noise_data1['http_req_duration'], non_noise_data2['http_req_duration'])
-    ci_overall = bootstrap_relative_change(data1['http_req_duration'], data2['http_req_duration'])
-
-    # Mann-Whitney U Test for statistical significance
-    p_noise = stats.mannwhitneyu(noise_data1['http_req_duration'], noise_data2['http_req_duration'], alternative='two-sided').pvalue
-    p_non_noise = stats.mannwhitneyu(non_noise_data1['http_req_duration'], non_noise_data2['http_req_duration'], alternative='two-sided').pvalue
-    p_overall = stats.mannwhitneyu(data1['http_req_duration'], data2['http_req_duration'], alternative='two-sided').pvalue
+    index = PhaseIndex(data, PhaseWindows(noise_start, noise_end))
+    return median(index.phase("noise")), median(index.non_noise()), median(index.experiment())
+
+def analyze_response_times(file1, file2, endpoint, threads=3, warmup_time=60, cooldown_time=60, adaptive=False, rciw_tolerance=0.01, seed=None,
+                           noise_start=200, noise_end=500, ci_method='bootstrap'):
+    """Analyzes the median response times and relative changes between noise and non-noise phases.
+
+    ci_method selects bootstrapped CIs ('bootstrap') or the resampling-free
+    order-statistic CIs ('order_statistic') for very large samples.
+    """
+    return analyze_response_data(read_csv(file1), read_csv(file2), endpoint, threads, warmup_time, cooldown_time,
+                                 adaptive=adaptive, rciw_tolerance=rciw_tolerance, seed=seed,
+                                 noise_start=noise_start, noise_end=noise_end, ci_method=ci_method)
+
+def analyze_response_data(data1, data2, endpoint, threads=3, warmup_time=60, cooldown_time=60, adaptive=False, rciw_tolerance=0.01, seed=None,
+                          noise_start=200, noise_end=500, ci_method='bootstrap'):
+    """Same as analyze_response_times, but for already loaded runs."""
+    # Sort each run once; all phases below are slices of the same index
+    windows = PhaseWindows(noise_start, noise_end, warmup_time, cooldown_time)
+    index1 = PhaseIndex(data1, windows)
+    index2 = PhaseIndex(data2, windows)
+
+    # Sort every phase sample once; the rank tests and the CIs below share the sorted arrays.
+    # Bootstrap medians only depend on the sorted sample, so this does not change their CIs.
+    phases1 = rank_kernel.sorted_phases(index1.phase("noise"), index1.non_noise())
+    phases2 = rank_kernel.sorted_phases(index2.phase("noise"), index2.non_noise())
+    noise_data1, non_noise_data1, overall_data1 = phases1['Noise'], phases1['Non-Noise'], phases1['Overall']
+    noise_data2, non_noise_data2, overall_data2 = phases2['Noise'], phases2['Non-Noise'], phases2['Overall']
+
+    noise_m1, non_noise_m1, overall_m1 = median(noise_data1), median(non_noise_data1), median(overall_data1)
+    noise_m2, non_noise_m2, overall_m2 = median(noise_data2), median(non_noise_data2), median(overall_data2)
+
+    # Confidence intervals and ratio means; bootstrapping uses a random stream per
+    # phase derived from the cell's seed
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    seed_n, seed_nn, seed_overall = seed_sequence.spawn(3)
+
+    bootstrap_options = {'adaptive': adaptive, 'rciw_tolerance': rciw_tolerance, 'ci_method': ci_method}
+    ci_n = relative_change_ci(noise_data1, noise_data2, seed=seed_n, presorted=True, **bootstrap_options)
+    ci_nn = relative_change_ci(non_noise_data1, non_noise_data2, seed=seed_nn, presorted=True, **bootstrap_options)
+    ci_overall = relative_change_ci(overall_data1, overall_data2, seed=seed_overall, presorted=True, **bootstrap_options)
+
+    # Mann-Whitney U Test for statistical significance; the overall U is derived from the phase ranks
+    p_values = rank_kernel.phase_mannwhitney(phases1, phases2)
+    p_noise, p_non_noise, p_overall = p_values['Noise'], p_values['Non-Noise'], p_values['Overall']
+
+    result = comparison_result(endpoint, threads,
+                               {'Noise': noise_m1, 'Non-Noise': non_noise_m1, 'Overall': overall_m1},
+                               {'Noise': noise_m2, 'Non-Noise': non_noise_m2, 'Overall': overall_m2},
+                               {'Noise': ci_n, 'Non-Noise': ci_nn, 'Overall': ci_overall},
+                               {'Noise': p_noise, 'Non-Noise': p_non_noise, 'Overall': p_overall})
+
+    # Throughput and error rates, when the preprocessing counted the requests of both runs
+    if 'requests' in data1 and 'requests' in data2:
+        result.update(analyze_traffic(data1, data2, windows, seed_sequence, **bootstrap_options))
+
+    return result
+
+def comparison_result(endpoint, threads, medians1, medians2, cis, p_values):
+    """Table row of one comparison from the per-phase ('Noise', 'Non-Noise', 'Overall') medians of both runs,
+    CIs in the format of relative_change_ci and Mann-Whitney p-values."""
+    result = {'Endpoint': endpoint, 'Threads': threads}
+    for run, medians in ((1, medians1), (2, medians2)):
+        result[f'Run{run} Median'] = float(medians['Overall'])
+        result[f'Run{run} Median Noise'] = float(medians['Noise'])
+        result[f'Run{run} Median Non-Noise'] = float(medians['Non-Noise'])
 
     # Relative changes using median
-    relative_change_noise = noise_m2 / noise_m1 if noise_m1 != 0 else float('nan')
-    relative_change_non_noise = non_noise_m2 / non_noise_m1 if non_noise_m1 != 0 else float('nan')
-    relative_change_overall = overall_m2 / overall_m1 if overall_m1 != 0 else float('nan')
+    labels = {'Noise': 'Relative Change Noise Phase', 'Non-Noise': 'Relative Change Non-Noise Phase',
+              'Overall': 'Relative Change Overall'}
+    for phase, label in labels.items():
+        m1, m2 = medians1[phase], medians2[phase]
+        relative_change = m2 / m1 if m1 != 0 else float('nan')
+        result[label] = f'{relative_change:.4f} (CI: {cis[phase][0]:.4f} - {cis[phase][1]:.4f})'
+    for phase in labels:
+        result[f'CI {phase}'] = (cis[phase][0], cis[phase][1])
 
     # Relative Confidence Interval Widths (RCIW)
-    def calc_rciw(ci_tuple):
-        lower, upper, ratio = ci_tuple
-        if ratio == 0 or np.isnan(ratio):
-            return float('nan')
-        return (upper - lower) / ratio
-
-    rciw_noise = calc_rciw(ci_n)
-    rciw_non_noise = calc_rciw(ci_nn)
-    rciw_overall = calc_rciw(ci_overall)
-
-    # Format CI strings
-    ci_n_str = f"{ci_n[0]:.4f} - {ci_n[1]:.4f}"
-    ci_nn_str = f"{ci_nn[0]:.4f} - {ci_nn[1]:.4f}"
-    ci_overall_str = f"{ci_overall[0]:.4f} - {ci_overall[1]:.4f}"
-
-    return {
-        'Endpoint': endpoint,
-        'Threads': threads,
-        'Run1 Median': float(overall_m1),
-        'Run1 Median Noise': float(noise_m1),
-        'Run1 Median Non-Noise': float(non_noise_m1),
-        'Run2 Median': float(overall_m2),
-        'Run2 Median Noise': float(noise_m2),
-        'Run2 Median Non-Noise': float(non_noise_m2),
-        'Relative Change Noise Phase': f'{relative_change_noise:.4f} (CI: {ci_n_str})',
-        'Relative Change Non-Noise Phase': f'{relative_change_non_noise:.4f} (CI: {ci_nn_str})',
-        'Relative Change Overall': f'{relative_change_overall:.4f} (CI: {ci_overall_str})',
-        'CI Noise': (ci_n[0], ci_n[1]),
-        'CI Non-Noise': (ci_nn[0], ci_nn[1]),
-        'CI Overall': (ci_overall[0], ci_overall[1]),
-        'RCIW Noise': rciw_noise,
-        'RCIW Non-Noise': rciw_non_noise,
-        'RCIW Overall': rciw_overall,
-        'P-Value Noise': p_noise,
-        'P-Value Non-Noise': p_non_noise,
-        'P-Value Overall': p_overall
+    for phase in labels:
+        lower, upper, ratio, _ = cis[phase]
+        result[f'RCIW {phase}'] = bootstrap_engine.rciw(lower, upper, ratio)
+    for phase in labels:
+        result[f'P-Value {phase}'] = float(p_values[phase])
+    for phase in labels:
+        result[f'Resamples {phase}'] = cis[phase][3]
+    return result
+
+def analyze_traffic(data1, data2, windows, seed_sequence, adaptive=False, rciw_tolerance=0.01, ci_method='bootstrap'):
+    """Relative change of the per-second request rate per phase, and the error rates of both runs.
+
+    Throughput ratios are median(requests/s of run 2) / median(requests/s of run 1)
+    with a CI computed like the latency ratios. Error rates and failed checks
+    cover the experiment window between warm-up and cool-down.
+    """
+    index1 = PhaseIndex(data1, windows, value_column='requests')
+    index2 = PhaseIndex(data2, windows, value_column='requests')
+    phase_data = {
+        'Noise': (index1.phase("noise"), index2.phase("noise")),
+        'Non-Noise': (index1.non_noise(), index2.non_noise()),
+        'Overall': (index1.experiment(), index2.experiment())
     }
 
+    result = {}
+    for (phase, (throughput1, throughput2)), phase_seed in zip(phase_data.items(), seed_sequence.spawn(3)):
+        lower, upper, _, _ = relative_change_ci(throughput1, throughput2, seed=phase_seed, ci_method=ci_method,
+                                                adaptive=adaptive, rciw_tolerance=rciw_tolerance)
+        m1, m2 = median(throughput1), median(throughput2)
+        ratio = m2 / m1 if m1 != 0 else float('nan')
+        result[f'Relative Throughput {phase}'] = f'{ratio:.4f} (CI: {lower:.4f} - {upper:.4f})'
+        result[f'CI Throughput {phase}'] = (lower, upper)
+
+    for run, data, index in ((1, data1, index1), (2, data2, index2)):
+        requests = index.experiment().sum()
+        errors = PhaseIndex(data, windows, value_column='errors').experiment().sum()
+        result[f'Run{run} Requests/s'] = median(index.experiment())
+        result[f'Run{run} Error Rate'] = float(errors / requests) if requests else float('nan')
+        result[f'Run{run} Failed Checks'] = int(PhaseIndex(data, windows, value_column='failed_checks').experiment().sum())
+    return result
+
+def analyze_tail_ratios(sketch_file1, sketch_file2, warmup_time=60, cooldown_time=60, noise_start=200, noise_end=500,
+                        quantile_levels=(0.99, 0.999)):
+    """Relative change of tail latency quantiles per phase, from the per-second sketches."""
+    windows = PhaseWindows(noise_start, noise_end, warmup_time, cooldown_time)
+    sketches1, sketches2 = sketches.phase_sketches(sketch_file1, windows), sketches.phase_sketches(sketch_file2, windows)
+
+    result = {}
+    for phase in ('Noise', 'Non-Noise', 'Overall'):
+        ratios = sketches.quantile_ratios(sketches1[phase], sketches2[phase], quantile_levels)
+        for q, ratio in zip(quantile_levels, ratios):
+            result[f"{sketches.quantile_label(q).upper()} Ratio {phase}"] = float(ratio)
+    return result
+
+def analyze_cell(cell, arrays, seed):
+    """Sweep worker: analyzes one directory/endpoint cell on the shared arrays."""
+    data1, data2 = [file_frame(arrays, file_path, list(DEFAULT_COLUMNS) + TRAFFIC_COUNTS)
+                    for file_path in (cell['file1'], cell['file2'])]
+    return analyze_response_data(data1, data2, seed=seed, **cell['options'])
+
+def sweep_response_times(cells, base_seed=0, max_workers=None, cell_keys=None):
+    """Analyzes all cells in parallel and returns the results in cell order.
+
+    Each cell is a dict with 'file1', 'file2' and the keyword 'options' of
+    analyze_response_data. Every file is loaded once and shared with the workers.
+    """
+    arrays = load_file_arrays((file_path for cell in cells for file_path in (cell['file1'], cell['file2'])),
+                              analysis_columns)
+    return run_sweep(analyze_cell, cells, arrays, base_seed=base_seed, max_workers=max_workers, cell_keys=cell_keys)
+
 def dataframe_to_latex(df, caption="Table Caption", label="tab:label"):
     """Convert a DataFrame to a LaTeX tabular format with resizing and highlighting."""
     def escape_latex(text):
@@ -148,6 +248,10 @@ def dataframe_to_latex(df, caption="Table Caption", label="tab:label"):
         df.at[index, 'Relative Change Noise Phase'] = highlight_outliers(row['Relative Change Noise Phase'], row['CI Noise'])
         df.at[index, 'Relative Change Non-Noise Phase'] = highlight_outliers(row['Relative Change Non-Noise Phase'], row['CI Non-Noise'])
         df.at[index, 'Relative Change Overall'] = highlight_outliers(row['Relative Change Overall'], row['CI Overall'])
+        for phase in ('Noise', 'Non-Noise', 'Overall'):
+            if f'CI Throughput {phase}' in df.columns and isinstance(row[f'CI Throughput {phase}'], tuple):
+                df.at[index, f'Relative Throughput {phase}'] = highlight_outliers(row[f'Relative Throughput {phase}'],
+                                                                                  row[f'CI Throughput {phase}'])
 
     # Format RCIW and P-Values
     df['RCIW Noise'] = df['RCIW Noise'].apply(lambda x: f"{x:.4f}" if pd.notnull(x) else "NaN")
@@ -158,8 +262,10 @@ def dataframe_to_latex(df, caption="Table Caption", label="tab:label"):
     df['P-Value Non-Noise'] = df['P-Value Non-Noise'].apply(highlight_pvalue)
     df['P-Value Overall'] = df['P-Value Overall'].apply(highlight_pvalue)
 
-    # Drop CI columns before export
-    df = df.drop(columns=['CI Noise', 'CI Non-Noise', 'CI Overall'])
+    # Drop CI and resample count columns before export
+    df = df.drop(columns=['CI Noise', 'CI Non-Noise', 'CI Overall',
+                          'Resamples Noise', 'Resamples Non-Noise', 'Resamples Overall',
+                          'CI Throughput Noise', 'CI Throughput Non-Noise', 'CI Throughput Overall'], errors='ignore')
 
     # Generate LaTeX table
     latex_table = df.to_latex(
@@ -185,31 +291,62 @@ def dataframe_to_latex(df, caption="Table Caption", label="tab:label"):
 
 # === Execution Section ===
 
-directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
-
-experiment_files = {
-    "bookings": ["3000/bookings.csv", "3001/bookings.csv"],
-    "destinations": ["3000/destinations.csv", "3001/destinations.csv"],
-    "flights": ["3000/flights.csv", "3001/flights.csv"],
-    "seats": ["3000/seats.csv", "3001/seats.csv"]
-}
-
-results = []
-
-for directory in directories:
-    try:
-        threads = int(directory.split('_')[2].replace('t', ''))
-    except ValueError:
-        print(f"Error parsing threads from directory name: {directory}")
-        continue
-
-    for endpoint, files in experiment_files.items():
-        file1 = f"./microvm/{directory}/{files[0]}"
-        file2 = f"./microvm/{directory}/{files[1]}"
-        result = analyze_response_times(file1, file2, endpoint=endpoint, threads=threads, warmup_time=60, cooldown_time=150)
-        results.append(result)
-
-final_table = pd.DataFrame(results)
-print(final_table)
-final_table.to_csv("rel_table_multiple_endpoints.csv", index=False)
-print(dataframe_to_latex(final_table, caption="Response Time Comparison", label="tab:response_times"))
+if __name__ == "__main__":
+    directories = ["f_run_0t", "f_run_3t", "f_run_6t", "f_run_20t", "f_run_40t", "f_run_60t"]
+
+    # Phase windows of this experiment (seconds of elapsed time)
+    noise_start, noise_end = 200, 500
+    warmup_time, cooldown_time = 60, 150
+
+    # Fixed 10000-resample bootstrap. The adaptive mode stops a cell once its CI bounds
+    # and RCIW change by less than rciw_tolerance between rounds; its CIs are noisier
+    adaptive_bootstrap = False
+    rciw_tolerance = 0.01
+    base_seed = 0
+    # 'order_statistic' replaces resampling by distribution-free CIs for very large samples
+    ci_method = 'bootstrap'
+
+    experiment_files = {
+        "bookings": ["3000/bookings.csv", "3001/bookings.csv"],
+        "destinations": ["3000/destinations.csv", "3001/destinations.csv"],
+        "flights": ["3000/flights.csv", "3001/flights.csv"],
+        "seats": ["3000/seats.csv", "3001/seats.csv"]
+    }
+
+    cells = []
+
+    for directory in directories:
+        try:
+            threads = int(directory.split('_')[2].replace('t', ''))
+        except ValueError:
+            print(f"Error parsing threads from directory name: {directory}")
+            continue
+
+        for endpoint, files in experiment_files.items():
+            file1 = f"./microvm/{directory}/{files[0]}"
+            file2 = f"./microvm/{directory}/{files[1]}"
+            cells.append({
+                'file1': file1,
+                'file2': file2,
+                'options': {
+                    'endpoint': endpoint, 'threads': threads, 'warmup_time': warmup_time, 'cooldown_time': cooldown_time,
+                    'noise_start': noise_start, 'noise_end': noise_end,
+                    'adaptive': adaptive_bootstrap, 'rciw_tolerance': rciw_tolerance, 'ci_method': ci_method
+                }
+            })
+
+    # Cells run in parallel on all cores; the fixed base seed keeps the CIs reproducible
+    results = sweep_response_times(cells, base_seed=base_seed)
+
+    # Tail latency ratios, where the preprocessing also wrote per-second sketches
+    for cell, result in zip(cells, results):
+        sketch_file1, sketch_file2 = [file_path.replace('.csv', '.sketch.npz') for file_path in (cell['file1'], cell['file2'])]
+        if os.path.exists(sketch_file1) and os.path.exists(sketch_file2):
+            options = cell['options']
+            result.update(analyze_tail_ratios(sketch_file1, sketch_file2, options['warmup_time'], options['cooldown_time'],
+                                              options['noise_start'], options['noise_end']))
+
+    final_table = pd.DataFrame(results)
+    print(final_table)
+    final_table.to_csv("rel_table_multiple_endpoints.csv", index=False)
+    print(dataframe_to_latex(final_table, caption="Response Time Comparison", label="tab:response_times"))
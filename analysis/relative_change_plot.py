@@ -1,13 +1,13 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from columnar_cache import load_series
+from timeseries import show_or_save
+from window_pyramid import RESOLUTIONS, load_pyramid, relative_change_windows
 
 def read_csv(file_path):
-    """Reads the CSV file and converts necessary columns to numeric."""
-    df = pd.read_csv(file_path, low_memory=False)
-    df['http_req_duration'] = pd.to_numeric(df['http_req_duration'], errors='coerce')
-    df['elapsed_time'] = pd.to_numeric(df['elapsed_time'], errors='coerce')
-    return df
+    """Reads the CSV file through the typed columnar cache."""
+    return load_series(file_path)
 
 def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     """Filters out the warm-up and cool-down phases from the dataset."""
@@ -15,9 +15,8 @@ def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     experiment_end = df['elapsed_time'].max() - cooldown_time
     return df[(df['elapsed_time'] >= experiment_start) & (df['elapsed_time'] <= experiment_end)]
 
-def plot_relative_change(file1, file2, warmup_time=60, cooldown_time=60, window_size=10):
-    """Plots the relative percentage change between two runs using small time windows."""
-    
+def windowed_relative_change(file1, file2, warmup_time=60, cooldown_time=60, window_size=10):
+    """Median of every time window of both runs and the relative change (%) of run 2 against run 1."""
     # Read and filter the data
     data1 = filter_warmup_cooldown(read_csv(file1), warmup_time, cooldown_time)
     data2 = filter_warmup_cooldown(read_csv(file2), warmup_time, cooldown_time)
@@ -35,7 +34,23 @@ def plot_relative_change(file1, file2, warmup_time=60, cooldown_time=60, window_
     # Compute relative change
     merged_data['relative_change'] = ((merged_data['http_req_duration_run2'] - merged_data['http_req_duration_run1']) 
                                       / merged_data['http_req_duration_run1']) * 100
-    
+    return merged_data
+
+def plot_relative_change(file1, file2, warmup_time=60, cooldown_time=60, window_size=10, fast=False, output_file=None,
+                         title='Relative Change Between Runs - Baseline (Seats)', use_pyramid=False):
+    """Plots the relative percentage change between two runs using small time windows.
+
+    The windows are already aggregated, so fast only skips seaborn's per-x
+    estimator and draws the line directly. With use_pyramid, window sizes the
+    window pyramid stores are read from it instead of grouping both series
+    again. With output_file the figure is saved there instead of shown.
+    """
+    if use_pyramid and window_size in RESOLUTIONS:
+        merged_data = relative_change_windows(load_pyramid(file1), load_pyramid(file2), window_size, warmup_time,
+                                              cooldown_time)
+    else:
+        merged_data = windowed_relative_change(file1, file2, warmup_time, cooldown_time, window_size)
+
     # Create plot
     plt.figure(figsize=(7, 7))
     
@@ -43,21 +58,24 @@ def plot_relative_change(file1, file2, warmup_time=60, cooldown_time=60, window_
     plt.axvspan(200, 500, color='red', alpha=0.1, label='Noise Influence Period')
     
     # Plot the relative change
-    sns.lineplot(data=merged_data, x='time_window', y='relative_change', color='green', label='Relative Change (%)', linewidth=0.8)
+    if fast:
+        plt.plot(merged_data['time_window'], merged_data['relative_change'], color='green', label='Relative Change (%)', linewidth=0.8)
+    else:
+        sns.lineplot(data=merged_data, x='time_window', y='relative_change', color='green', label='Relative Change (%)', linewidth=0.8)
     plt.ylabel('Relative Change (%)', color='green')
     
     # Plot settings
     plt.xlabel('Elapsed Time (seconds)', fontsize=14)
-    plt.title('Relative Change Between Runs - Baseline (Seats)', fontsize=14)
+    plt.title(title, fontsize=14)
     plt.legend(fontsize=12)
     plt.xticks(fontsize=12)
     plt.yticks(fontsize=12)     
     plt.grid(True)
-    plt.show()
-
+    show_or_save(output_file)
 
-# Example usage:
-file1 = "./core_isolation/f_run_3t/3000/destinations.csv"
-file2 = "./core_isolation/f_run_3t/3001/destinations.csv"
+if __name__ == "__main__":
+    # Example usage:
+    file1 = "./core_isolation/f_run_3t/3000/destinations.csv"
+    file2 = "./core_isolation/f_run_3t/3001/destinations.csv"
 
-plot_relative_change(file1, file2, warmup_time=60, cooldown_time=150, window_size=1)
+    plot_relative_change(file1, file2, warmup_time=60, cooldown_time=150, window_size=1)
@@ -0,0 +1,106 @@
+import os
+import numpy as np
+import pandas as pd
+from preprocessing_filter import read_metric_chunks, recorded_start_time
+
+# Cumulative counters of the sampler and the per-second rate derived from each
+COUNTER_RATES = {
+    'usage_usec': 'cpu_cores',            # CPU time used per second, in cores
+    'throttled_usec': 'throttled_share',  # Share of each second the cgroup was throttled
+    'cpu_some_total': 'cpu_pressure',     # Share of each second some task stalled on CPU
+    'io_rbytes': 'io_read_bytes',
+    'io_wbytes': 'io_write_bytes'
+}
+USEC_COUNTERS = {'usage_usec', 'throttled_usec', 'cpu_some_total'}
+
+def read_cgroup_samples(file_path):
+    """Reads a cgroup_<name>.csv written by cgroup_sampler.py."""
+    return pd.read_csv(file_path).sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+def endpoint_start_time(endpoint_file, client_results_file=None, metric_name='http_req_duration'):
+    """Unix time of elapsed time 0 of a per-endpoint file, the origin for aligning other timelines with it.
+
+    Every endpoint has its own origin (its first second, or the first second
+    of the run with traffic counts), recorded by preprocessing_filter next to
+    the file. For files without that record the origin is the endpoint's
+    first second in client_results_file, as filter_and_aggregate_csv counts it.
+    """
+    start_time = recorded_start_time(endpoint_file)
+    if start_time is not None:
+        return start_time
+    if client_results_file is None:
+        raise ValueError(f"No recorded start time for '{endpoint_file}'; pass its client_results file.")
+
+    endpoint = os.path.basename(endpoint_file).split('.')[0]
+    first_seconds = [chunk.loc[chunk['name'] == endpoint, 'timestamp'].min()
+                     for chunk in read_metric_chunks(client_results_file, [metric_name], 1_000_000)]
+    first_seconds = [second for second in first_seconds if not np.isnan(second)]
+    if not first_seconds:
+        raise ValueError(f"No '{metric_name}' rows of '{endpoint}' in '{client_results_file}'.")
+    return float(min(first_seconds))
+
+def per_second(samples, start_time):
+    """Per-second resource timeline on the elapsed time axis of the latency series.
+
+    start_time is the Unix time of that series' elapsed time 0 (endpoint_start_time).
+
+    Counter rates come from the first and last sample in each second, so
+    they do not depend on the sampling frequency. Throttling is also given as
+    the share of CFS periods that were throttled, and memory as the mean and
+    maximum of memory.current.
+    """
+    samples = samples.assign(elapsed_time=np.floor(samples['timestamp'] - start_time))
+    seconds = samples.groupby('elapsed_time')
+    first, last = seconds.first(), seconds.last()
+
+    # Deltas to the previous second's last sample, so every interval is counted once
+    previous = last.shift(1)
+    span = last['timestamp'] - previous['timestamp']
+    timeline = pd.DataFrame(index=last.index)
+    for counter, rate in COUNTER_RATES.items():
+        delta = last[counter] - previous[counter]
+        if counter in USEC_COUNTERS:
+            delta = delta / 1e6
+        timeline[rate] = delta / span
+
+    periods = last['nr_periods'] - previous['nr_periods']
+    throttled = last['nr_throttled'] - previous['nr_throttled']
+    timeline['throttled_periods'] = (throttled / periods).where(periods > 0)
+    timeline['memory_mean'] = seconds['memory_current'].mean()
+    timeline['memory_max'] = seconds['memory_current'].max()
+    timeline['cpu_some_avg10'] = last['cpu_some_avg10']
+    timeline['samples'] = seconds.size()
+
+    # The first second has no previous sample; use its own first sample instead
+    if len(timeline):
+        head = timeline.index[0]
+        head_span = last.at[head, 'timestamp'] - first.at[head, 'timestamp']
+        if head_span > 0:
+            for counter, rate in COUNTER_RATES.items():
+                delta = last.at[head, counter] - first.at[head, counter]
+                timeline.at[head, rate] = (delta / 1e6 if counter in USEC_COUNTERS else delta) / head_span
+
+    return timeline.reset_index()
+
+def align_with_latency(latency, timeline, tolerance=1.0):
+    """Joins a per-second latency series with a resource timeline by elapsed time.
+
+    Every latency row gets the resource values of the nearest earlier second
+    within `tolerance` seconds (NaN if there is none).
+    """
+    latency = latency.sort_values('elapsed_time', kind='stable')
+    latency = latency.assign(elapsed_time=latency['elapsed_time'].astype(np.float64))
+    timeline = timeline.assign(elapsed_time=timeline['elapsed_time'].astype(np.float64))
+    return pd.merge_asof(latency, timeline, on='elapsed_time', direction='backward', tolerance=tolerance)
+
+if __name__ == "__main__":
+    from columnar_cache import load_series
+
+    directory = "./baseline/f_run_3t"
+    latency_file = f"{directory}/3001/flights.csv"
+    start_time = endpoint_start_time(latency_file, f"{directory}/client_results_3001.csv")
+
+    timeline = per_second(read_cgroup_samples(f"{directory}/cgroup_v2.csv"), start_time)
+    aligned = align_with_latency(load_series(latency_file), timeline)
+    print(aligned[['elapsed_time', 'http_req_duration', 'cpu_cores', 'throttled_share', 'cpu_pressure', 'memory_max']])
+    print(aligned[['http_req_duration', 'cpu_cores', 'throttled_share', 'cpu_pressure']].corr(method='spearman'))
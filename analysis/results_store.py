@@ -0,0 +1,250 @@
+import argparse
+import os
+import sqlite3
+import zlib
+import numpy as np
+import pandas as pd
+from phases import PhaseIndex
+import sketches
+
+# Default location of the store, relative to the data root of the experiment config
+STORE_FILE = "results.sqlite"
+
+PHASES = ['Noise', 'Non-Noise', 'Overall']
+
+# Median field of every phase in a cell result (see rel_change_table.analyze_response_data)
+MEDIAN_FIELDS = {'Noise': 'Median Noise', 'Non-Noise': 'Median Non-Noise', 'Overall': 'Median'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    series_id INTEGER PRIMARY KEY,
+    experiment TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    threads INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    port INTEGER NOT NULL,
+    file_path TEXT NOT NULL,
+    sha256 TEXT,
+    UNIQUE (experiment, directory, endpoint, port)
+);
+CREATE INDEX IF NOT EXISTS series_lookup ON series (experiment, threads, endpoint, port);
+CREATE INDEX IF NOT EXISTS series_endpoint ON series (endpoint, threads);
+
+-- Summary statistics of the per-second series of one run and phase
+CREATE TABLE IF NOT EXISTS phase_stats (
+    series_id INTEGER NOT NULL REFERENCES series (series_id) ON DELETE CASCADE,
+    phase TEXT NOT NULL,
+    seconds INTEGER NOT NULL,
+    median REAL,
+    mean REAL,
+    p90 REAL,
+    p99 REAL,
+    requests_per_s REAL,
+    error_rate REAL,
+    -- Quantiles of the individual requests, from the merged sketch of the phase
+    sketch_count INTEGER,
+    sketch_p50 REAL,
+    sketch_p99 REAL,
+    sketch_p999 REAL,
+    sketch BLOB,
+    PRIMARY KEY (series_id, phase)
+);
+
+-- Relative change of one endpoint between two ports, as computed by the analyze stage
+CREATE TABLE IF NOT EXISTS comparisons (
+    experiment TEXT NOT NULL,
+    directory TEXT NOT NULL,
+    threads INTEGER NOT NULL,
+    endpoint TEXT NOT NULL,
+    reference_port INTEGER NOT NULL,
+    port INTEGER NOT NULL,
+    phase TEXT NOT NULL,
+    reference_median REAL,
+    median REAL,
+    ratio REAL,
+    ci_lower REAL,
+    ci_upper REAL,
+    rciw REAL,
+    p_value REAL,
+    resamples INTEGER,
+    p99_ratio REAL,
+    p999_ratio REAL,
+    throughput_ratio_lower REAL,
+    throughput_ratio_upper REAL,
+    PRIMARY KEY (experiment, directory, endpoint, reference_port, port, phase)
+);
+CREATE INDEX IF NOT EXISTS comparisons_lookup ON comparisons (endpoint, threads, phase);
+CREATE INDEX IF NOT EXISTS comparisons_experiment ON comparisons (experiment, threads);
+"""
+
+def connect(store_path):
+    """Opens (and if needed creates) the results store."""
+    conn = sqlite3.connect(store_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+def pack_sketch(sketch):
+    """Compressed bytes of a merged sketch; most buckets are empty, so it compresses well."""
+    return zlib.compress(np.asarray(sketch, dtype=np.uint64).tobytes())
+
+def unpack_sketch(blob):
+    return np.frombuffer(zlib.decompress(blob), dtype=np.uint64)
+
+def nan_to_none(value):
+    """SQLite stores NaN as NULL anyway; converting explicitly keeps the types predictable."""
+    if value is None:
+        return None
+    value = float(value)
+    return None if np.isnan(value) else value
+
+def series_phase_stats(data, windows):
+    """Summary statistics per phase of one per-endpoint series."""
+    index = PhaseIndex(data, windows)
+    phase_values = {'Noise': index.phase("noise"), 'Non-Noise': index.non_noise(), 'Overall': index.experiment()}
+
+    traffic = {}
+    if 'requests' in data:
+        requests = PhaseIndex(data, windows, value_column='requests')
+        errors = PhaseIndex(data, windows, value_column='errors')
+        traffic = {
+            'Noise': (requests.phase("noise"), errors.phase("noise")),
+            'Non-Noise': (requests.non_noise(), errors.non_noise()),
+            'Overall': (requests.experiment(), errors.experiment())
+        }
+
+    stats = {}
+    for phase, values in phase_values.items():
+        row = {'seconds': len(values), 'median': None, 'mean': None, 'p90': None, 'p99': None,
+               'requests_per_s': None, 'error_rate': None}
+        if len(values):
+            p50, p90, p99 = np.quantile(values, [0.5, 0.9, 0.99])
+            row.update(median=float(p50), mean=float(np.mean(values)), p90=float(p90), p99=float(p99))
+        if phase in traffic:
+            requests, errors = traffic[phase]
+            if len(requests):
+                row['requests_per_s'] = float(np.median(requests))
+            total = requests.sum()
+            row['error_rate'] = float(errors.sum() / total) if total else None
+        stats[phase] = row
+    return stats
+
+def store_series(conn, experiment, directory, threads, endpoint, port, file_path, data, windows, sha256=None,
+                 sketch_file=None):
+    """Replaces the stored statistics of one run of one endpoint."""
+    stats = series_phase_stats(data, windows)
+    sketches_by_phase = {}
+    if sketch_file and os.path.exists(sketch_file):
+        sketches_by_phase = sketches.phase_sketches(sketch_file, windows)
+
+    with conn:
+        conn.execute("DELETE FROM series WHERE experiment = ? AND directory = ? AND endpoint = ? AND port = ?",
+                     (experiment, directory, endpoint, port))
+        series_id = conn.execute(
+            "INSERT INTO series (experiment, directory, threads, endpoint, port, file_path, sha256) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (experiment, directory, threads, endpoint, port, file_path, sha256)).lastrowid
+
+        for phase, row in stats.items():
+            sketch = sketches_by_phase.get(phase)
+            sketch_values = [None, None, None, None, None]
+            if sketch is not None:
+                p50, p99, p999 = sketches.quantiles(sketch, (0.5, 0.99, 0.999))[0]
+                sketch_values = [int(sketch.sum()), nan_to_none(p50), nan_to_none(p99), nan_to_none(p999), pack_sketch(sketch)]
+            conn.execute(
+                "INSERT INTO phase_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [series_id, phase, row['seconds'], row['median'], row['mean'], row['p90'], row['p99'],
+                 row['requests_per_s'], row['error_rate']] + sketch_values)
+    return series_id
+
+def store_comparison(conn, experiment, directory, result, reference_port, port):
+    """Replaces the stored comparison rows of one analyzed cell (a result of analyze_response_data)."""
+    rows = []
+    for phase, median_field in MEDIAN_FIELDS.items():
+        reference_median = result.get(f"Run1 {median_field}")
+        median = result.get(f"Run2 {median_field}")
+        ratio = median / reference_median if reference_median else None
+        ci_lower, ci_upper = result.get(f"CI {phase}", (None, None))
+        throughput_lower, throughput_upper = result.get(f"CI Throughput {phase}", (None, None))
+        rows.append((
+            experiment, directory, int(result['Threads']), result['Endpoint'], reference_port, port, phase,
+            nan_to_none(reference_median), nan_to_none(median), nan_to_none(ratio),
+            nan_to_none(ci_lower), nan_to_none(ci_upper),
+            nan_to_none(result.get(f"RCIW {phase}")), nan_to_none(result.get(f"P-Value {phase}")),
+            result.get(f"Resamples {phase}"),
+            nan_to_none(result.get(f"P99 Ratio {phase}")), nan_to_none(result.get(f"P99.9 Ratio {phase}")),
+            nan_to_none(throughput_lower), nan_to_none(throughput_upper)
+        ))
+
+    with conn:
+        conn.executemany(f"INSERT OR REPLACE INTO comparisons VALUES ({', '.join('?' * 19)})", rows)
+
+def where_clause(filters):
+    """SQL condition and parameters for column filters; list values match any of their items."""
+    conditions, params = [], []
+    for column, value in filters.items():
+        if value is None:
+            continue
+        if isinstance(value, (list, tuple)):
+            conditions.append(f"{column} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+def comparisons(conn, experiment=None, threads=None, endpoint=None, phase=None, port=None):
+    """Comparison rows matching the filters, e.g. the RCIW of flights at 40t across all experiments."""
+    where, params = where_clause({'experiment': experiment, 'threads': threads, 'endpoint': endpoint,
+                                  'phase': phase, 'port': port})
+    query = f"SELECT * FROM comparisons{where} ORDER BY experiment, threads, endpoint, port, phase"
+    return pd.read_sql_query(query, conn, params=params)
+
+def phase_stats(conn, experiment=None, threads=None, endpoint=None, phase=None, port=None):
+    """Per-run phase statistics matching the filters, without the sketch blobs."""
+    where, params = where_clause({'s.experiment': experiment, 's.threads': threads, 's.endpoint': endpoint,
+                                  'p.phase': phase, 's.port': port})
+    query = (
+        "SELECT s.experiment, s.directory, s.threads, s.endpoint, s.port, p.phase, p.seconds, p.median, p.mean, "
+        "p.p90, p.p99, p.requests_per_s, p.error_rate, p.sketch_count, p.sketch_p50, p.sketch_p99, p.sketch_p999 "
+        f"FROM phase_stats p JOIN series s USING (series_id){where} "
+        "ORDER BY s.experiment, s.threads, s.endpoint, s.port, p.phase"
+    )
+    return pd.read_sql_query(query, conn, params=params)
+
+def merged_quantiles(conn, qs=sketches.DEFAULT_QUANTILES, experiment=None, threads=None, endpoint=None, phase=None, port=None):
+    """Request latency quantiles of all stored phase sketches matching the filters, merged into one."""
+    where, params = where_clause({'s.experiment': experiment, 's.threads': threads, 's.endpoint': endpoint,
+                                  'p.phase': phase, 's.port': port})
+    query = f"SELECT p.sketch FROM phase_stats p JOIN series s USING (series_id){where}"
+    condition = " AND " if where else " WHERE "
+    blobs = [row[0] for row in conn.execute(query + condition + "p.sketch IS NOT NULL", params)]
+    if not blobs:
+        return {sketches.quantile_label(q): float('nan') for q in qs}
+    merged = sketches.merge([unpack_sketch(blob) for blob in blobs])
+    return dict(zip((sketches.quantile_label(q) for q in qs), sketches.quantiles(merged, qs)[0]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Queries the results store filled by `pipeline.py --stage store`.")
+    parser.add_argument("store", nargs="?", default=STORE_FILE, help="Path of the SQLite store")
+    parser.add_argument("--table", choices=["comparisons", "phase_stats"], default="comparisons")
+    parser.add_argument("--experiment", action="append", help="Experiment (parent directory), repeatable")
+    parser.add_argument("--threads", type=int, action="append", help="Noise thread count, repeatable")
+    parser.add_argument("--endpoint", action="append", help="Endpoint, repeatable")
+    parser.add_argument("--phase", choices=PHASES, action="append", help="Phase, repeatable")
+    parser.add_argument("--port", type=int, action="append", help="Port, repeatable")
+    parser.add_argument("--output", help="Write the result to this CSV file instead of printing it")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.store):
+        raise SystemExit(f"No results store at '{args.store}'; run `python pipeline.py <config> --stage store` first.")
+
+    conn = connect(args.store)
+    query = comparisons if args.table == "comparisons" else phase_stats
+    table = query(conn, experiment=args.experiment, threads=args.threads, endpoint=args.endpoint,
+                  phase=args.phase, port=args.port)
+    if args.output:
+        table.to_csv(args.output, index=False)
+    else:
+        with pd.option_context('display.max_rows', None, 'display.width', 200):
+            print(table.to_string(index=False))
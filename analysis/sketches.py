@@ -0,0 +1,111 @@
+import numpy as np
+from phases import PhaseIndex
+
+# Log-bucketed quantile sketch with a fixed bucket layout (DDSketch-style).
+# Every sketch is a plain count array over the same buckets, so sketches of
+# seconds, phases or runs merge by adding their arrays, and each sketch takes
+# constant memory regardless of how many values it summarizes.
+
+RELATIVE_ACCURACY = 0.01  # Quantiles are exact to within 1% of the true value
+MIN_VALUE = 1e-3          # Smaller values (ms) fall into the first bucket
+MAX_VALUE = 6e5           # Larger values (ms) fall into the last bucket
+
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+LOG_GAMMA = np.log(GAMMA)
+N_BUCKETS = int(np.ceil(np.log(MAX_VALUE / MIN_VALUE) / LOG_GAMMA)) + 1
+
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+def quantile_label(q):
+    """Column label of a quantile, e.g. 0.999 -> 'p99.9'."""
+    return f"p{q * 100:g}"
+
+def bucket_indices(values):
+    """Maps values to their sketch bucket."""
+    values = np.maximum(np.asarray(values, dtype=np.float64), MIN_VALUE)
+    indices = np.ceil(np.log(values / MIN_VALUE) / LOG_GAMMA)
+    return np.clip(indices, 0, N_BUCKETS - 1).astype(np.int64)
+
+def bucket_values():
+    """Representative value of every bucket, within RELATIVE_ACCURACY of all values in it."""
+    return MIN_VALUE * GAMMA ** np.arange(N_BUCKETS) * 2 / (1 + GAMMA)
+
+def empty_sketches(n_sketches=None):
+    """Returns one empty sketch, or a (n_sketches, N_BUCKETS) array of them."""
+    shape = N_BUCKETS if n_sketches is None else (n_sketches, N_BUCKETS)
+    return np.zeros(shape, dtype=np.uint32)
+
+def sketch_values(values):
+    """Builds the sketch of a sample."""
+    return np.bincount(bucket_indices(values), minlength=N_BUCKETS).astype(np.uint32)
+
+def grouped_sketches(group_codes, values, n_groups):
+    """Builds one sketch per group in a single vectorized pass.
+
+    group_codes holds the group (0..n_groups-1) of every value, e.g. from pd.factorize.
+    """
+    flat = np.asarray(group_codes, dtype=np.int64) * N_BUCKETS + bucket_indices(values)
+    counts = np.bincount(flat, minlength=n_groups * N_BUCKETS)
+    return counts.reshape(n_groups, N_BUCKETS).astype(np.uint32)
+
+def merge(sketches):
+    """Merges a stack of sketches (along the first axis) into one."""
+    return np.asarray(sketches).sum(axis=0, dtype=np.uint64)
+
+def counts(sketches):
+    """Number of values summarized by each sketch."""
+    return np.asarray(sketches).sum(axis=-1, dtype=np.uint64)
+
+def quantiles(sketches, qs=DEFAULT_QUANTILES):
+    """Estimates quantiles of one sketch or row-wise for a 2D stack of sketches.
+
+    Returns an array with one column per quantile (NaN for empty sketches).
+    """
+    sketches = np.atleast_2d(sketches)
+    cumulative = np.cumsum(sketches, axis=1, dtype=np.uint64)
+    totals = cumulative[:, -1].astype(np.float64)
+    representatives = bucket_values()
+
+    result = np.full((len(sketches), len(qs)), np.nan)
+    nonempty = totals > 0
+    for column, q in enumerate(qs):
+        # Interpolate between the two order statistics around the rank, like np.quantile
+        ranks = q * (totals[nonempty] - 1)
+        lower = order_statistic(cumulative[nonempty], np.floor(ranks), representatives)
+        upper = order_statistic(cumulative[nonempty], np.ceil(ranks), representatives)
+        fraction = ranks - np.floor(ranks)
+        result[nonempty, column] = lower + (upper - lower) * fraction
+    return result
+
+def order_statistic(cumulative, ranks, representatives):
+    """Value of the order statistic with the given 0-based rank in every row."""
+    buckets = (cumulative <= ranks[:, None]).sum(axis=1)
+    return representatives[np.minimum(buckets, N_BUCKETS - 1)]
+
+def quantile_ratios(sketch1, sketch2, qs=DEFAULT_QUANTILES):
+    """Ratios quantile(sketch2) / quantile(sketch1), e.g. for tail relative changes."""
+    q1 = quantiles(sketch1, qs)[0]
+    q2 = quantiles(sketch2, qs)[0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(q1 != 0, q2 / q1, np.nan)
+
+def save_sketches(file_path, elapsed_time, sketches):
+    """Stores per-second sketches of one endpoint."""
+    np.savez_compressed(file_path, elapsed_time=np.asarray(elapsed_time), sketches=sketches)
+
+def load_sketches(file_path):
+    """Loads per-second sketches written by save_sketches as (elapsed_time, sketches)."""
+    with np.load(file_path) as data:
+        return data['elapsed_time'], data['sketches']
+
+def phase_sketches(file_path, windows):
+    """Merged sketch of the Noise, Non-Noise and Overall phase of one run's sketch file."""
+    elapsed_time, second_sketches = load_sketches(file_path)
+    # Sketch files are written in time order, so the index slices apply to the sketch rows directly
+    index = PhaseIndex({'elapsed_time': elapsed_time, 'http_req_duration': counts(second_sketches)}, windows)
+    pre_noise, noise, post_noise = index.slices["pre_noise"], index.slices["noise"], index.slices["post_noise"]
+    return {
+        'Noise': merge(second_sketches[noise]),
+        'Non-Noise': merge(second_sketches[pre_noise]) + merge(second_sketches[post_noise]),
+        'Overall': merge(second_sketches[pre_noise.start:post_noise.stop])
+    }
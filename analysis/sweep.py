@@ -0,0 +1,104 @@
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from columnar_cache import DEFAULT_COLUMNS, load_columns
+
+# Arrays inside the shared block start on cache-line boundaries
+ALIGNMENT = 64
+
+# Shared block and arrays attached by the current worker process
+_worker_block = None
+_worker_arrays = {}
+
+def cell_seed(base_seed, key):
+    """Derives an independent, deterministic seed for one cell of the sweep.
+
+    key is the cell's position in the sweep or any stable identifier string.
+    """
+    if isinstance(key, str):
+        key = zlib.crc32(key.encode('utf-8'))
+    return np.random.SeedSequence([base_seed, key])
+
+def share_arrays(arrays):
+    """Copies named arrays into one shared memory block.
+
+    Returns the block and a descriptor table {name: (offset, shape, dtype)} that
+    workers use to rebuild zero-copy views of the arrays.
+    """
+    descriptors = {}
+    offset = 0
+    for name, array in arrays.items():
+        array = np.asarray(array)
+        descriptors[name] = (offset, array.shape, array.dtype.str)
+        offset += -(-array.nbytes // ALIGNMENT) * ALIGNMENT
+
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, array in arrays.items():
+        view = array_view(block, descriptors[name])
+        view[...] = array
+    return block, descriptors
+
+def array_view(block, descriptor):
+    """Returns a numpy view of one array inside a shared memory block."""
+    offset, shape, dtype = descriptor
+    return np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf, offset=offset)
+
+def attach_arrays(block_name, descriptors):
+    """Worker initializer: maps the shared block and exposes read-only views of its arrays."""
+    global _worker_block
+    _worker_block = shared_memory.SharedMemory(name=block_name)
+
+    _worker_arrays.clear()
+    for name, descriptor in descriptors.items():
+        view = array_view(_worker_block, descriptor)
+        view.flags.writeable = False
+        _worker_arrays[name] = view
+
+def run_cell(task):
+    """Runs the worker function of one cell against the shared arrays."""
+    worker, cell, seed = task
+    return worker(cell, _worker_arrays, seed)
+
+def load_file_arrays(file_paths, columns=DEFAULT_COLUMNS):
+    """Loads the columns of every per-endpoint file once, keyed '<file>:<column>' for run_sweep.
+
+    columns is a list of columns or a function of the file path returning them.
+    """
+    arrays = {}
+    for file_path in file_paths:
+        file_columns = columns(file_path) if callable(columns) else columns
+        for column, values in load_columns(file_path, file_columns).items():
+            arrays[f"{file_path}:{column}"] = values
+    return arrays
+
+def file_frame(arrays, file_path, columns=DEFAULT_COLUMNS):
+    """Zero-copy DataFrame of one file's shared arrays; columns that were not loaded are left out."""
+    return pd.DataFrame({column: arrays[f"{file_path}:{column}"] for column in columns
+                         if f"{file_path}:{column}" in arrays}, copy=False)
+
+def run_sweep(worker, cells, arrays, base_seed=0, max_workers=None, cell_keys=None):
+    """Fans independent cells out over a process pool and returns their results in cell order.
+
+    worker(cell, arrays, seed) must be a module-level function. It receives the
+    cell description, a dict of read-only shared arrays and a per-cell seed that
+    only depends on base_seed and the cell's key. Keys default to the cell's
+    position in the sweep; pass stable cell_keys to keep seeds independent of
+    which other cells are part of the sweep.
+    """
+    if cell_keys is None:
+        cell_keys = range(len(cells))
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    block, descriptors = share_arrays(arrays)
+    try:
+        tasks = [(worker, cell, cell_seed(base_seed, key)) for cell, key in zip(cells, cell_keys)]
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=attach_arrays,
+                                 initargs=(block.name, descriptors)) as executor:
+            return list(executor.map(run_cell, tasks))
+    finally:
+        block.close()
+        block.unlink()
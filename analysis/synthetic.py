@@ -0,0 +1,150 @@
+import argparse
+import os
+import numpy as np
+
+# Column layout of k6's CSV output
+K6_COLUMNS = [
+    'metric_name', 'timestamp', 'metric_value', 'check', 'error', 'error_code', 'expected_response', 'group',
+    'method', 'name', 'proto', 'scenario', 'service', 'status', 'subproto', 'tls_version', 'url', 'extra_tags', 'metadata'
+]
+
+# k6 request name, HTTP method, share of the requests and median latency (ms) of every endpoint,
+# following the request mix of k6/script.js
+ENDPOINTS = [
+    ('${}/destinations', 'GET', 0.35, 2.0),
+    ('${}/flights?from=${}', 'GET', 0.35, 3.0),
+    ('${}/flights/${}/seats', 'GET', 0.15, 2.5),
+    ('${}/bookings', 'POST', 0.15, 4.0)
+]
+
+# Rows k6 writes for every HTTP request, and the share of the request duration each timing gets
+REQUEST_METRICS = [
+    ('http_reqs', None),
+    ('http_req_duration', 1.0),
+    ('http_req_blocked', 0.0),
+    ('http_req_connecting', 0.0),
+    ('http_req_tls_handshaking', 0.0),
+    ('http_req_sending', 0.01),
+    ('http_req_waiting', 0.94),
+    ('http_req_receiving', 0.05),
+    ('http_req_failed', None)
+]
+
+BOOKING_CHECK = 'successful booking'
+START_TIMESTAMP = 1_700_000_000
+
+def rows_per_request():
+    """Average number of CSV rows per request; bookings also write a check row."""
+    booking_share = sum(share for name, _, share, _ in ENDPOINTS if 'bookings' in name)
+    return len(REQUEST_METRICS) + booking_share
+
+def request_chunk(rng, n_requests, first_second, seconds, noise, sigma=0.3, error_rate=0.001, port=3000):
+    """CSV text of the k6 rows of n_requests requests spread over `seconds` seconds starting at first_second.
+
+    `noise` is (noise_start, noise_end, factor): latencies inside the window are
+    multiplied by factor.
+    """
+    shares = np.array([share for _, _, share, _ in ENDPOINTS])
+    endpoint = rng.choice(len(ENDPOINTS), size=n_requests, p=shares / shares.sum())
+    second = np.sort(first_second + rng.integers(0, seconds, size=n_requests))
+
+    medians = np.array([median for _, _, _, median in ENDPOINTS])
+    duration = medians[endpoint] * rng.lognormal(0.0, sigma, size=n_requests)
+    noise_start, noise_end, factor = noise
+    in_noise = (second >= noise_start) & (second <= noise_end)
+    duration[in_noise] *= factor
+    failed = rng.random(n_requests) < error_rate
+
+    # Every row is 'metric_name,timestamp,metric_value,' plus a tail of tag columns that only
+    # depends on the endpoint and on whether the request failed, so the tails are formatted once
+    tails = []
+    for name, method, _, _ in ENDPOINTS:
+        url = f"http://sut:{port}" + name.replace('${}', 'x')[1:]
+        for is_failed in (False, True):
+            status = '500' if is_failed else ('201' if method == 'POST' else '200')
+            tags = {'error_code': '1500' if is_failed else '', 'expected_response': 'false' if is_failed else 'true',
+                    'method': method, 'name': name, 'proto': 'HTTP/1.1', 'scenario': 'default', 'status': status, 'url': url}
+            tails.append(','.join(tags.get(column, '') for column in K6_COLUMNS[3:]))
+    check_tail = ','.join({'check': BOOKING_CHECK, 'scenario': 'default'}.get(column, '') for column in K6_COLUMNS[3:])
+
+    # One row per metric and request, in request order like k6's output
+    n_metrics = len(REQUEST_METRICS)
+    request = np.repeat(np.arange(n_requests), n_metrics)
+    metric = np.tile(np.arange(n_metrics), n_requests)
+    values = np.empty(len(request))
+    for code, (metric_name, share) in enumerate(REQUEST_METRICS):
+        rows = metric == code
+        if metric_name == 'http_reqs':
+            values[rows] = 1.0
+        elif metric_name == 'http_req_failed':
+            values[rows] = failed
+        else:
+            values[rows] = duration * share
+    tail = (endpoint * 2 + failed)[request]
+
+    # Bookings are followed by the script's 'successful booking' check
+    is_booking = np.array(['bookings' in name for name, _, _, _ in ENDPOINTS])[endpoint]
+    bookings = np.flatnonzero(is_booking)
+    metric_names = [metric_name for metric_name, _ in REQUEST_METRICS] + ['checks']
+    tails.append(check_tail)
+
+    order = np.argsort(np.concatenate([request.astype(np.float64), bookings + 0.5]), kind='stable')
+    metric = np.concatenate([metric, np.full(len(bookings), n_metrics)])[order]
+    timestamps = (START_TIMESTAMP + np.concatenate([second[request], second[bookings]]))[order]
+    values = np.concatenate([values, (~failed[bookings]).astype(np.float64)])[order]
+    tail = np.concatenate([tail, np.full(len(bookings), len(tails) - 1)])[order]
+
+    return ''.join(f"{metric_names[m]},{t},{v:.6f},{tails[k]}\n"
+                   for m, t, v, k in zip(metric.tolist(), timestamps.tolist(), values.tolist(), tail.tolist()))
+
+def generate_client_results(output_file, n_rows, duration=1000, noise_start=200, noise_end=500, noise_factor=1.0,
+                            seed=0, chunk_rows=1_000_000, port=3000):
+    """Writes a synthetic k6 client_results CSV with about n_rows rows over `duration` seconds.
+
+    Rows are generated and written in chunks of about chunk_rows, in time
+    order, so the memory used does not depend on n_rows. Latencies are
+    lognormal around each endpoint's median and multiplied by noise_factor
+    between noise_start and noise_end (seconds from the start).
+    """
+    rng = np.random.default_rng(seed)
+    n_requests = max(1, int(round(n_rows / rows_per_request())))
+    requests_per_chunk = max(1, int(chunk_rows / rows_per_request()))
+    n_chunks = -(-n_requests // requests_per_chunk)
+    # Every chunk covers an equal slice of the run with an equal share of the requests,
+    # so the file stays in time order at a constant request rate
+    boundaries = np.linspace(0, duration, n_chunks + 1).astype(np.int64)
+    sizes = np.diff(np.linspace(0, n_requests, n_chunks + 1).astype(np.int64))
+
+    with open(output_file, 'w', newline='') as outfile:
+        outfile.write(','.join(K6_COLUMNS) + '\n')
+        for i, size in enumerate(sizes):
+            seconds = max(1, boundaries[i + 1] - boundaries[i])
+            chunk = request_chunk(rng, size, boundaries[i], seconds, (noise_start, noise_end, noise_factor), port=port)
+            outfile.write(chunk)
+    return output_file
+
+def generate_run(run_dir, n_rows, ports=(3000, 3001), noisy_ports=(3001,), noise_factor=1.3, seed=0, **options):
+    """Writes client_results_<port>.csv for a duet run; only noisy_ports are slowed in the noise phase."""
+    os.makedirs(run_dir, exist_ok=True)
+    seed_sequence = np.random.SeedSequence(seed)
+    files = []
+    for port, port_seed in zip(ports, seed_sequence.spawn(len(ports))):
+        output_file = os.path.join(run_dir, f"client_results_{port}.csv")
+        factor = noise_factor if port in noisy_ports else 1.0
+        files.append(generate_client_results(output_file, n_rows, noise_factor=factor, seed=port_seed, port=port, **options))
+    return files
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generates synthetic k6 client_results CSV files of a duet run.")
+    parser.add_argument("run_dir", help="Directory for the client_results_<port>.csv files, e.g. ./synthetic/f_run_20t")
+    parser.add_argument("--rows", type=float, default=1e6, help="Rows per file (e.g. 1e6 to 1e8)")
+    parser.add_argument("--duration", type=int, default=1000, help="Run length in seconds")
+    parser.add_argument("--noise-start", type=int, default=200)
+    parser.add_argument("--noise-end", type=int, default=500)
+    parser.add_argument("--noise-factor", type=float, default=1.3, help="Latency factor of port 3001 in the noise phase")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for output_file in generate_run(args.run_dir, int(args.rows), noise_factor=args.noise_factor, seed=args.seed,
+                                    duration=args.duration, noise_start=args.noise_start, noise_end=args.noise_end):
+        print(f"Synthetic k6 output saved to '{output_file}'.")
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+from preprocessing_filter import filter_and_aggregate_csv, filter_and_aggregate_csv_chunked, normalize_endpoint_name
+from synthetic import generate_client_results
+
+ENDPOINTS = ['bookings', 'destinations', 'flights', 'seats']
+
+def test_traffic_counts_cover_idle_seconds(tmp_path):
+    # About 0.4 requests/s over all endpoints, so most seconds of every endpoint are idle
+    input_file = generate_client_results(str(tmp_path / "client_results_3000.csv"), 4000, duration=1000, seed=1)
+    assert filter_and_aggregate_csv_chunked(input_file, 'http_req_duration', str(tmp_path / "traffic"), traffic_stats=True)
+    filter_and_aggregate_csv(input_file, 'http_req_duration', str(tmp_path / "legacy"))
+
+    raw = pd.read_csv(input_file, usecols=['metric_name', 'timestamp', 'name'])
+    requests = raw[raw['metric_name'] == 'http_reqs']
+    seconds = np.arange(requests['timestamp'].min(), requests['timestamp'].max() + 1) - requests['timestamp'].min()
+
+    for endpoint in ENDPOINTS:
+        data = pd.read_csv(tmp_path / "traffic" / f"{endpoint}.csv")
+        endpoint_requests = requests[requests['name'].map(normalize_endpoint_name) == endpoint]
+
+        # One row per second of the run for every endpoint, on the same origin
+        np.testing.assert_array_equal(data['elapsed_time'], seconds)
+        assert data['requests'].sum() == len(endpoint_requests)
+        assert data['requests'].median() == 0
+        assert (data['requests'] == 0).sum() == len(seconds) - endpoint_requests['timestamp'].nunique()
+
+        # Latencies are unchanged; idle seconds have none
+        legacy = pd.read_csv(tmp_path / "legacy" / f"{endpoint}.csv")
+        busy = data[data['requests'] > 0]
+        np.testing.assert_allclose(busy['http_req_duration'], legacy['http_req_duration'])
+        np.testing.assert_allclose(busy['elapsed_time'] - busy['elapsed_time'].iloc[0], legacy['elapsed_time'])
+        assert data.loc[data['requests'] == 0, 'http_req_duration'].isna().all()
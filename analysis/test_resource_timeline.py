@@ -0,0 +1,74 @@
+import os
+import numpy as np
+import pandas as pd
+import cgroup_sampler
+from preprocessing_filter import START_TIMES_FILE, filter_and_aggregate_csv_chunked
+from resource_timeline import align_with_latency, endpoint_start_time, per_second
+from synthetic import K6_COLUMNS
+
+RUN_START = 1_700_000_000
+BUSY = (20, 25)  # Seconds of the run in which the fake cgroup uses 0.5 instead of 0.1 cores
+
+def write_client_results(file_path, duration=40, bookings_delay=3):
+    """k6 rows of one destinations request per second, and of one booking per second from bookings_delay on."""
+    rows = []
+    for second in range(duration):
+        endpoints = ['${}/destinations'] + (['${}/bookings'] if second >= bookings_delay else [])
+        for name in endpoints:
+            for metric_name, value in (('http_reqs', 1.0), ('http_req_duration', 2.0 + second)):
+                tags = {'name': name, 'status': '200', 'expected_response': 'true'}
+                rows.append([metric_name, RUN_START + second, value] + [tags.get(column, '') for column in K6_COLUMNS[3:]])
+    pd.DataFrame(rows, columns=K6_COLUMNS).to_csv(file_path, index=False)
+
+def cpu_usage_usec(t):
+    """Cumulative CPU time of the fake cgroup at run time t (s)."""
+    busy = min(max(t - BUSY[0], 0), BUSY[1] - BUSY[0])
+    return (0.1 * t + 0.4 * busy) * 1e6
+
+def sample_fake_cgroup(cgroup_dir, monkeypatch, duration=40, interval=0.1):
+    """Samples a fake cgroupfs directory at 10 Hz on a simulated clock."""
+    os.makedirs(cgroup_dir)
+    files = {'cpu.stat': "usage_usec 0\nuser_usec 0\nsystem_usec 0\nnr_periods 0\nnr_throttled 0\nthrottled_usec 0\n",
+             'memory.current': "1048576\n", 'io.stat': "", 'cpu.pressure': "some avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"}
+    for file_name, contents in files.items():
+        with open(os.path.join(cgroup_dir, file_name), 'w') as outfile:
+            outfile.write(contents)
+
+    reader = cgroup_sampler.CgroupReader(cgroup_dir)
+    samples = []
+    for t in np.arange(0, duration, interval):
+        # The reader keeps its descriptors open, so the files are rewritten in place
+        with open(os.path.join(cgroup_dir, 'cpu.stat'), 'r+') as outfile:
+            outfile.write(f"usage_usec {cpu_usage_usec(t):.0f}\nuser_usec 0\nsystem_usec 0\n"
+                          f"nr_periods 0\nnr_throttled 0\nthrottled_usec 0\n")
+            outfile.truncate()
+        monkeypatch.setattr(cgroup_sampler.time, 'time', lambda: RUN_START + t)
+        samples.append(reader.sample())
+    reader.close()
+    return pd.DataFrame(samples, columns=cgroup_sampler.FIELDS)
+
+def test_cgroup_timeline_aligns_with_each_endpoint(tmp_path, monkeypatch):
+    input_file = str(tmp_path / "client_results_3000.csv")
+    write_client_results(input_file)
+    assert filter_and_aggregate_csv_chunked(input_file, 'http_req_duration', str(tmp_path / "3000"))
+    samples = sample_fake_cgroup(str(tmp_path / "cgroup"), monkeypatch)
+
+    bookings_file = str(tmp_path / "3000" / "bookings.csv")
+    start_time = endpoint_start_time(bookings_file)
+    assert start_time == RUN_START + 3
+
+    # Without the recorded start times the origin comes from the client results
+    os.remove(tmp_path / "3000" / START_TIMES_FILE)
+    assert endpoint_start_time(bookings_file, input_file) == start_time
+
+    for endpoint in ('bookings', 'destinations'):
+        latency = pd.read_csv(tmp_path / "3000" / f"{endpoint}.csv")
+        endpoint_start = endpoint_start_time(str(tmp_path / "3000" / f"{endpoint}.csv"), input_file)
+        aligned = align_with_latency(latency, per_second(samples, endpoint_start))
+
+        # Every row is joined with the resources of the same second of the run
+        run_second = aligned['elapsed_time'] + endpoint_start - RUN_START
+        np.testing.assert_allclose(aligned['http_req_duration'], 2.0 + run_second)
+        busy = (run_second >= BUSY[0]) & (run_second < BUSY[1])
+        assert (aligned.loc[busy, 'cpu_cores'] > 0.4).all()
+        assert (aligned.loc[~busy, 'cpu_cores'] < 0.2).all()
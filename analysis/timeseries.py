@@ -1,13 +1,12 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from columnar_cache import load_series
+from downsampling import DEFAULT_MAX_POINTS, downsample, minmax_envelope
 
 def read_csv(file_path):
-    """Reads the CSV file and converts necessary columns to numeric."""
-    df = pd.read_csv(file_path, low_memory=False)
-    df['http_req_duration'] = pd.to_numeric(df['http_req_duration'], errors='coerce')
-    df['elapsed_time'] = pd.to_numeric(df['elapsed_time'], errors='coerce')
-    return df
+    """Reads the CSV file through the typed columnar cache."""
+    return load_series(file_path)
 
 def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     """Filters out the warm-up and cool-down phases from the dataset."""
@@ -15,10 +14,19 @@ def filter_warmup_cooldown(df, warmup_time, cooldown_time):
     experiment_end = df['elapsed_time'].max() - cooldown_time
     return df[(df['elapsed_time'] >= experiment_start) & (df['elapsed_time'] <= experiment_end)]
 
-def plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=60):
+def plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=60, fast=False, max_points=DEFAULT_MAX_POINTS,
+                              method='lttb', output_file=None, title='Time Series Comparison - Baseline (Flights)',
+                              client_saturated=None):
     """Plots the filtered time series for two runs and the aggregated median response time,
-    while highlighting the noise phase."""
-    
+    while highlighting the noise phase.
+
+    With fast, each run is downsampled to max_points with LTTB ('lttb') or drawn as
+    a min/max envelope ('minmax') and plotted directly, without seaborn's per-x
+    confidence band. With output_file the figure is saved there instead of shown.
+    client_saturated takes (start, end) ranges of client_saturation.saturated_intervals
+    and shades them, so that spikes caused by the load generator stand out.
+    """
+
     # Read and filter the data
     data1 = filter_warmup_cooldown(read_csv(file1), warmup_time, cooldown_time)
     data2 = filter_warmup_cooldown(read_csv(file2), warmup_time, cooldown_time)
@@ -34,10 +42,16 @@ def plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=60):
 
     # Highlight the noise period in the background
     plt.axvspan(200, 500, color='red', alpha=0.1, label='Noise Influence Period')
+    for i, (start, end) in enumerate(client_saturated or []):
+        plt.axvspan(start, end, color='gray', alpha=0.3, label='Client Saturated' if i == 0 else None)
 
     # Plot the filtered response times from both runs
-    sns.lineplot(data=data1, x='elapsed_time', y='http_req_duration', color='blue', alpha=1, linewidth=0.8, label='Run 1')
-    sns.lineplot(data=data2, x='elapsed_time', y='http_req_duration', color='orange', alpha=1, linewidth=0.8, label='Run 2')
+    if fast:
+        plot_downsampled(data1, color='blue', label='Run 1', max_points=max_points, method=method)
+        plot_downsampled(data2, color='orange', label='Run 2', max_points=max_points, method=method)
+    else:
+        sns.lineplot(data=data1, x='elapsed_time', y='http_req_duration', color='blue', alpha=1, linewidth=0.8, label='Run 1')
+        sns.lineplot(data=data2, x='elapsed_time', y='http_req_duration', color='orange', alpha=1, linewidth=0.8, label='Run 2')
 
     # Plot the aggregated median response time as a single black line
     #sns.lineplot(data=median_response, x='elapsed_time', y='http_req_duration', color='black', label='Median Response Time')
@@ -45,18 +59,36 @@ def plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=60):
 # Plot settings with larger fonts
     plt.xlabel('Elapsed Time (seconds)', fontsize=14)
     plt.ylabel('HTTP Request Duration (ms)', fontsize=14)
-    plt.title('Time Series Comparison - Baseline (Flights)', fontsize=18)
+    plt.title(title, fontsize=18)
     plt.legend(fontsize=12)
     plt.grid(True)
     plt.xticks(fontsize=12)
     plt.yticks(fontsize=12)
-    plt.show()
+    show_or_save(output_file)
+
+def plot_downsampled(data, color, label, max_points=DEFAULT_MAX_POINTS, method='lttb'):
+    """Draws one run from at most max_points points instead of every row."""
+    data = data.sort_values('elapsed_time')
+    if method == 'minmax':
+        centers, lower, upper = minmax_envelope(data['elapsed_time'], data['http_req_duration'], max_points)
+        plt.fill_between(centers, lower, upper, color=color, alpha=0.5, linewidth=0, label=label)
+    else:
+        x, y = downsample(data['elapsed_time'], data['http_req_duration'], max_points, method)
+        plt.plot(x, y, color=color, alpha=1, linewidth=0.8, label=label)
 
+def show_or_save(output_file=None):
+    """Shows the current figure, or saves it to output_file and releases it."""
+    if output_file is None:
+        plt.show()
+    else:
+        plt.savefig(output_file, dpi=150, bbox_inches='tight')
+        plt.close()
 
-file1 = "./core_isolation/f_run_3t/3000/destinations.csv"
-file2 = "./core_isolation/f_run_3t/3001/destinations.csv"
+if __name__ == "__main__":
+    file1 = "./core_isolation/f_run_3t/3000/destinations.csv"
+    file2 = "./core_isolation/f_run_3t/3001/destinations.csv"
 
-plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=150)
+    plot_median_response_time(file1, file2, warmup_time=60, cooldown_time=150)
 
 
 
@@ -0,0 +1,269 @@
+import os
+import numpy as np
+import pandas as pd
+from columnar_cache import cache_paths, ensure_cache, load_columns, write_atomic
+import sketches
+
+# Window sizes (seconds) of every pyramid level; each is a multiple of a smaller one
+RESOLUTIONS = (1, 5, 10, 30, 60)
+
+def grouped_medians(rows, values, n):
+    """Exact median of the values of every row 0..n-1 (NaN for rows without values)."""
+    order = np.lexsort((values, rows))
+    sorted_values = values[order]
+    counts = np.bincount(rows, minlength=n)
+    starts = np.cumsum(counts) - counts
+    medians = np.full(n, np.nan)
+    nonempty = counts > 0
+    lower = starts[nonempty] + (counts[nonempty] - 1) // 2
+    upper = starts[nonempty] + counts[nonempty] // 2
+    medians[nonempty] = (sorted_values[lower] + sorted_values[upper]) / 2
+    return medians
+
+# Merged ranges of up to this many values get exact medians and quantiles from the raw values
+EXACT_RANGE_VALUES = 1000
+
+# Bump when the stored layout changes so that cached pyramids are rebuilt
+PYRAMID_VERSION = 2
+
+class WindowLevel:
+    """Counts, sums and exact medians of consecutive windows of one size.
+
+    Row k covers the elapsed seconds [(offset + k) * size, (offset + k + 1) * size),
+    so the windows line up with `(elapsed_time // size) * size`. Windows
+    without values are kept as empty rows, which makes every lookup an index.
+    Only the coarsest level also keeps a value sketch per window.
+    """
+
+    def __init__(self, size, offset, counts, sums, medians, window_sketches=None):
+        self.size = size
+        self.offset = offset
+        self.counts = counts
+        self.sums = sums
+        self.medians = medians
+        self.sketches = window_sketches
+
+    def __len__(self):
+        return len(self.counts)
+
+    def rows(self, first, last):
+        """Row slice of the windows first..last-1 (window numbers), clipped to the stored range."""
+        return slice(max(first - self.offset, 0), max(min(last - self.offset, len(self)), 0))
+
+class WindowPyramid:
+    """Window aggregates of one per-endpoint series at several resolutions.
+
+    Built once from the series. Windows of a stored resolution are looked up
+    with their exact medians. Any other range (phase summaries, windows cut by
+    warm-up or cool-down, other window sizes) is computed from the raw values,
+    which the pyramid keeps sorted by second, so its median is exact. Ranges
+    of more than EXACT_RANGE_VALUES values merge the sketches of the whole
+    coarsest windows they contain with sketches of their edge seconds; their
+    medians and quantiles are exact to within sketches.RELATIVE_ACCURACY.
+    """
+
+    def __init__(self, levels, first_time, last_time, values):
+        self.levels = {level.size: level for level in levels}
+        self.first_time = first_time
+        self.last_time = last_time
+        self.values = values
+        # values[bounds[k]:bounds[k + 1]] are the values of row k of the 1 s level
+        self.bounds = np.concatenate(([0], np.cumsum(self.levels[1].counts)))
+
+    @classmethod
+    def from_series(cls, elapsed_time, values, resolutions=RESOLUTIONS):
+        elapsed_time = np.asarray(elapsed_time, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~(np.isnan(elapsed_time) | np.isnan(values))
+        elapsed_time, values = elapsed_time[valid], values[valid]
+        if len(elapsed_time) == 0:
+            raise ValueError("Cannot build a window pyramid of an empty series.")
+
+        if 1 not in resolutions:
+            raise ValueError("The pyramid needs the 1 s resolution to cover arbitrary ranges.")
+
+        seconds = np.floor(elapsed_time).astype(np.int64)
+        levels = []
+        for size in sorted(resolutions):
+            window = seconds // size
+            offset = int(window.min())
+            rows = window - offset
+            n = int(rows.max()) + 1
+            window_sketches = sketches.grouped_sketches(rows, values, n) if size == max(resolutions) else None
+            levels.append(WindowLevel(size, offset, np.bincount(rows, minlength=n),
+                                      np.bincount(rows, weights=values, minlength=n), grouped_medians(rows, values, n),
+                                      window_sketches))
+        return cls(levels, float(elapsed_time.min()), float(elapsed_time.max()), values[np.argsort(seconds, kind='stable')])
+
+    def save(self, file_path):
+        arrays = {'first_time': self.first_time, 'last_time': self.last_time, 'values': self.values}
+        for size, level in self.levels.items():
+            arrays[f"w{size}_offset"] = level.offset
+            arrays[f"w{size}_counts"] = level.counts
+            arrays[f"w{size}_sums"] = level.sums
+            arrays[f"w{size}_medians"] = level.medians
+            if level.sketches is not None:
+                arrays[f"w{size}_sketches"] = level.sketches
+
+        def write(path):
+            with open(path, 'wb') as outfile:
+                np.savez_compressed(outfile, **arrays)
+        write_atomic(file_path, write)
+
+    @classmethod
+    def load(cls, file_path):
+        with np.load(file_path) as data:
+            sizes = sorted(int(key[1:-len('_offset')]) for key in data.files if key.endswith('_offset'))
+            levels = [WindowLevel(size, int(data[f"w{size}_offset"]), data[f"w{size}_counts"], data[f"w{size}_sums"],
+                                  data[f"w{size}_medians"],
+                                  data[f"w{size}_sketches"] if f"w{size}_sketches" in data.files else None)
+                      for size in sizes]
+            return cls(levels, float(data['first_time']), float(data['last_time']), data['values'])
+
+    def range_values(self, start, end):
+        """Raw values of the whole seconds [start, end), ordered by second."""
+        rows = self.levels[1].rows(int(start), int(end))
+        return self.values[self.bounds[rows.start]:self.bounds[max(rows.stop, rows.start)]]
+
+    def range_aggregate(self, start, end):
+        """Count, sum and merged sketch of all values in the whole seconds [start, end).
+
+        Whole windows of the coarsest level contribute their stored sketches;
+        the seconds left at the edges are sketched from their raw values.
+        """
+        start, end = int(start), int(end)
+        level = self.levels[max(self.levels)]
+        first, last = -(-start // level.size), end // level.size  # Windows entirely inside [start, end)
+        count, total, sketch = 0, 0.0, np.zeros(sketches.N_BUCKETS, dtype=np.uint64)
+        edges = [(start, end)]
+        if first < last:
+            rows = level.rows(first, last)
+            count += int(level.counts[rows].sum())
+            total += float(level.sums[rows].sum())
+            if rows.stop > rows.start:
+                sketch += sketches.merge(level.sketches[rows])
+            edges = [(start, first * level.size), (last * level.size, end)]
+
+        for edge_start, edge_end in edges:
+            values = self.range_values(edge_start, edge_end)
+            count += len(values)
+            total += float(values.sum())
+            sketch += sketches.sketch_values(values)
+        return count, total, sketch
+
+    def range_median(self, start, end):
+        """Count, sum and median of the values in the whole seconds [start, end).
+
+        The median is exact for up to EXACT_RANGE_VALUES values, else it comes
+        from the merged sketch.
+        """
+        values = self.range_values(start, end)
+        if len(values) == 0:
+            return 0, 0.0, float('nan')
+        if len(values) <= EXACT_RANGE_VALUES:
+            return len(values), float(values.sum()), float(np.median(values))
+        count, total, sketch = self.range_aggregate(start, end)
+        return count, total, float(sketches.quantiles(sketch, (0.5,))[0, 0])
+
+    def experiment_range(self, warmup_time=0, cooldown_time=0):
+        """Whole seconds [start, end) between warm-up and cool-down, as filter_warmup_cooldown selects them."""
+        return int(np.ceil(self.first_time + warmup_time)), int(np.floor(self.last_time - cooldown_time)) + 1
+
+    def windows(self, window_size, start=None, end=None):
+        """Count, mean and median of every window of window_size seconds within [start, end).
+
+        Windows cut by start or end only aggregate the seconds inside the
+        range, like windows computed after filtering the series. Window sizes
+        that are not a pyramid resolution are computed from the raw values.
+        """
+        start = int(np.floor(self.first_time)) if start is None else int(start)
+        end = int(np.floor(self.last_time)) + 1 if end is None else int(end)
+        first, last = start // window_size, -(-end // window_size)
+
+        if window_size in self.levels:
+            # Whole windows straight from the level; only the two edge windows are recomputed
+            level = self.levels[window_size]
+            rows = level.rows(first, last)
+            time_window = (level.offset + np.arange(rows.start, rows.stop)) * window_size
+            counts = level.counts[rows].astype(np.int64)
+            sums = level.sums[rows].astype(np.float64)
+            medians = level.medians[rows].astype(np.float64)
+            for i in {0, len(time_window) - 1} if len(time_window) else ():
+                window_start = time_window[i]
+                if window_start < start or window_start + window_size > end:
+                    counts[i], sums[i], medians[i] = self.range_median(max(window_start, start),
+                                                                       min(window_start + window_size, end))
+        else:
+            time_window = np.arange(first, last) * window_size
+            aggregates = [self.range_median(max(window_start, start), min(window_start + window_size, end))
+                          for window_start in time_window]
+            counts = np.array([count for count, _, _ in aggregates], dtype=np.int64)
+            sums = np.array([total for _, total, _ in aggregates], dtype=np.float64)
+            medians = np.array([median for _, _, median in aggregates], dtype=np.float64)
+
+        nonempty = counts > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            means = sums / counts
+        return pd.DataFrame({
+            'time_window': time_window.astype(np.float64),
+            'count': counts,
+            'mean': means,
+            'median': medians
+        })[nonempty].reset_index(drop=True)
+
+    def phase_summary(self, start, end, qs=sketches.DEFAULT_QUANTILES):
+        """Count, mean and quantiles of the values in the whole seconds [start, end).
+
+        Quantiles are exact (like np.quantile) for up to EXACT_RANGE_VALUES
+        values, else they come from the merged sketch.
+        """
+        values = self.range_values(start, end)
+        if len(values) <= EXACT_RANGE_VALUES:
+            count, total = len(values), float(values.sum())
+            estimates = np.quantile(values, qs) if count else np.full(len(qs), np.nan)
+        else:
+            count, total, sketch = self.range_aggregate(start, end)
+            estimates = sketches.quantiles(sketch, qs)[0]
+        summary = {'count': count, 'mean': total / count if count else float('nan')}
+        for q, value in zip(qs, estimates):
+            summary[sketches.quantile_label(q)] = float(value)
+        return summary
+
+def pyramid_path(file_path, sha256):
+    """Location of the pyramid of a per-endpoint CSV, next to its columnar cache arrays."""
+    cache_dir, _ = cache_paths(file_path)
+    return os.path.join(cache_dir, f"{os.path.basename(file_path)}.{sha256[:16]}.v{PYRAMID_VERSION}.pyramid.npz")
+
+def load_pyramid(file_path, metric_name='http_req_duration'):
+    """Window pyramid of a per-endpoint CSV, built on first use and cached until the CSV changes."""
+    _, manifest = ensure_cache(file_path)
+    path = pyramid_path(file_path, manifest['sha256'])
+    if os.path.exists(path):
+        return WindowPyramid.load(path)
+
+    columns = load_columns(file_path, ['elapsed_time', metric_name])
+    pyramid = WindowPyramid.from_series(columns['elapsed_time'], columns[metric_name])
+    pyramid.save(path)
+    return pyramid
+
+def relative_change_windows(pyramid1, pyramid2, window_size=10, warmup_time=60, cooldown_time=60):
+    """Windowed median relative change (%) of run 2 against run 1, in the layout of plot_relative_change."""
+    grouped1 = pyramid1.windows(window_size, *pyramid1.experiment_range(warmup_time, cooldown_time))
+    grouped2 = pyramid2.windows(window_size, *pyramid2.experiment_range(warmup_time, cooldown_time))
+    merged_data = pd.merge(grouped1[['time_window', 'median']], grouped2[['time_window', 'median']], on='time_window',
+                           suffixes=('_run1', '_run2'))
+    merged_data = merged_data.rename(columns={'median_run1': 'http_req_duration_run1', 'median_run2': 'http_req_duration_run2'})
+    merged_data['relative_change'] = ((merged_data['http_req_duration_run2'] - merged_data['http_req_duration_run1'])
+                                      / merged_data['http_req_duration_run1']) * 100
+    return merged_data
+
+if __name__ == "__main__":
+    # Example usage:
+    file1 = "./core_isolation/f_run_3t/3000/destinations.csv"
+    file2 = "./core_isolation/f_run_3t/3001/destinations.csv"
+
+    pyramid1, pyramid2 = load_pyramid(file1), load_pyramid(file2)
+    for window_size in RESOLUTIONS:
+        merged_data = relative_change_windows(pyramid1, pyramid2, window_size, warmup_time=60, cooldown_time=150)
+        print(f"{window_size:>3} s windows: median relative change {merged_data['relative_change'].median():.2f}%")
+    print(pyramid2.phase_summary(200, 501))
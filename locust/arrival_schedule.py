@@ -0,0 +1,59 @@
+"""Arrival-rate schedules of the open-model load generators (open_model.py, async_driver.py).
+
+Kept free of Locust imports, so that drivers without Locust can share it.
+"""
+import math
+
+class ArrivalSchedule:
+    """Piecewise linear arrival rate over stages of (end time, start rate, end rate).
+
+    The k-th arrival is due when the integral of the rate reaches k, so the
+    intended start times follow from the schedule alone, independent of how
+    fast the SUT responds.
+    """
+
+    def __init__(self, stages):
+        self.stages = []
+        start, total = 0.0, 0.0
+        for end, rate_start, rate_end in stages:
+            self.stages.append((start, end, rate_start, rate_end, total))
+            total += (rate_start + rate_end) / 2 * (end - start)
+            start = end
+        self.total_arrivals = total
+
+    @classmethod
+    def noise_spike(cls, rate, spike=1.0, ramp_time=60, noise_start=200, noise_end=500, duration=900):
+        """Ramp to rate, hold it, switch to rate * spike inside the noise window, then hold rate again."""
+        spike_rate = rate * spike
+        return cls([
+            (ramp_time, 0.0, rate),
+            (noise_start, rate, rate),
+            (noise_end, spike_rate, spike_rate),
+            (duration, rate, rate)
+        ])
+
+    def rate(self, t):
+        """Target arrival rate at t seconds into the test."""
+        for start, end, rate_start, rate_end, _ in self.stages:
+            if start <= t < end:
+                return rate_start + (rate_end - rate_start) * (t - start) / (end - start)
+        return 0.0
+
+    def max_rate(self):
+        return max(max(rate_start, rate_end) for _, _, rate_start, rate_end, _ in self.stages)
+
+    def arrival_time(self, k):
+        """Intended start of the k-th arrival (0-based) in seconds, or None after the schedule ends."""
+        target = k + 1
+        for start, end, rate_start, rate_end, before in self.stages:
+            duration = end - start
+            in_stage = (rate_start + rate_end) / 2 * duration
+            if target > before + in_stage:
+                continue
+            # Solve before + rate_start * x + slope / 2 * x^2 = target for the offset x
+            remaining = target - before
+            slope = (rate_end - rate_start) / duration
+            if slope == 0:
+                return start + remaining / rate_start
+            return start + (-rate_start + math.sqrt(rate_start ** 2 + 2 * slope * remaining)) / slope
+        return None
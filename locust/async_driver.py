@@ -0,0 +1,391 @@
+"""Open-loop asyncio load driver for the flight-booking API, without Locust.
+
+Runs the same flows as benchmark.py's task sets (20:5 flight searches to
+searches with a booking, with the booking flow's think times) but keeps no
+users: flows arrive on the timer of an ArrivalSchedule, independent of how
+fast the SUT answers, and every flow is a coroutine that waits on timers and
+sockets only. Thousands of concurrent flows fit on one core, and --processes
+splits the arrivals round-robin between processes like open_model.py's
+workers.
+
+Requests go over a minimal HTTP/1.1 client with a pool of keep-alive
+connections per process. With --no-reuse every request opens its own
+connection and closes it afterwards, like k6 with noVUConnectionReuse.
+Every request is recorded with sample_recorder.SampleRecorder, so the usual
+export applies:
+
+    python async_driver.py stub --port 3000 &
+    python async_driver.py run http://localhost:3000 --rate 200 --duration 60 --processes 2
+    python sample_recorder.py 'async_samples_*.samples' ./f_run_3t
+
+The stub subcommand serves canned responses for the four endpoints, for
+testing the driver without the SUT.
+"""
+import argparse
+import asyncio
+import base64
+import json
+import multiprocessing
+import random
+import time
+from urllib.parse import urlsplit
+from arrival_schedule import ArrivalSchedule
+from sample_recorder import SampleRecorder
+
+# Same mix of flows as benchmark.WebsiteUser
+FLOW_WEIGHTS = {'search_flights': 20, 'search_and_book_flight': 5}
+AUTH_HEADER = f"Basic {base64.b64encode(b'user:pw').decode('utf-8')}"
+# Arrivals are handed to timers this many seconds ahead
+TICK = 0.1
+
+class Response:
+    __slots__ = ('status_code', 'body')
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+async def read_response(reader):
+    """Reads one HTTP/1.1 response; returns (status, body, whether the server closes the connection)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed before the response")
+    status = int(status_line.split(b' ', 2)[1])
+
+    length, chunked, close = None, False, status_line.startswith(b'HTTP/1.0')
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.partition(b':')
+        name, value = name.strip().lower(), value.strip().lower()
+        if name == b'content-length':
+            length = int(value)
+        elif name == b'transfer-encoding':
+            chunked = b'chunked' in value
+        elif name == b'connection':
+            close = value == b'close'
+
+    if chunked:
+        parts = []
+        while True:
+            size = int((await reader.readline()).split(b';', 1)[0], 16)
+            if size == 0:
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass  # Trailers
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b''.join(parts)
+    elif length is not None:
+        body = await reader.readexactly(length)
+    else:
+        body, close = await reader.read(), True
+    return status, body, close
+
+class ConnectionPool:
+    """HTTP/1.1 connections to one host, with at most `size` requests in flight.
+
+    With reuse, idle connections are kept and the most recently used one is
+    taken first; a kept connection the server has closed in the meantime is
+    replaced once. Without reuse, every request opens a new connection and
+    asks the server to close it.
+    """
+
+    def __init__(self, host, port, size=1000, reuse=True):
+        self.host = host
+        self.port = port
+        self.reuse = reuse
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.opened = 0
+        self.host_header = f"Host: {host}:{port}\r\n"
+        self.connection_header = "" if reuse else "Connection: close\r\n"
+
+    async def request(self, method, path, body=None, headers=''):
+        head = f"{method} {path} HTTP/1.1\r\n{self.host_header}{self.connection_header}{headers}"
+        if body is not None:
+            head += f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+        message = (head + "\r\n").encode('ascii') + (body or b'')
+
+        async with self.slots:
+            while True:
+                fresh = not self.idle
+                if fresh:
+                    reader, writer = await asyncio.open_connection(self.host, self.port)
+                    self.opened += 1
+                else:
+                    reader, writer = self.idle.pop()
+                try:
+                    writer.write(message)
+                    await writer.drain()
+                    status, response_body, close = await read_response(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    writer.close()
+                    if fresh:
+                        raise
+                    continue  # The server closed the idle connection; retry on a new one
+                except BaseException:
+                    writer.close()  # Timed out or cancelled mid-response; the connection cannot be reused
+                    raise
+
+                if self.reuse and not close:
+                    self.idle.append((reader, writer))
+                else:
+                    writer.close()
+                return Response(status, response_body)
+
+    def close(self):
+        for _, writer in self.idle:
+            writer.close()
+        self.idle = []
+
+class Driver:
+    """Runs the flows of every `processes`-th arrival of a schedule, starting with arrival `index`."""
+
+    def __init__(self, target, schedule, recorder, index=0, processes=1, pool_size=1000, reuse=True, think_scale=1.0,
+                 max_flows=10000, timeout=30.0, seed=0):
+        parts = urlsplit(target)
+        self.pool = ConnectionPool(parts.hostname, parts.port or 80, pool_size, reuse)
+        self.schedule = schedule
+        self.recorder = recorder
+        self.index = index
+        self.processes = processes
+        self.think_scale = think_scale
+        self.max_flows = max_flows
+        self.timeout = timeout
+        self.rng = random.Random(seed)
+        self.flows = set()
+        self.stats = {'flows': 0, 'dropped': 0, 'requests': 0, 'errors': 0, 'max_lateness_ms': 0.0}
+
+    async def run(self):
+        """Hands every arrival to a timer at its intended start and waits for the last flows to finish."""
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        k, last = self.index, start
+        offset = self.schedule.arrival_time(k)
+        while offset is not None:
+            horizon = loop.time() - start + TICK
+            while offset is not None and offset <= horizon:
+                last = start + offset
+                loop.call_at(last, self.start_flow, last)
+                k += self.processes
+                offset = self.schedule.arrival_time(k)
+            await asyncio.sleep(TICK)
+
+        # Let the last timers fire, then wait for the flows they started
+        await asyncio.sleep(max(0.0, last - loop.time()) + TICK)
+        while self.flows:
+            await asyncio.gather(*self.flows, return_exceptions=True)
+        self.pool.close()
+        self.recorder.flush()
+        return dict(self.stats, connections=self.pool.opened)
+
+    def start_flow(self, intended_start):
+        lateness = (asyncio.get_running_loop().time() - intended_start) * 1000
+        self.stats['max_lateness_ms'] = max(self.stats['max_lateness_ms'], lateness)
+        if len(self.flows) >= self.max_flows:
+            # Open loop: an arrival that finds all flow slots busy is counted, not queued
+            self.stats['dropped'] += 1
+            return
+        flow = self.rng.choices(list(FLOW_WEIGHTS), weights=list(FLOW_WEIGHTS.values()))[0]
+        task = asyncio.ensure_future(getattr(self, flow)())
+        self.flows.add(task)
+        task.add_done_callback(self.flows.discard)
+        self.stats['flows'] += 1
+
+    async def request(self, method, path, name, body=None, headers=''):
+        start_time = time.time()
+        started = time.perf_counter()
+        try:
+            response = await asyncio.wait_for(self.pool.request(method, path, body, headers), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            response = None
+        response_time = (time.perf_counter() - started) * 1000
+        self.stats['requests'] += 1
+        if response is None or response.status_code >= 400:
+            self.stats['errors'] += 1
+        self.recorder.on_request(name, start_time, response_time, response=response)
+        return response
+
+    async def think(self, seconds):
+        if seconds and self.think_scale:
+            await asyncio.sleep(seconds * self.think_scale)
+
+    async def search_flights(self):
+        destination_res = await self.request("GET", "/destinations", "/destinations")
+        if destination_res is None or destination_res.status_code != 200:
+            return
+
+        origin = self.rng.choice(destination_res.json()['from'])
+        await self.request("GET", f"/flights?from={origin}", "/flights?from=[from]")
+
+    async def search_and_book_flight(self):
+        destination_res = await self.request("GET", "/destinations", "/destinations")
+        if destination_res is None or destination_res.status_code != 200:
+            return
+
+        origin = self.rng.choice(destination_res.json()['from'])
+        await self.think(1)
+
+        flights_res = await self.request("GET", f"/flights?from={origin}", "/flights?from=[from]")
+        if flights_res is None or flights_res.status_code != 200:
+            return
+
+        random_flight = self.rng.choice(flights_res.json())
+        await self.think(1)
+
+        booking_request = {"flightId": random_flight['id'], "passengers": []}
+        seats_res = await self.request("GET", f"/flights/{random_flight['id']}/seats", "/flights/[id]/seats")
+        if seats_res is not None and seats_res.status_code == 200:
+            seats = seats_res.json()
+            booking_request['passengers'] = [
+                {"name": f"Passenger {i}", "seat": seat['seat']}
+                for i, seat in enumerate(self.rng.sample(seats, min(2, len(seats))))
+            ]
+        else:
+            booking_request['passengers'] = [{"name": "Passenger", "seat": "XX"}]
+
+        await self.think(self.rng.randint(0, 3))
+        await self.request("POST", "/bookings", "/bookings", body=json.dumps(booking_request).encode('utf-8'),
+                           headers=f"Authorization: {AUTH_HEADER}\r\n")
+
+def run_process(index, args):
+    """Entry point of one driver process; prints its summary when the schedule is done."""
+    schedule = ArrivalSchedule.noise_spike(args.rate, args.spike, args.ramp, args.noise_start, args.noise_end,
+                                           args.duration)
+    target = args.target.rstrip('/')
+    recorder = SampleRecorder(args.sample_prefix, run_id=args.run_id,
+                              default_target=str(urlsplit(target).port or urlsplit(target).netloc))
+    driver = Driver(target, schedule, recorder, index, args.processes, args.pool_size, not args.no_reuse,
+                    args.think_scale, args.max_flows, args.timeout, seed=args.seed * 1000 + index)
+    stats = asyncio.run(driver.run())
+    print(f"Process {index}: " + ", ".join(f"{key} {value:.1f}" if isinstance(value, float) else f"{key} {value}"
+                                          for key, value in stats.items()), flush=True)
+
+def stub_payloads(airports=('BER', 'CDG', 'JFK', 'LHR', 'SFO'), seats_per_flight=30):
+    """Canned JSON responses of the stub server, shaped like the SUT's."""
+    flights = [{'id': f"{origin}-{destination}", 'from': origin, 'to': destination, 'status': 'scheduled'}
+               for origin in airports for destination in airports if origin != destination]
+    seats = [{'seat': f"{row}{letter}", 'available': True, 'price': 100}
+             for row in range(1, seats_per_flight // 6 + 1) for letter in 'ABCDEF']
+    return {
+        'destinations': json.dumps({'from': list(airports), 'to': list(airports)}).encode(),
+        'flights': {origin: json.dumps([flight for flight in flights if flight['from'] == origin]).encode()
+                    for origin in airports},
+        'seats': json.dumps(seats).encode(),
+        'booking': json.dumps({'id': 'booking', 'status': 'confirmed'}).encode()
+    }
+
+async def serve_stub(port, latency_ms=0.0):
+    """Serves the four benchmark endpoints with canned responses on keep-alive connections.
+
+    Bodies above 2 KiB are sent chunked, like Go's net/http does for the SUT's
+    larger responses; latency_ms delays every response.
+    """
+    payloads = stub_payloads()
+
+    def route(method, target):
+        path, _, query = target.partition('?')
+        if path == '/destinations':
+            return 200, payloads['destinations']
+        if path.startswith('/flights/') and path.endswith('/seats'):
+            return 200, payloads['seats']
+        if path in ('/flights', '/flights/'):
+            origin = query.partition('from=')[2].split('&', 1)[0]
+            return (200, payloads['flights'][origin]) if origin in payloads['flights'] else (400, b'{"error":"no flights found"}')
+        if path in ('/bookings', '/bookings/') and method == 'POST':
+            return 200, payloads['booking']
+        return 404, b'{"error":"not found"}'
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('ascii').split(' ', 2)
+                length, keep_alive = 0, True
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.partition(b':')
+                    name, value = name.strip().lower(), value.strip().lower()
+                    if name == b'content-length':
+                        length = int(value)
+                    elif name == b'connection':
+                        keep_alive = value != b'close'
+                if length:
+                    await reader.readexactly(length)
+
+                status, body = route(method, target)
+                if latency_ms:
+                    await asyncio.sleep(latency_ms / 1000)
+                head = f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\nContent-Type: application/json; charset=utf-8\r\n"
+                if not keep_alive:
+                    head += "Connection: close\r\n"
+                if len(body) > 2048:
+                    chunks = b''.join(b'%x\r\n%s\r\n' % (len(body[i:i + 2048]), body[i:i + 2048])
+                                      for i in range(0, len(body), 2048))
+                    writer.write(f"{head}Transfer-Encoding: chunked\r\n\r\n".encode('ascii') + chunks + b'0\r\n\r\n')
+                else:
+                    writer.write(f"{head}Content-Length: {len(body)}\r\n\r\n".encode('ascii') + body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, '0.0.0.0', port, backlog=4096)
+    async with server:
+        await server.serve_forever()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Open-loop asyncio load driver for the flight-booking API.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Drive load against a target")
+    run_parser.add_argument("target", help="Base URL of the SUT, e.g. http://localhost:3000")
+    run_parser.add_argument("--rate", type=float, default=50, help="Flows per second of the steady phase (all processes)")
+    run_parser.add_argument("--spike", type=float, default=1.0, help="Arrival rate multiple inside the noise window")
+    run_parser.add_argument("--ramp", type=float, default=60, help="Seconds to ramp up to the rate")
+    run_parser.add_argument("--noise-start", type=float, default=200)
+    run_parser.add_argument("--noise-end", type=float, default=500)
+    run_parser.add_argument("--duration", type=float, default=900, help="Seconds until the last arrival")
+    run_parser.add_argument("--processes", type=int, default=1, help="Driver processes; arrivals are split round-robin")
+    run_parser.add_argument("--pool-size", type=int, default=1000, help="Requests in flight per process")
+    run_parser.add_argument("--no-reuse", action="store_true", help="Open a new connection for every request")
+    run_parser.add_argument("--think-scale", type=float, default=1.0, help="Multiplier of the booking flow's think times")
+    run_parser.add_argument("--max-flows", type=int, default=10000, help="Concurrent flows per process; later arrivals are dropped")
+    run_parser.add_argument("--timeout", type=float, default=30.0, help="Request timeout in seconds")
+    run_parser.add_argument("--sample-prefix", default="async_samples", help="Prefix of the .samples files")
+    run_parser.add_argument("--run-id", type=int, default=0)
+    run_parser.add_argument("--seed", type=int, default=0)
+
+    stub_parser = subparsers.add_parser("stub", help="Serve canned responses for testing the driver")
+    stub_parser.add_argument("--port", type=int, default=3000)
+    stub_parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay of every response")
+    args = parser.parse_args()
+
+    if args.command == "run" and not args.ramp <= args.noise_start <= args.noise_end <= args.duration:
+        parser.error("the schedule needs --ramp <= --noise-start <= --noise-end <= --duration")
+
+    if args.command == "stub":
+        try:
+            asyncio.run(serve_stub(args.port, args.latency_ms))
+        except KeyboardInterrupt:
+            pass
+    elif args.processes == 1:
+        run_process(0, args)
+    else:
+        processes = [multiprocessing.Process(target=run_process, args=(index, args)) for index in range(args.processes)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
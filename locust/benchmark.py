@@ -1,9 +1,20 @@
-from locust import HttpUser, TaskSet, task, between
+from locust import HttpUser, FastHttpUser, TaskSet, task, between, events
 import random
 import time
 import json
 import os
 import base64
+from sample_recorder import recorder_from_env
+from client_monitor import monitor_from_env
+
+# Keep every request sample for the duet analysis, not just Locust's aggregates (set SAMPLE_PREFIX to enable)
+sample_recorder = recorder_from_env()
+if sample_recorder is not None:
+    sample_recorder.attach(events)
+# Per-second client load, so that spikes caused by the client itself can be told apart (set CLIENT_MONITOR_PREFIX to enable)
+client_monitor = monitor_from_env()
+if client_monitor is not None:
+    client_monitor.attach(events)
 
 def select_random_element(data):
     return random.choice(data)
@@ -67,8 +78,22 @@ class SearchAndBookFlightTaskSet(TaskSet):
         res = self.client.post("/bookings", json=booking_request, headers=headers)
         assert res.status_code == 200, "Booking failed"
 
+# Task mix shared by all user classes
+USER_TASKS = {SearchFlightsTaskSet: 20, SearchAndBookFlightTaskSet: 5}
+
 class WebsiteUser(HttpUser):
     wait_time = between(1, 5)
     # Ensure a clean host value with schema and no trailing slashes
     host = os.getenv('TARGET', 'http://localhost').rstrip('/')
-    tasks = {SearchFlightsTaskSet: 20, SearchAndBookFlightTaskSet: 5}
+    tasks = USER_TASKS
+
+class FastWebsiteUser(FastHttpUser):
+    """Same behaviour as WebsiteUser on the geventhttpclient-based client, which
+    needs several times less CPU per request than the requests-based one.
+
+    Select it with `locust -f benchmark.py FastWebsiteUser`; without a class
+    name Locust would spawn both user classes.
+    """
+    wait_time = between(1, 5)
+    host = os.getenv('TARGET', 'http://localhost').rstrip('/')
+    tasks = USER_TASKS
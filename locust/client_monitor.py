@@ -0,0 +1,254 @@
+"""Client-side saturation monitor for the Locust load generator.
+
+A latency spike can come from the SUT or from the client itself: a gevent hub
+too busy to resume greenlets on time, CPU-bound JSON parsing of large
+responses, or code that blocks the hub. In every process that runs users the
+monitor records, per second:
+
+- the event loop lag: how late a greenlet sleeping for `interval` is resumed,
+- the process's CPU utilisation (user + system time per wall second, in cores),
+- the number of requests in flight, sampled with the lag, and
+- the time tasks spent outside network I/O (think times, response parsing and
+  other client work), i.e. task time minus the time the user waited on requests.
+
+Seconds in which the lag or the CPU utilisation exceeded its threshold are
+flagged as saturated, and so are seconds the hub was blocked through
+entirely. The rows go to '<prefix>_<pid>.csv' with the Unix time of each
+second, so the analysis can align them with the request samples
+(analysis/client_saturation.py); every task execution also goes to
+'<prefix>_<pid>.tasks.csv'. Locustfiles only monitor when
+CLIENT_MONITOR_PREFIX is set, as the run_locust_*.sh scripts do.
+"""
+import csv
+import os
+import time
+import weakref
+import gevent
+from locust.clients import HttpSession
+from locust.contrib.fasthttp import FastHttpSession
+from locust.runners import MasterRunner
+from locust.user.task import DefaultTaskSet, TaskSet
+
+FIELDS = ['timestamp', 'lag_max_ms', 'lag_mean_ms', 'cpu_util', 'in_flight_mean', 'in_flight_max', 'requests', 'tasks',
+          'outside_io_ms', 'saturated']
+TASK_FIELDS = ['end_time', 'task', 'duration_ms', 'io_ms', 'outside_io_ms']
+
+def cpu_seconds():
+    """User + system CPU time of this process."""
+    times = os.times()
+    return times.user + times.system
+
+class UserIO:
+    """Network I/O bookkeeping of one user.
+
+    Requests a user sends concurrently (duet.py's paired requests) overlap, so
+    the I/O time is the time at least one of them was in flight, not their sum.
+    """
+    __slots__ = ('active', 'since', 'seconds', '__weakref__')
+
+    def __init__(self):
+        self.active = 0
+        self.since = 0.0
+        self.seconds = 0.0
+
+class ClientMonitor:
+    """Per-process event loop lag, CPU, in-flight request and task timing monitor."""
+
+    def __init__(self, prefix, interval=0.1, lag_threshold_ms=25.0, cpu_threshold=0.9, flush_rows=60):
+        self.path = f"{prefix}_{os.getpid()}.csv"
+        self.tasks_path = f"{prefix}_{os.getpid()}.tasks.csv"
+        self.interval = interval
+        self.lag_threshold_ms = lag_threshold_ms
+        self.cpu_threshold = cpu_threshold
+        self.flush_rows = flush_rows
+
+        self.in_flight = 0
+        self.users = weakref.WeakKeyDictionary()  # User -> UserIO
+        self.sampler = None
+        self.originals = []  # (class, attribute, unwrapped method) of every installed wrapper
+        self.rows = []
+        self.task_rows = []
+        self.reset_second(int(time.time()))
+
+    def attach(self, events):
+        """Registers the monitor on a Locust events object.
+
+        The clients and task sets are only instrumented while a test runs, from
+        test start to test stop.
+        """
+        events.test_start.add_listener(self.on_test_start)
+        events.request.add_listener(self.on_request)
+        events.test_stop.add_listener(self.on_test_stop)
+        events.quitting.add_listener(self.on_quitting)
+        return self
+
+    def instrument(self):
+        """Wraps the request methods of both HTTP clients and the task execution of the task sets.
+
+        The wrappers are installed on the classes, so sessions created by the
+        users themselves (e.g. duet.py's extra targets) are counted as well.
+        restore() puts the original methods back.
+        """
+        for cls, attribute, wrap in ((HttpSession, 'request', self.wrap_request),
+                                     (FastHttpSession, 'request', self.wrap_request),
+                                     (TaskSet, 'execute_task', self.wrap_execute_task),
+                                     (DefaultTaskSet, 'execute_task', self.wrap_execute_task)):
+            method = cls.__dict__[attribute]
+            if not getattr(method, 'monitored', False):
+                setattr(cls, attribute, wrap(method))
+                self.originals.append((cls, attribute, method))
+
+    def restore(self):
+        """Removes the wrappers installed by instrument()."""
+        for cls, attribute, method in reversed(self.originals):
+            setattr(cls, attribute, method)
+        self.originals.clear()
+
+    def user_io(self, user):
+        io = self.users.get(user)
+        if io is None:
+            io = self.users[user] = UserIO()
+        return io
+
+    def wrap_request(self, request):
+        monitor = self
+
+        def monitored_request(session, *args, **kwargs):
+            io = monitor.user_io(session.user) if getattr(session, 'user', None) is not None else None
+            monitor.in_flight += 1
+            if io is not None:
+                if io.active == 0:
+                    io.since = time.perf_counter()
+                io.active += 1
+            try:
+                return request(session, *args, **kwargs)
+            finally:
+                monitor.in_flight -= 1
+                if io is not None:
+                    io.active -= 1
+                    if io.active == 0:
+                        io.seconds += time.perf_counter() - io.since
+
+        monitored_request.monitored = True
+        return monitored_request
+
+    def wrap_execute_task(self, execute_task):
+        monitor = self
+
+        def monitored_execute_task(taskset, task):
+            if isinstance(task, type) and issubclass(task, TaskSet):
+                # A nested task set runs until it is interrupted; its own tasks are timed instead
+                return execute_task(taskset, task)
+            io = monitor.user_io(taskset.user)
+            io.seconds = 0.0
+            start = time.perf_counter()
+            try:
+                return execute_task(taskset, task)
+            finally:
+                monitor.on_task(getattr(task, '__name__', str(task)), time.perf_counter() - start, io.seconds)
+
+        monitored_execute_task.monitored = True
+        return monitored_execute_task
+
+    def reset_second(self, second):
+        self.second = second
+        self.lags = []
+        self.in_flight_samples = []
+        self.requests = 0
+        self.tasks = 0
+        self.outside_io = 0.0
+        self.cpu_start = cpu_seconds()
+        self.wall_start = time.monotonic()
+
+    def on_request(self, **kwargs):
+        self.requests += 1
+
+    def on_task(self, name, duration, io_seconds):
+        outside_io = max(0.0, duration - io_seconds)
+        self.tasks += 1
+        self.outside_io += outside_io
+        self.task_rows.append([f"{time.time():.6f}", name, f"{duration * 1000:.3f}", f"{io_seconds * 1000:.3f}",
+                               f"{outside_io * 1000:.3f}"])
+
+    def close_second(self):
+        """Turns the samples of the current second into a row and starts the next second.
+
+        If the hub was blocked past the following seconds, they get rows as
+        well: they have no samples of their own, but the lag spanned them, so
+        they are saturated.
+        """
+        wall = time.monotonic() - self.wall_start
+        cpu_util = (cpu_seconds() - self.cpu_start) / wall if wall > 0 else 0.0
+        lag_max = max(self.lags, default=0.0) * 1000
+        lag_mean = sum(self.lags) / len(self.lags) * 1000 if self.lags else 0.0
+        in_flight = self.in_flight_samples or [self.in_flight]
+        saturated = lag_max > self.lag_threshold_ms or cpu_util >= self.cpu_threshold
+        self.rows.append([self.second, f"{lag_max:.3f}", f"{lag_mean:.3f}", f"{cpu_util:.4f}",
+                          f"{sum(in_flight) / len(in_flight):.2f}", max(in_flight), self.requests, self.tasks,
+                          f"{self.outside_io * 1000:.3f}", int(saturated)])
+
+        now = int(time.time())
+        for second in range(self.second + 1, now):
+            self.rows.append([second, f"{lag_max:.3f}", f"{lag_max:.3f}", f"{cpu_util:.4f}", f"{self.in_flight:.2f}",
+                              self.in_flight, 0, 0, "0.000", 1])
+        self.reset_second(now)
+        if len(self.rows) >= self.flush_rows:
+            self.flush()
+
+    def run(self):
+        """Sampler greenlet: measures how late each sleep of `interval` seconds returns."""
+        self.reset_second(int(time.time()))
+        while True:
+            expected = time.monotonic() + self.interval
+            gevent.sleep(self.interval)
+            self.lags.append(max(0.0, time.monotonic() - expected))
+            self.in_flight_samples.append(self.in_flight)
+            if int(time.time()) != self.second:
+                self.close_second()
+
+    def on_test_start(self, environment, **kwargs):
+        # The master of a distributed run sends no requests
+        if isinstance(environment.runner, MasterRunner) or self.sampler is not None:
+            return
+        self.instrument()
+        self.sampler = gevent.spawn(self.run)
+
+    def on_test_stop(self, **kwargs):
+        if self.sampler is None:
+            return
+        self.sampler.kill()
+        self.sampler = None
+        self.restore()
+        self.close_second()
+        self.flush()
+
+    def flush(self):
+        """Appends the finished rows of both files, writing the headers of new files."""
+        for path, fields, rows in ((self.path, FIELDS, self.rows), (self.tasks_path, TASK_FIELDS, self.task_rows)):
+            if not rows:
+                continue
+            new_file = not os.path.exists(path)
+            with open(path, 'a', newline='') as outfile:
+                writer = csv.writer(outfile)
+                if new_file:
+                    writer.writerow(fields)
+                writer.writerows(rows)
+            rows.clear()
+
+    def on_quitting(self, **kwargs):
+        self.on_test_stop()
+        self.flush()
+
+def monitor_from_env():
+    """Monitor configured through CLIENT_MONITOR_PREFIX, CLIENT_MONITOR_INTERVAL (s),
+    CLIENT_LAG_THRESHOLD_MS and CLIENT_CPU_THRESHOLD (cores).
+
+    Monitoring is opt-in: returns None unless CLIENT_MONITOR_PREFIX is set.
+    """
+    prefix = os.getenv('CLIENT_MONITOR_PREFIX')
+    if not prefix:
+        return None
+    return ClientMonitor(prefix,
+                         interval=float(os.getenv('CLIENT_MONITOR_INTERVAL', '0.1')),
+                         lag_threshold_ms=float(os.getenv('CLIENT_LAG_THRESHOLD_MS', '25')),
+                         cpu_threshold=float(os.getenv('CLIENT_CPU_THRESHOLD', '0.9')))
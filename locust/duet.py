@@ -0,0 +1,112 @@
+"""Paired duet variant of benchmark.py: one client drives both SUT instances.
+
+Every logical request is sent to all targets at the same time from
+cooperative greenlets, with the same path, payload and think times. Choices
+such as the departure airport, flight and seats are taken from the reference
+target's response (the instances are seeded with identical data). Every
+sample is tagged with a pair id and its target, so the analysis can compare
+the targets request by request instead of as two independent samples.
+
+Run with `locust -f duet.py`; the targets are set through DUET_TARGETS.
+"""
+import base64
+import itertools
+import os
+import time
+import random
+from urllib.parse import urlsplit
+import gevent
+from locust import HttpUser, events, between
+from locust.clients import HttpSession
+import benchmark  # Imported as a module so that its WebsiteUser is not picked up
+from request_log import RequestLog
+
+# Comma-separated base URLs; the first one is the reference target
+TARGETS = [target.rstrip('/') for target in os.getenv('DUET_TARGETS', 'http://localhost:3000,http://localhost:3001').split(',')]
+# Per-request log with pair ids, for the paired analysis
+REQUEST_LOG = os.getenv('DUET_LOG', 'duet_requests')
+
+# Pair ids only need to be unique within a process; the log file is per process
+pair_ids = itertools.count()
+request_log = RequestLog(REQUEST_LOG, ['pair_id', 'target']).attach(events)
+
+def target_label(target):
+    """Short label of a target for request names, e.g. its port."""
+    parts = urlsplit(target)
+    return str(parts.port) if parts.port else parts.netloc
+
+def all_ok(responses):
+    """True if every target answered with 200, so the pair can go on with the same choices."""
+    return all(response is not None and response.status_code == 200 for response in responses)
+
+def search_flights(user):
+    destination_res = user.paired("GET", "/destinations")
+    if not all_ok(destination_res):
+        return None
+
+    destination = destination_res[0].json()
+    return user.paired("GET", f"/flights?from={benchmark.select_random_element(destination['from'])}",
+                       name="/flights?from=[from]")
+
+def search_and_book_flight(user):
+    destination_res = user.paired("GET", "/destinations")
+    if not all_ok(destination_res):
+        return
+
+    destination = destination_res[0].json()
+    time.sleep(1)
+
+    flights_res = user.paired("GET", f"/flights?from={benchmark.select_random_element(destination['from'])}",
+                              name="/flights?from=[from]")
+    if not all_ok(flights_res):
+        return
+
+    random_flight = benchmark.select_random_element(flights_res[0].json())
+    time.sleep(1)
+
+    booking_request = {"flightId": random_flight['id'], "passengers": []}
+    seats_res = user.paired("GET", f"/flights/{random_flight['id']}/seats", name="/flights/[id]/seats")
+    if all_ok(seats_res):
+        seats = seats_res[0].json()
+        booking_request['passengers'] = [
+            {"name": f"Passenger {i}", "seat": v['seat']}
+            for i, v in enumerate(benchmark.select_random_unique_elements(seats, 2))
+        ]
+    else:
+        booking_request['passengers'] = [{"name": "Passenger", "seat": "XX"}]
+
+    time.sleep(random.randint(0, 3))
+
+    auth_header = base64.b64encode(b"user:pw").decode("utf-8")
+    headers = {"Authorization": f"Basic {auth_header}"}
+    user.paired("POST", "/bookings", json=booking_request, headers=headers)
+
+class DuetUser(HttpUser):
+    wait_time = between(1, 5)
+    host = TARGETS[0]
+    # Same mix of flows as benchmark.WebsiteUser
+    tasks = {search_flights: 20, search_and_book_flight: 5}
+
+    def on_start(self):
+        # self.client talks to the reference target; one more session per other target
+        self.clients = [self.client] + [
+            HttpSession(base_url=target, request_event=self.environment.events.request, user=self)
+            for target in TARGETS[1:]
+        ]
+        self.labels = [target_label(target) for target in TARGETS]
+
+    def paired(self, method, path, name=None, **kwargs):
+        """Sends the same request to all targets concurrently and returns their responses.
+
+        Stats are kept per target under '<label> <name>'. A response is None if
+        its request raised instead of returning.
+        """
+        pair_id = next(pair_ids)
+        name = name or path
+        greenlets = [
+            gevent.spawn(client.request, method, path, name=f"{label} {name}",
+                         context={'pair_id': pair_id, 'target': label}, **kwargs)
+            for client, label in zip(self.clients, self.labels)
+        ]
+        gevent.joinall(greenlets)
+        return [greenlet.value for greenlet in greenlets]
@@ -0,0 +1,120 @@
+"""Open-model variant of benchmark.py: requests arrive on a fixed arrival-rate
+schedule instead of whenever a closed-loop user is done waiting.
+
+A pool of users claims the arrivals of the schedule in order. A user sleeps
+until its arrival's intended start time and then runs one flow without think
+times. When the SUT slows down and all users are busy, later arrivals start
+late but are never skipped, and every request records the intended start of
+its arrival, so latency can be corrected for coordinated omission:
+
+    corrected latency = (start_time - intended_start) * 1000 + response_time
+
+Run with `locust -f open_model.py`; the schedule is configured through the
+OPEN_MODEL_* environment variables below.
+"""
+import base64
+import itertools
+import math
+import os
+import random
+import time
+from locust import HttpUser, LoadTestShape, events, task, constant
+from arrival_schedule import ArrivalSchedule
+import benchmark  # Imported as a module so that its closed-loop WebsiteUser is not picked up
+from request_log import RequestLog
+
+# Target arrival rate of the steady phase (flows per second, all workers together)
+RATE = float(os.getenv('OPEN_MODEL_RATE', '50'))
+# Arrival rate during the noise window, as a multiple of RATE (1 keeps the load constant)
+SPIKE = float(os.getenv('OPEN_MODEL_SPIKE', '1'))
+RAMP_TIME = float(os.getenv('OPEN_MODEL_RAMP', '60'))
+NOISE_START = float(os.getenv('OPEN_MODEL_NOISE_START', '200'))
+NOISE_END = float(os.getenv('OPEN_MODEL_NOISE_END', '500'))
+DURATION = float(os.getenv('OPEN_MODEL_DURATION', '900'))
+# Users kept per arrival per second; bounds how far the pool can fall behind a slow SUT
+POOL_SECONDS = float(os.getenv('OPEN_MODEL_POOL_SECONDS', '2'))
+# Arrivals are split round-robin between this many worker processes
+WORKERS = int(os.getenv('OPEN_MODEL_WORKERS', '1'))
+# Per-request log with intended and actual start times
+REQUEST_LOG = os.getenv('OPEN_MODEL_LOG', 'open_model_requests')
+
+schedule = ArrivalSchedule.noise_spike(RATE, SPIKE, RAMP_TIME, NOISE_START, NOISE_END, DURATION)
+# Arrival numbers of this process; gevent switches only on I/O, so next() needs no lock
+arrivals = None
+test_start_time = None
+request_log = RequestLog(REQUEST_LOG, ['intended_start', 'arrival']).attach(events)
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global arrivals, test_start_time
+    worker_index = getattr(environment.runner, 'worker_index', 0) % WORKERS
+    arrivals = itertools.count(worker_index, WORKERS)
+    test_start_time = time.time()
+
+def search_flights(client, context):
+    destination_res = client.get("/destinations", context=context)
+    if destination_res.status_code != 200:
+        return None
+
+    destination = destination_res.json()
+    return client.get(f"/flights?from={benchmark.select_random_element(destination['from'])}",
+                      name="/flights?from=[from]", context=context)
+
+def search_and_book_flight(client, context):
+    flights_res = search_flights(client, context)
+    if flights_res is None or flights_res.status_code != 200:
+        return
+
+    random_flight = benchmark.select_random_element(flights_res.json())
+    booking_request = {"flightId": random_flight['id'], "passengers": []}
+    seats_res = client.get(f"/flights/{random_flight['id']}/seats", name="/flights/[id]/seats", context=context)
+    if seats_res.status_code == 200:
+        booking_request['passengers'] = [
+            {"name": f"Passenger {i}", "seat": v['seat']}
+            for i, v in enumerate(benchmark.select_random_unique_elements(seats_res.json(), 2))
+        ]
+    else:
+        booking_request['passengers'] = [{"name": "Passenger", "seat": "XX"}]
+
+    auth_header = base64.b64encode(b"user:pw").decode("utf-8")
+    headers = {"Authorization": f"Basic {auth_header}"}
+    client.post("/bookings", json=booking_request, headers=headers, context=context)
+
+# Same mix of flows as benchmark.WebsiteUser, without the think times
+FLOWS = [search_flights, search_and_book_flight]
+FLOW_WEIGHTS = [20, 5]
+
+class OpenModelUser(HttpUser):
+    """Pool member that runs the flow of the next unclaimed arrival at its intended start."""
+    wait_time = constant(0)
+    host = os.getenv('TARGET', 'http://localhost').rstrip('/')
+
+    @task
+    def next_arrival(self):
+        k = next(arrivals)
+        offset = schedule.arrival_time(k)
+        if offset is None:
+            # Schedule exhausted; idle until the shape stops the test
+            time.sleep(1)
+            return
+
+        intended_start = test_start_time + offset
+        delay = intended_start - time.time()
+        if delay > 0:
+            time.sleep(delay)
+
+        flow = random.choices(FLOWS, weights=FLOW_WEIGHTS)[0]
+        flow(self.client, {'intended_start': intended_start, 'arrival': k})
+
+class ArrivalRateShape(LoadTestShape):
+    """Keeps a user pool large enough for the schedule's peak rate and stops at its end.
+
+    The pool size only bounds concurrency; the request rate itself is set by the
+    arrival schedule.
+    """
+
+    def tick(self):
+        if self.get_run_time() > DURATION:
+            return None
+        pool_size = max(1, math.ceil(schedule.max_rate() * POOL_SECONDS))
+        return pool_size, pool_size
@@ -0,0 +1,42 @@
+import csv
+import os
+
+class RequestLog:
+    """Writes one CSV row per request that was tagged with the given context fields.
+
+    Locust only keeps aggregated statistics; this log keeps the per-request
+    values the analysis needs (e.g. intended start times or pair ids). Each
+    process writes its own '<prefix>_<pid>.csv', so workers never share a file.
+    """
+
+    def __init__(self, prefix, context_fields):
+        self.path = f"{prefix}_{os.getpid()}.csv"
+        self.context_fields = list(context_fields)
+        self.outfile = None
+        self.writer = None
+
+    def attach(self, events):
+        """Registers the request and quitting listeners on a Locust events object."""
+        events.request.add_listener(self.on_request)
+        events.quitting.add_listener(self.on_quitting)
+        return self
+
+    def on_request(self, name, start_time, response_time, exception, context, response=None, **kwargs):
+        if self.context_fields[0] not in context:
+            return
+        if self.writer is None:
+            self.outfile = open(self.path, 'w', newline='')
+            self.writer = csv.writer(self.outfile)
+            self.writer.writerow(['name'] + self.context_fields + ['start_time', 'response_time', 'status', 'exception'])
+
+        status = getattr(response, 'status_code', '')
+        self.writer.writerow(
+            [name] + [context.get(field, '') for field in self.context_fields]
+            + [f"{start_time:.6f}", f"{response_time:.3f}", status, '' if exception is None else type(exception).__name__]
+        )
+
+    def on_quitting(self, **kwargs):
+        if self.outfile is not None:
+            self.outfile.close()
+            self.outfile = None
+            self.writer = None
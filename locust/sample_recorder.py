@@ -0,0 +1,222 @@
+"""Records every Locust request into preallocated column buffers.
+
+Locust itself only keeps aggregated statistics. The recorder keeps one row per
+request (start time, endpoint, target, latency, status, pair id) in fixed-size
+typed arrays, so recording a request only stores a few numbers and allocates
+nothing. Full buffers are appended as one block to '<prefix>_<pid>.samples';
+the endpoint and target names go to '<prefix>_<pid>.names.json'. Locustfiles
+only record when SAMPLE_PREFIX is set, as the run_locust_*.sh scripts do.
+
+The recorded samples can be exported straight to the per-endpoint
+'elapsed_time,http_req_duration' files of the analysis, one directory per
+target, without going through preprocessing_filter.py:
+
+    python sample_recorder.py 'samples_*.samples' ./f_run_3t
+"""
+import argparse
+import csv
+import glob
+import json
+import os
+import statistics
+import struct
+import sys
+from array import array
+from urllib.parse import urlsplit
+
+# Rows kept in memory before a block is written
+DEFAULT_CAPACITY = 65536
+
+# Column name -> array typecode, in the order the columns are stored in a block
+COLUMNS = [
+    ('start_time', 'd'),     # Unix time (seconds) the request was sent
+    ('response_time', 'd'),  # Milliseconds
+    ('status', 'H'),         # HTTP status, 0 if no response was received
+    ('endpoint', 'H'),       # Code into the endpoint names
+    ('target', 'H'),         # Code into the target names
+    ('pair_id', 'q')         # Pair id of duet requests, -1 otherwise
+]
+
+BLOCK_HEADER = struct.Struct('<II')  # Number of rows, run id
+
+# Unix time of elapsed time 0 of every exported endpoint file, per target directory;
+# the same record as analysis/preprocessing_filter.py writes
+START_TIMES_FILE = 'start_times.json'
+
+def normalize_endpoint_name(raw_name):
+    """Maps a request name to the endpoint name used for the output file.
+
+    Same rules as analysis/preprocessing_filter.normalize_endpoint_name, plus
+    the Locust request URLs, which contain ids instead of k6's '${}' markers.
+    """
+    name = urlsplit(raw_name).path if '://' in raw_name else raw_name
+    name = name.split(' ')[-1].strip("${}/")
+
+    if "seats" in name:
+        name = "seats"
+
+    if "flights?from" in name:
+        name = "flights"
+
+    return name
+
+class SampleRecorder:
+    """Per-process request recorder with preallocated column buffers."""
+
+    def __init__(self, prefix, run_id=0, capacity=DEFAULT_CAPACITY, default_target=''):
+        self.path = f"{prefix}_{os.getpid()}.samples"
+        self.names_path = f"{prefix}_{os.getpid()}.names.json"
+        self.run_id = run_id
+        self.capacity = capacity
+        self.default_target = default_target
+
+        self.buffers = {column: array(typecode, bytes(array(typecode).itemsize * capacity)) for column, typecode in COLUMNS}
+        self.size = 0
+
+        # Raw request name -> endpoint code; each distinct name is normalized once
+        self.name_codes = {}
+        self.endpoints = {}
+        self.targets = {}
+
+    def attach(self, events):
+        """Registers the recorder on a Locust events object."""
+        events.test_start.add_listener(self.on_test_start)
+        events.request.add_listener(self.on_request)
+        events.quitting.add_listener(self.on_quitting)
+        return self
+
+    def on_test_start(self, environment, **kwargs):
+        if not self.default_target and environment.host:
+            self.default_target = str(urlsplit(environment.host).port or urlsplit(environment.host).netloc)
+
+    def code(self, codes, name):
+        code = codes.get(name)
+        if code is None:
+            code = codes[name] = len(codes)
+        return code
+
+    def on_request(self, name, start_time, response_time, response=None, context=None, **kwargs):
+        code = self.name_codes.get(name)
+        if code is None:
+            code = self.name_codes[name] = self.code(self.endpoints, normalize_endpoint_name(name))
+
+        i = self.size
+        buffers = self.buffers
+        buffers['start_time'][i] = start_time
+        buffers['response_time'][i] = response_time
+        buffers['status'][i] = getattr(response, 'status_code', 0) or 0
+        buffers['endpoint'][i] = code
+        if context:
+            buffers['target'][i] = self.code(self.targets, str(context.get('target', self.default_target)))
+            buffers['pair_id'][i] = context.get('pair_id', -1)
+        else:
+            buffers['target'][i] = self.code(self.targets, self.default_target)
+            buffers['pair_id'][i] = -1
+
+        self.size = i + 1
+        if self.size == self.capacity:
+            self.flush()
+
+    def flush(self):
+        """Appends the buffered rows as one block and starts over with the same buffers."""
+        if self.size == 0:
+            return
+        with open(self.path, 'ab') as outfile:
+            outfile.write(BLOCK_HEADER.pack(self.size, self.run_id))
+            for column, _ in COLUMNS:
+                outfile.write(memoryview(self.buffers[column])[:self.size])
+        self.size = 0
+
+        names = {'endpoints': sorted(self.endpoints, key=self.endpoints.get),
+                 'targets': sorted(self.targets, key=self.targets.get)}
+        with open(self.names_path, 'w') as outfile:
+            json.dump(names, outfile)
+
+    def on_quitting(self, **kwargs):
+        self.flush()
+
+def read_samples(path):
+    """Reads a .samples file as a dict of column arrays plus the run ids and names."""
+    columns = {column: array(typecode) for column, typecode in COLUMNS}
+    run_ids = array('I')
+    with open(path, 'rb') as infile:
+        while True:
+            header = infile.read(BLOCK_HEADER.size)
+            if len(header) < BLOCK_HEADER.size:
+                break
+            n, run_id = BLOCK_HEADER.unpack(header)
+            for column, typecode in COLUMNS:
+                block = array(typecode)
+                block.frombytes(infile.read(block.itemsize * n))
+                columns[column].extend(block)
+            run_ids.extend([run_id] * n)
+
+    with open(path[:-len('.samples')] + '.names.json', 'r') as infile:
+        names = json.load(infile)
+    return columns, run_ids, names
+
+def export_endpoint_files(pattern, output_dir, metric_name='http_req_duration'):
+    """Writes '<output_dir>/<target>/<endpoint>.csv' with the per-second median latency.
+
+    Merges all sample files matching the pattern (e.g. of several workers) and
+    aggregates them like preprocessing_filter.py: one row per whole second, with
+    elapsed time counted from the endpoint's first second. That second is saved
+    per endpoint to START_TIMES_FILE in the target directory, for aligning
+    other timelines (e.g. of client_monitor.py) with the files.
+    """
+    seconds = {}
+    for path in sorted(glob.glob(pattern)):
+        columns, _, names = read_samples(path)
+        endpoints, targets = names['endpoints'], names['targets']
+        for start_time, response_time, endpoint, target in zip(columns['start_time'], columns['response_time'],
+                                                               columns['endpoint'], columns['target']):
+            key = (targets[target], endpoints[endpoint])
+            seconds.setdefault(key, {}).setdefault(int(start_time), []).append(response_time)
+
+    written = []
+    start_times = {}
+    for (target, endpoint), by_second in seconds.items():
+        target_dir = os.path.join(output_dir, target)
+        os.makedirs(target_dir, exist_ok=True)
+        output_file = os.path.join(target_dir, f"{endpoint}.csv")
+
+        timestamps = sorted(by_second)
+        start_time = timestamps[0]
+        start_times.setdefault(target_dir, {})[endpoint] = float(start_time)
+        with open(output_file, 'w', newline='') as outfile:
+            writer = csv.DictWriter(outfile, fieldnames=['elapsed_time', metric_name])
+            writer.writeheader()
+            for timestamp in timestamps:
+                writer.writerow({
+                    'elapsed_time': float(timestamp - start_time),
+                    metric_name: statistics.median(by_second[timestamp])
+                })
+        written.append(output_file)
+
+    for target_dir, target_start_times in start_times.items():
+        with open(os.path.join(target_dir, START_TIMES_FILE), 'w') as outfile:
+            json.dump(target_start_times, outfile)
+    return written
+
+def recorder_from_env():
+    """Recorder configured through SAMPLE_PREFIX, SAMPLE_RUN_ID and SAMPLE_TARGET.
+
+    Recording is opt-in: returns None unless SAMPLE_PREFIX is set.
+    """
+    prefix = os.getenv('SAMPLE_PREFIX')
+    if not prefix:
+        return None
+    return SampleRecorder(prefix, run_id=int(os.getenv('SAMPLE_RUN_ID', '0')),
+                          default_target=os.getenv('SAMPLE_TARGET', ''))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exports recorded Locust samples to per-endpoint analysis files.")
+    parser.add_argument("pattern", help="Glob of the .samples files to merge, e.g. 'samples_*.samples'")
+    parser.add_argument("output_dir", help="Run directory; one subdirectory per target is written")
+    args = parser.parse_args()
+
+    files = export_endpoint_files(args.pattern, args.output_dir)
+    if not files:
+        sys.exit(f"No samples found for '{args.pattern}'.")
+    for output_file in files:
+        print(f"Aggregated CSV saved to '{output_file}'.")
@@ -0,0 +1,75 @@
+import asyncio
+import socket
+from collections import Counter
+from arrival_schedule import ArrivalSchedule
+from async_driver import Driver, serve_stub
+
+RATE = 50      # Flows per second
+DURATION = 2   # Seconds of arrivals
+
+class NameRecorder:
+    """Stands in for SampleRecorder; keeps the name of every request."""
+
+    def __init__(self):
+        self.names = Counter()
+
+    def on_request(self, name, start_time, response_time, response=None, **kwargs):
+        self.names[name] += 1
+
+    def flush(self):
+        pass
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def drive_stub(reuse):
+    """Runs a Driver against the stub server for DURATION seconds; returns its stats and recorded names."""
+    port = free_port()
+    recorder = NameRecorder()
+
+    async def run():
+        stub = asyncio.ensure_future(serve_stub(port))
+        while True:
+            try:
+                _, writer = await asyncio.open_connection('127.0.0.1', port)
+            except OSError:
+                await asyncio.sleep(0.05)
+                continue
+            writer.close()
+            await writer.wait_closed()
+            break
+        try:
+            driver = Driver(f"http://127.0.0.1:{port}", ArrivalSchedule([(DURATION, RATE, RATE)]), recorder, reuse=reuse,
+                            think_scale=0, timeout=5.0, seed=1)
+            return await driver.run()
+        finally:
+            # Let the stub's handlers see the driver's connections close before stopping it
+            await asyncio.sleep(0.1)
+            stub.cancel()
+
+    return asyncio.run(run()), recorder.names
+
+def test_driver_reuses_connections():
+    stats, names = drive_stub(reuse=True)
+    flows = RATE * DURATION
+    assert stats['flows'] == flows
+    assert stats['dropped'] == 0
+    assert stats['errors'] == 0
+
+    # Every flow starts with /destinations; only the booking flow posts a booking
+    assert names['/destinations'] == flows
+    assert names['/flights?from=[from]'] == flows
+    assert names['/flights/[id]/seats'] == names['/bookings']
+    assert 0.1 * flows < names['/bookings'] < 0.3 * flows  # 5 of 25 flows book
+    assert stats['requests'] == sum(names.values())
+
+    # Keep-alive: a handful of connections serve all requests
+    assert stats['connections'] * 10 < stats['requests']
+
+def test_driver_without_reuse_opens_a_connection_per_request():
+    stats, names = drive_stub(reuse=False)
+    assert stats['flows'] == RATE * DURATION
+    assert stats['errors'] == 0
+    assert stats['connections'] == stats['requests'] == sum(names.values())
@@ -0,0 +1,74 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from workload_trace import load_trace, take_snapshot, write_trace
+
+FLIGHTS = [
+    {'id': 'FL1', 'from': 'VIE', 'to': 'BER'},
+    {'id': 'FL2', 'from': 'VIE', 'to': 'MUC'},
+    {'id': 'FL3', 'from': 'BER', 'to': 'VIE'}
+]
+# FL2 is fully booked, so the fake SUT answers 404 for its seats like the real one
+SEATS = {'FL1': ['1A', '1B', '1C', '2A'], 'FL2': [], 'FL3': ['1A', '1B']}
+
+class FakeSUT(BaseHTTPRequestHandler):
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        if parts == ['flights']:
+            self.send(200, FLIGHTS)
+        elif len(parts) == 3 and parts[0] == 'flights' and parts[2] == 'seats' and SEATS.get(parts[1]):
+            self.send(200, [{'seat': seat, 'available': True} for seat in SEATS[parts[1]]])
+        else:
+            self.send(404, {'error': 'no seats available'})
+
+    def send(self, status, payload):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+def snapshot_of_fake_sut(tmp_path):
+    """Snapshot of the fake SUT, saved and reloaded like the snapshot command does."""
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeSUT)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        snapshot = take_snapshot(f"http://127.0.0.1:{server.server_address[1]}")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    snapshot_file = tmp_path / "snapshot.json"
+    snapshot_file.write_text(json.dumps(snapshot))
+    return json.loads(snapshot_file.read_text())
+
+def test_fully_booked_flights_have_no_seats(tmp_path):
+    snapshot = snapshot_of_fake_sut(tmp_path)
+    assert snapshot['seats'] == SEATS
+
+def test_same_seed_and_snapshot_give_identical_traces(tmp_path):
+    snapshot = snapshot_of_fake_sut(tmp_path)
+    traces = []
+    for name, seed in (("first", 7), ("second", 7), ("other_seed", 8)):
+        trace_file = tmp_path / f"{name}.jsonl"
+        write_trace(snapshot, str(trace_file), 500, seed=seed)
+        traces.append(trace_file.read_bytes())
+
+    assert traces[0] == traces[1]
+    assert traces[0] != traces[2]
+
+    # No seat is booked twice, and the fully booked flight is never booked
+    booked = []
+    for think, steps in load_trace(str(tmp_path / "first.jsonl")):
+        for method, path, name, body, after in steps:
+            if method == "POST":
+                booking = json.loads(body)
+                booked.extend((booking['flightId'], passenger['seat']) for passenger in booking['passengers'])
+    assert booked
+    assert len(booked) == len(set(booked))
+    assert all(flight_id != 'FL2' for flight_id, seat in booked)
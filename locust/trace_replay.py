@@ -0,0 +1,69 @@
+"""Replays a workload trace written by workload_trace.py.
+
+The trace is parsed once when the test starts. Users then take the next
+iteration of the trace in order and send its pre-built requests with its
+think times, without parsing responses or drawing random numbers, so the
+offered workload is the same for every run and client CPU goes into sending
+requests. Each worker replays every TRACE_WORKERS-th iteration.
+
+Run with `TRACE_FILE=trace.jsonl locust -f trace_replay.py`.
+"""
+import base64
+import itertools
+import os
+import time
+from locust import FastHttpUser, events, task, constant
+from workload_trace import load_trace
+import sample_recorder
+import client_monitor
+
+TRACE_FILE = os.getenv('TRACE_FILE', 'trace.jsonl')
+# Iterations are split round-robin between this many worker processes
+TRACE_WORKERS = int(os.getenv('TRACE_WORKERS', '1'))
+# Start over at the beginning when the trace runs out instead of idling
+TRACE_LOOP = os.getenv('TRACE_LOOP', '0') == '1'
+
+HEADERS = {
+    "Authorization": f"Basic {base64.b64encode(b'user:pw').decode('utf-8')}",
+    "Content-Type": "application/json"
+}
+
+trace = []
+iterations = iter(())
+recorder = sample_recorder.recorder_from_env()
+if recorder is not None:
+    recorder.attach(events)
+monitor = client_monitor.monitor_from_env()
+if monitor is not None:
+    monitor.attach(events)
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    global trace, iterations
+    trace = load_trace(TRACE_FILE)
+    worker_index = getattr(environment.runner, 'worker_index', 0) % TRACE_WORKERS
+    share = trace[worker_index::TRACE_WORKERS]
+    iterations = itertools.cycle(share) if TRACE_LOOP else iter(share)
+
+class TraceUser(FastHttpUser):
+    """Sends the requests of the next trace iteration; the think times come from the trace."""
+    wait_time = constant(0)
+    host = os.getenv('TARGET', 'http://localhost').rstrip('/')
+
+    @task
+    def replay(self):
+        iteration = next(iterations, None)
+        if iteration is None:
+            # Trace exhausted; idle until the run time ends
+            time.sleep(1)
+            return
+
+        think, steps = iteration
+        time.sleep(think)
+        for method, path, name, body, after in steps:
+            if body is None:
+                self.client.request(method, path, name=name)
+            else:
+                self.client.request(method, path, name=name, data=body, headers=HEADERS)
+            if after:
+                time.sleep(after)
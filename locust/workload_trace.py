@@ -0,0 +1,143 @@
+"""Offline, seeded workload traces for trace_replay.py.
+
+A trace fixes every decision the benchmark users make at runtime: which flow
+runs, the departure airport, flight and seats, the request bodies and all
+think times. Two replays of the same trace therefore offer the same workload
+to every SUT version.
+
+    python workload_trace.py snapshot http://localhost:3000 snapshot.json
+    python workload_trace.py generate snapshot.json trace.jsonl --iterations 100000 --seed 1
+
+The snapshot holds the SUT's flights and available seats; the instances are
+seeded with fixed data, so one snapshot serves all of them. Each trace line
+is one iteration: {"think": seconds before it, "steps": [[method, path, name,
+body, seconds after], ...]}, with bodies already serialized.
+"""
+import argparse
+import json
+import random
+import urllib.error
+import urllib.request
+
+# Same mix and think times as benchmark.WebsiteUser
+FLOW_WEIGHTS = {'search_flights': 20, 'search_and_book_flight': 5}
+THINK_TIME = (1, 5)
+BOOKING_PASSENGERS = 2
+
+def fetch_json(base_url, path):
+    with urllib.request.urlopen(f"{base_url.rstrip('/')}{path}") as response:
+        return json.load(response)
+
+def available_seats(base_url, flight_id):
+    """Available seats of a flight; the SUT answers 404 for a fully booked flight."""
+    try:
+        seats = fetch_json(base_url, f"/flights/{flight_id}/seats")
+    except urllib.error.HTTPError as e:
+        if e.code != 404:
+            raise
+        return []
+    return [seat['seat'] for seat in seats]
+
+def take_snapshot(base_url):
+    """Fetches the flights and their available seats from a running SUT."""
+    flights = fetch_json(base_url, "/flights")
+    return {
+        'flights': flights,
+        'seats': {flight['id']: available_seats(base_url, flight['id']) for flight in flights}
+    }
+
+class TraceGenerator:
+    """Draws iterations like the benchmark task sets, from a seeded random stream.
+
+    Booked seats are removed from the snapshot's pool, so a trace replayed
+    against a freshly started SUT never books a seat twice.
+    """
+
+    def __init__(self, snapshot, seed=0):
+        self.rng = random.Random(seed)
+        self.seats = {flight_id: list(seats) for flight_id, seats in snapshot['seats'].items()}
+        self.flights_from = {}
+        for flight in snapshot['flights']:
+            self.flights_from.setdefault(flight['from'], []).append(flight['id'])
+        self.airports = sorted(self.flights_from)
+        self.flows = list(FLOW_WEIGHTS)
+        self.weights = [FLOW_WEIGHTS[flow] for flow in self.flows]
+
+    def iteration(self):
+        """Draws one iteration: a flow, its requests and the think time before it."""
+        flow = self.rng.choices(self.flows, weights=self.weights)[0]
+        steps = self.search_and_book_flight() if flow == 'search_and_book_flight' else self.search_flights()[0]
+        return {'think': round(self.rng.uniform(*THINK_TIME), 3), 'steps': steps}
+
+    def search_flights(self, think_after=0):
+        """Steps of a flight search and the chosen departure airport."""
+        origin = self.rng.choice(self.airports)
+        return [
+            ["GET", "/destinations", "/destinations", None, think_after],
+            ["GET", f"/flights?from={origin}", "/flights?from=[from]", None, think_after]
+        ], origin
+
+    def search_and_book_flight(self):
+        steps, origin = self.search_flights(think_after=1)
+        candidates = [flight_id for flight_id in self.flights_from[origin] if self.seats.get(flight_id)]
+        if not candidates:
+            return steps
+
+        flight_id = self.rng.choice(candidates)
+        available = self.seats[flight_id]
+        chosen = self.rng.sample(available, min(BOOKING_PASSENGERS, len(available)))
+        for seat in chosen:
+            available.remove(seat)
+
+        body = json.dumps({
+            "flightId": flight_id,
+            "passengers": [{"name": f"Passenger {i}", "seat": seat} for i, seat in enumerate(chosen)]
+        }, separators=(',', ':'))
+        return steps + [
+            ["GET", f"/flights/{flight_id}/seats", "/flights/[id]/seats", None, self.rng.randint(0, 3)],
+            ["POST", "/bookings", "/bookings", body, 0]
+        ]
+
+def write_trace(snapshot, output_file, iterations, seed=0):
+    """Writes a trace of the given number of iterations as JSON lines."""
+    generator = TraceGenerator(snapshot, seed)
+    with open(output_file, 'w') as outfile:
+        for _ in range(iterations):
+            outfile.write(json.dumps(generator.iteration(), separators=(',', ':')))
+            outfile.write('\n')
+
+def load_trace(trace_file):
+    """Loads a trace as a list of (think, steps) with request bodies encoded once, up front."""
+    trace = []
+    with open(trace_file, 'r') as infile:
+        for line in infile:
+            iteration = json.loads(line)
+            steps = tuple(
+                (method, path, name, body.encode('utf-8') if body is not None else None, after)
+                for method, path, name, body, after in iteration['steps']
+            )
+            trace.append((iteration['think'], steps))
+    return trace
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Snapshots SUT data and generates seeded workload traces.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_parser = commands.add_parser("snapshot", help="Fetch flights and seats from a running SUT")
+    snapshot_parser.add_argument("base_url")
+    snapshot_parser.add_argument("output_file")
+
+    generate_parser = commands.add_parser("generate", help="Generate a trace from a snapshot")
+    generate_parser.add_argument("snapshot_file")
+    generate_parser.add_argument("output_file")
+    generate_parser.add_argument("--iterations", type=int, default=100000)
+    generate_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.command == "snapshot":
+        with open(args.output_file, 'w') as outfile:
+            json.dump(take_snapshot(args.base_url), outfile)
+    else:
+        with open(args.snapshot_file, 'r') as infile:
+            snapshot = json.load(infile)
+        write_trace(snapshot, args.output_file, args.iterations, args.seed)
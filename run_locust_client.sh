@@ -8,10 +8,20 @@ TIMESTAMP=$3
 BUCKET_NAME=$4
 USERNAME=$(whoami)
 
-locust -f /flight-booking-service/locust/benchmark.py --host=http://$SUT_IP:$SERVICE_PORT --headless -u 180 --run-time 10m --csv=client_results_${SERVICE_PORT} --html=client_results_${SERVICE_PORT}.html --spawn-rate=10
+# Raw per-request samples, exported below to the analysis' per-endpoint format
+export SAMPLE_PREFIX=client_samples_${SERVICE_PORT}
+export SAMPLE_TARGET=${SERVICE_PORT}
+# Per-second client lag, CPU and in-flight requests, to flag seconds where the client itself was saturated
+export CLIENT_MONITOR_PREFIX=client_monitor_${SERVICE_PORT}
+
+locust -f /flight-booking-service/locust/benchmark.py WebsiteUser --host=http://$SUT_IP:$SERVICE_PORT --headless -u 180 --run-time 10m --csv=client_results_${SERVICE_PORT} --html=client_results_${SERVICE_PORT}.html --spawn-rate=10
 
 wait
 
+python3 /flight-booking-service/locust/sample_recorder.py "client_samples_${SERVICE_PORT}_*.samples" .
+cp client_monitor_${SERVICE_PORT}_*.csv ${SERVICE_PORT}/
+gsutil cp -r ${SERVICE_PORT} gs://duet-benchmarking-results/${TIMESTAMP}/${SERVICE_PORT}
+
 
 gsutil cp ../client_results_${SERVICE_PORT}_stats.csv gs://duet-benchmarking-results/${TIMESTAMP}/client_results_${SERVICE_PORT}_stats.csv & gsutil cp ../client_results_${SERVICE_PORT}.html gs://duet-benchmarking-results/${TIMESTAMP}/client_results_${SERVICE_PORT}.html
 
@@ -0,0 +1,69 @@
+#!/bin/bash
+
+# Parameters passed from the orchestrating VM
+SUT_IP=$1
+SERVICE_PORT=$2
+TIMESTAMP=$3
+BUCKET_NAME=$4
+WORKERS=${5:-2}
+USER_CLASS=${6:-FastWebsiteUser}
+USERNAME=$(whoami)
+
+if [ -z "$SUT_IP" ] || [ -z "$SERVICE_PORT" ] || [ -z "$TIMESTAMP" ] || [ -z "$BUCKET_NAME" ]; then
+    echo "Usage: $0 <SUT_IP> <port> <timestamp> <bucket_name> [workers] [user_class]"
+    exit 1
+fi
+
+# The master reads the run settings; workers only get the locustfile and the master's address
+LOCUST_CONFIG=/flight-booking-service/locust/distributed.conf
+LOCUSTFILE=/flight-booking-service/locust/benchmark.py
+
+# Same core layout as start_in_cgroup.sh (port 3000+i on cores 2i and 2i+1), so the
+# clients of all SUT instances can share one VM without competing for cores
+if ! [[ "$SERVICE_PORT" =~ ^[0-9]+$ ]] || [ "$SERVICE_PORT" -lt 3000 ]; then
+    echo "Unsupported port: $SERVICE_PORT. Ports start at 3000. Exiting."
+    exit 1
+fi
+FIRST_CORE=$((2 * (SERVICE_PORT - 3000)))
+CORES=($FIRST_CORE $((FIRST_CORE + 1)))
+if [ "${CORES[1]}" -ge "$(nproc --all)" ]; then
+    echo "Unsupported port: $SERVICE_PORT. It needs cores ${CORES[*]}, but this host has $(nproc --all) cores. Exiting."
+    exit 1
+fi
+CPU_AFFINITY=$(IFS=,; echo "${CORES[*]}")
+
+# Each master listens on its own port so that both launchers can run side by side
+MASTER_PORT=$((5557 + 10 * (SERVICE_PORT - 3000)))
+
+# Raw per-request samples of every worker, merged and exported below
+export SAMPLE_PREFIX=client_samples_${SERVICE_PORT}
+export SAMPLE_TARGET=${SERVICE_PORT}
+# Per-second client lag, CPU and in-flight requests, to flag seconds where the client itself was saturated
+export CLIENT_MONITOR_PREFIX=client_monitor_${SERVICE_PORT}
+
+# One worker process per core by default; extra workers are assigned round-robin
+WORKER_PIDS=()
+for ((i = 0; i < WORKERS; i++)); do
+    CORE=${CORES[$((i % ${#CORES[@]}))]}
+    taskset -c $CORE locust -f $LOCUSTFILE $USER_CLASS --worker \
+        --master-host=127.0.0.1 --master-port=$MASTER_PORT &
+    WORKER_PIDS+=($!)
+    echo "Worker $i started with PID $! on core $CORE."
+done
+
+# The master only aggregates statistics and shares the cores of its workers
+taskset -c $CPU_AFFINITY locust --config=$LOCUST_CONFIG $USER_CLASS --master \
+    --master-bind-port=$MASTER_PORT --expect-workers=$WORKERS \
+    --host=http://$SUT_IP:$SERVICE_PORT \
+    --csv=client_results_${SERVICE_PORT} --html=client_results_${SERVICE_PORT}.html
+
+wait "${WORKER_PIDS[@]}"
+
+python3 /flight-booking-service/locust/sample_recorder.py "client_samples_${SERVICE_PORT}_*.samples" .
+cp client_monitor_${SERVICE_PORT}_*.csv ${SERVICE_PORT}/
+gsutil cp -r ${SERVICE_PORT} gs://duet-benchmarking-results/${TIMESTAMP}/${SERVICE_PORT}
+
+
+gsutil cp client_results_${SERVICE_PORT}_stats.csv gs://duet-benchmarking-results/${TIMESTAMP}/client_results_${SERVICE_PORT}_stats.csv & gsutil cp client_results_${SERVICE_PORT}.html gs://duet-benchmarking-results/${TIMESTAMP}/client_results_${SERVICE_PORT}.html
+
+wait
@@ -59,15 +59,20 @@ else
 fi
 BIND_ADDRESS="0.0.0.0:$PORT"
 
-# Define CPU affinity based on the port
-if [ "$PORT" -eq 3000 ]; then
-    CPU_AFFINITY="0,1"  # Use cores 0 and 1
-elif [ "$PORT" -eq 3001 ]; then
-    CPU_AFFINITY="2,3"  # Use cores 2 and 3
-else
-    echo "Unsupported port: $PORT. Exiting."
+# Define CPU affinity based on the port: instance i (port 3000+i) gets cores 2i and 2i+1,
+# so N instances side by side use cores 0..2N-1 without sharing any
+if ! [[ "$PORT" =~ ^[0-9]+$ ]] || [ "$PORT" -lt 3000 ]; then
+    echo "Unsupported port: $PORT. Ports start at 3000. Exiting."
+    exit 1
+fi
+INSTANCE=$((PORT - 3000))
+FIRST_CORE=$((2 * INSTANCE))
+LAST_CORE=$((FIRST_CORE + 1))
+if [ "$LAST_CORE" -ge "$(nproc --all)" ]; then
+    echo "Unsupported port: $PORT. It needs cores $FIRST_CORE and $LAST_CORE, but this host has $(nproc --all) cores. Exiting."
     exit 1
 fi
+CPU_AFFINITY="$FIRST_CORE,$LAST_CORE"
 
 # Ensure the cgroup exists
 if [ ! -d "$CGROUP_PATH" ]; then